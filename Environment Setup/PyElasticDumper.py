@@ -1,13 +1,17 @@
 import os
+import sys
 import json
 import argparse
-from elasticsearch import Elasticsearch, helpers
+from elasticsearch import Elasticsearch
+
+# The incremental loader (document ids, content hashes, bulk state) is shared with the backend loaders
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from es_loader import (BULK_CHUNK_SIZE, BULK_MAX_RETRIES, BULK_THREADS, ES_HOST, ES_INDEX_NAME,
+                       index_documents_in_es, prepare_es_index)
 
 
 # **Constants**
 DEST_FILE = "company_data.json"
-ES_INDEX_NAME = "y_combinator_companies"
-ES_HOST = "http://localhost:9200"
 
 
 # **Step 1: Convert .jl File to JSON**
@@ -30,6 +34,7 @@ def prepare_data(data):
     for obj in data:
         text_data = f"{obj['company_name']} {obj['short_description']} {obj['long_description']}"
         metadata = {
+            "company_id": obj.get("company_id"),
             "company_name": obj["company_name"],
             "description": obj["batch"],
             "status": obj["status"],
@@ -50,57 +55,6 @@ def prepare_data(data):
     return documents
 
 
-# **Step 3: Create Elasticsearch Index**
-def create_es_index(es, index_name):
-    """Creates an Elasticsearch index with proper mapping if it does not already exist."""
-    mapping = {
-        "mappings": {
-            "properties": {
-                "text": {"type": "text"},
-                "metadata": {
-                    "properties": {
-                        "company_name": {"type": "text"},
-                        "description": {"type": "text"},
-                        "tags": {"type": "text"},
-                        "location": {"type": "text"},
-                        "country": {"type": "text"},
-                        "year_founded": {"type": "integer"},
-                        "num_founders": {"type": "integer"},
-                        "founders_names": {"type": "text"},
-                        "team_size": {"type": "integer"},
-                        "website": {"type": "keyword"},
-                        "linkedin_url": {"type": "keyword"},
-                        "status": {"type": "text"},
-                        "ycombinator": {"type": "keyword"}
-                    }
-                },
-            }
-        }
-    }
-
-    if not es.indices.exists(index=index_name):
-        es.indices.create(index=index_name, body=mapping)
-        print(f"✅ Index '{index_name}' created successfully.")
-    else:
-        print(f"⚠️ Index '{index_name}' already exists.")
-
-
-# **Step 4: Index Documents in Elasticsearch**
-def index_documents_in_es(es, index_name, documents):
-    """Indexes a list of documents into Elasticsearch."""
-    actions = [
-        {
-            "_index": index_name,
-            "_id": doc_id,
-            "_source": doc,
-        }
-        for doc_id, doc in enumerate(documents)
-    ]
-
-    helpers.bulk(es, actions)
-    print(f"✅ Indexed {len(documents)} documents in Elasticsearch.")
-
-
 # **Main Execution**
 if __name__ == "__main__":
     os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"  # Prevent duplicate library errors
@@ -109,6 +63,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process a .jl file and index it in Elasticsearch.")
     parser.add_argument("source_file", type=str, nargs="?", default="output.jl",
                         help="Path to the .jl file (default: output.jl)")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="Documents per bulk request")
+    parser.add_argument("--threads", type=int, default=BULK_THREADS, help="Parallel bulk requests")
+    parser.add_argument("--max-retries", type=int, default=BULK_MAX_RETRIES, help="Retries for failed documents")
+    parser.add_argument("--full", action="store_true", help="Re-send every document, ignoring saved content hashes (removed ones are still deleted)")
 
     args = parser.parse_args()
     SOURCE_FILE = args.source_file
@@ -128,10 +86,12 @@ if __name__ == "__main__":
         print("✅ Connected to Elasticsearch.")
 
         print("\n📌 Step 4: Creating Elasticsearch Index")
-        create_es_index(es, ES_INDEX_NAME)
+        empty = prepare_es_index(es, ES_INDEX_NAME)
 
         print("\n📌 Step 5: Indexing Data in Elasticsearch")
-        index_documents_in_es(es, ES_INDEX_NAME, documents)
+        # An empty index holds nothing, whatever the saved hashes say
+        index_documents_in_es(es, ES_INDEX_NAME, documents, args.chunk_size, args.threads, args.max_retries,
+                              full=args.full or empty)
 
     else:
         print("❌ Could not connect to Elasticsearch. Ensure it is running.")
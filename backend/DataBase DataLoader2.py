@@ -1,116 +1,124 @@
-import faiss
 import json
+import argparse
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import os
+from embedders import MODEL_NAME, load_embedder
+from ann_index import INDEX_TYPES, read_ann_index
+from metadata_store import MetadataStore
+from inverted_index import InvertedIndex, hybrid_rerank
+from faiss_index_builder import build_faiss_index as build_index, update_faiss_index as update_index
+from embedding_build import EMBED_WORKERS, encode_parallel
+from embedding_store import EmbeddingStore, embedding_model_id
 
 DATA_FILE = "company_data_cleaned_final.json"
 FAISS_INDEX_FILE = "faiss_index.bin"
-FAISS_DATA_FILE = "faiss_data.json"
+FAISS_METADATA_DIR = "faiss_metadata"
+FAISS_INDEX_TYPE = os.environ.get("FAISS_INDEX_TYPE", "flat")  # flat | hnsw | ivf_flat | ivf_pq
+EMBEDDING_CACHE = os.environ.get("EMBEDDING_CACHE", "1") != "0"
 
-# Load Sentence Transformer model
-model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+# Embedding model (torch, onnx or onnx_int8 backend, same vectors), loaded on first use: encoder
+# workers are spawned and re-import this script, so loading it at import time would load it twice
+EMBEDDER_BACKEND = os.environ.get("EMBEDDER_BACKEND", "torch")
+model = None
+
+def get_model():
+    global model
+    if model is None:
+        model = load_embedder(EMBEDDER_BACKEND)
+    return model
 
 def load_data(file_path):
     with open(file_path, "r") as file:
         return json.load(file)
 
-# ✅ Safe handling of None values
-def preprocess_data(item):
-    meta = item.get("metadata", {})
-    combined_text = " ".join([
-        str(item.get("text", "")),  
-        str(meta.get("company_name", "")),  
-        str(meta.get("description", "")),  
-        str(meta.get("status", "")),  
-        " ".join(map(str, meta.get("tags", []))),  
-        str(meta.get("location", "")),  
-        str(meta.get("country", "")),  
-        str(meta.get("year_founded", "")),  
-        " ".join(map(str, meta.get("founders_names", []))),  
-        str(meta.get("team_size", "")),  
-        str(meta.get("website", "")),  
-        str(meta.get("linkedin_url", "")),
-        str(meta.get("ycombinator", ""))  
-    ])
-    return combined_text.strip().lower()
-
-
-def build_faiss_index(data):
-    processed_texts = [preprocess_data(item) for item in data]
-    full_json_data = {i: item for i, item in enumerate(data)}
-
-    # Encode combined text as embeddings
-    embeddings = model.encode(processed_texts, convert_to_numpy=True, show_progress_bar=True)
-
-    # Create FAISS Index (HNSW for better performance)
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index = faiss.IndexIDMap(index)
-    index.add_with_ids(embeddings, np.array(list(full_json_data.keys())))
-
-    # ✅ Save FAISS Index & Data
-    faiss.write_index(index, FAISS_INDEX_FILE)
-    with open(FAISS_DATA_FILE, "w", encoding="utf-8") as file:
-        json.dump(full_json_data, file, ensure_ascii=False, indent=4)
-
-    print("✅ FAISS index and data saved successfully!")
+# ✅ Chunked, resumable encoding; > 1 worker shards the chunks across processes
+embed_workers = EMBED_WORKERS
+
+def encode_texts(texts):
+    # With several workers each one loads its own model; the parent only needs one in-process
+    embedder = get_model() if embed_workers <= 1 else None
+    return encode_parallel(texts, embed_workers, backend=EMBEDDER_BACKEND, embedder=embedder)
+
+
+# ✅ Embeddings of unchanged texts come from the on-disk cache instead of the model
+def embedding_cache():
+    return EmbeddingStore(model_id=embedding_model_id(EMBEDDER_BACKEND)) if EMBEDDING_CACHE else None
+
+
+# ✅ Full build: encode every company; FAISS ids are company ids, not positions
+def build_faiss_index(data, index_type=FAISS_INDEX_TYPE, **index_params):
+    build_index(data, encode_texts, FAISS_INDEX_FILE, FAISS_METADATA_DIR, index_type, MODEL_NAME,
+                embedding_cache=embedding_cache(), **index_params)
+
+
+# ✅ Incremental refresh: only added / changed / removed companies touch the index
+def update_faiss_index(data, index_type=FAISS_INDEX_TYPE, **index_params):
+    update_index(data, encode_texts, FAISS_INDEX_FILE, FAISS_METADATA_DIR, index_type, MODEL_NAME,
+                 embedding_cache=embedding_cache(), **index_params)
 
 
 # ✅ Load FAISS Index and Data
 def load_faiss_index():
-    if not os.path.exists(FAISS_INDEX_FILE) or not os.path.exists(FAISS_DATA_FILE):
+    if not os.path.exists(FAISS_INDEX_FILE) or not os.path.exists(FAISS_METADATA_DIR):
         print("⚠️ FAISS index or data not found. Rebuilding index...")
         data = load_data(DATA_FILE)
         build_faiss_index(data)
     
-    index = faiss.read_index(FAISS_INDEX_FILE)
-    with open(FAISS_DATA_FILE, "r", encoding="utf-8") as file:
-        faiss_data_store = json.load(file)
+    index, _ = read_ann_index(FAISS_INDEX_FILE)
+    faiss_data_store = MetadataStore(FAISS_METADATA_DIR)
 
     print("✅ FAISS index and data loaded successfully!")
     return index, faiss_data_store
 
 
 # ✅ Hybrid Search: FAISS + Exact Match Boosting
-def search_faiss(query, index, faiss_data_store, top_k=10):
+def search_faiss(query, index, faiss_data_store, top_k=10, inverted_index=None):
     if index is None or faiss_data_store is None:
         print("⚠️ FAISS index is not loaded.")
         return []
 
     query = query.lower()  # Normalize query
-    query_embedding = model.encode([query], convert_to_numpy=True)
-    distances, indices = index.search(query_embedding, top_k)
-
-    results = []
-    for idx in indices[0]:
-        if idx != -1:
-            results.append(faiss_data_store[str(idx)])  
+    query_embedding = get_model().encode([query])
+    distances, indices = index.search(query_embedding, top_k * 4)
 
     # ✅ Boost Exact Matches
-    for item in faiss_data_store.values():
-        meta = item.get("metadata", {})  # Ensure metadata is a dictionary
-        metadata_fields = [
-            str(meta.get("company_name", "")).lower(),
-            " ".join(map(str, meta.get("tags", []))).lower(),
-            " ".join(map(str, meta.get("founders_names", []))).lower(),
-            str(meta.get("location", "")).lower()
-        ]
-        # if any(query in field for field in metadata_fields):
-        #     results.insert(0, item)  # Prioritize exact matches
-
-    return results[:top_k]
+    if inverted_index is None:
+        inverted_index = InvertedIndex(faiss_data_store)
+    lexical_ids, lexical_scores = inverted_index.match(query, limit=top_k * 4)
+    rows = faiss_data_store.rows_for(indices[0])  # company ids -> store rows
+    ranked_ids = hybrid_rerank(distances[0], rows, lexical_ids, lexical_scores, top_k)
+    return [faiss_data_store[idx] for idx in ranked_ids]
 
 # ✅ Main Execution
 if __name__ == "__main__":
-    if not os.path.exists(FAISS_INDEX_FILE):
-        print("🔄 FAISS index not found. Building new index...")
+    parser = argparse.ArgumentParser(description="Build the FAISS index and metadata store, then search it interactively.")
+    parser.add_argument("--index-type", type=str, choices=INDEX_TYPES, default=FAISS_INDEX_TYPE,
+                        help=f"FAISS index type to build (default: {FAISS_INDEX_TYPE})")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index even if it already exists")
+    parser.add_argument("--update", action="store_true", help="Apply only added/changed/removed companies to the existing index")
+    parser.add_argument("--hnsw-m", type=int, default=None, help="HNSW graph degree M")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF list count (default: ~4 * sqrt(N))")
+    parser.add_argument("--pq-m", type=int, default=None, help="IVF-PQ sub-quantizer count")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS,
+                        help="Encoder processes; an interrupted build resumes from its saved chunks")
+    parser.add_argument("--no-cache", action="store_true", help="Encode every text instead of reusing cached embeddings")
+    args = parser.parse_args()
+    embed_workers = args.workers
+    EMBEDDING_CACHE = EMBEDDING_CACHE and not args.no_cache
+
+    if args.rebuild or not os.path.exists(FAISS_INDEX_FILE):
+        print(f"🔄 Building new {args.index_type} FAISS index...")
         data = load_data(DATA_FILE)
-        build_faiss_index(data)
+        build_faiss_index(data, args.index_type, M=args.hnsw_m, nlist=args.nlist, m=args.pq_m)
+    elif args.update:
+        print("🔄 Updating FAISS index incrementally...")
+        data = load_data(DATA_FILE)
+        update_faiss_index(data, args.index_type, M=args.hnsw_m, nlist=args.nlist, m=args.pq_m)
 
     index, faiss_data_store = load_faiss_index()
+    inverted_index = InvertedIndex(faiss_data_store)
 
     while True:
         query = input("\nEnter your search query: ")
-        results = search_faiss(query, index, faiss_data_store)
+        results = search_faiss(query, index, faiss_data_store, inverted_index=inverted_index)
         print(json.dumps(results, indent=4, ensure_ascii=False))
@@ -1,28 +1,30 @@
-import faiss
 import json
 import numpy as np
-from sentence_transformers import SentenceTransformer
+import os
+from embedders import load_embedder
+from metadata_store import MetadataStore
+from ann_index import read_ann_index
 
 # Load the pre-trained model
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+model = load_embedder(os.environ.get("EMBEDDER_BACKEND", "torch"))
 
 # File paths
 FAISS_INDEX_FILE = "faiss_index.bin"
-FAISS_DATA_FILE = "faiss_data.json"
+FAISS_METADATA_DIR = "faiss_metadata"
 
 # ✅ Load FAISS Index and Data
 def load_faiss_index():
-    index = faiss.read_index(FAISS_INDEX_FILE)
-    with open(FAISS_DATA_FILE, "r", encoding="utf-8") as file:
-        faiss_data_store = json.load(file)
+    index, _ = read_ann_index(FAISS_INDEX_FILE)
+    faiss_data_store = MetadataStore(FAISS_METADATA_DIR)
     return index, faiss_data_store
 
 # ✅ FAISS Search Function
 def search_faiss(query, index, faiss_data_store, top_k=10):
-    query_embedding = model.encode([query], convert_to_numpy=True)
+    query_embedding = model.encode([query])
     distances, indices = index.search(query_embedding, top_k)
 
-    results = [faiss_data_store[str(idx)] for idx in indices[0] if idx != -1]
+    rows = faiss_data_store.rows_for(indices[0])  # company ids -> store rows
+    results = [faiss_data_store[row] for row in rows if row != -1]
     print(len(results))
     return results
 
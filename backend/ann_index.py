@@ -0,0 +1,146 @@
+import os
+import json
+import math
+import faiss
+import numpy as np
+
+
+# **Selectable FAISS index types**
+#
+# Ids are explicit (company ids) and vectors can be reconstructed by id: flat and HNSW indexes
+# are wrapped in IndexIDMap2, IVF indexes store ids natively with a hashtable direct map (the
+# IDMap wrapper cannot remove ids from IVF lists correctly). The chosen type and its parameters
+# are saved next to the index as <index>.json so loaders pick the right search parameters
+# without any configuration.
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+DEFAULT_PARAMS = {
+    "flat": {},
+    "hnsw": {"M": 32, "ef_construction": 200, "ef_search": 64},
+    "ivf_flat": {"nlist": None, "nprobe": 16},
+    "ivf_pq": {"nlist": None, "nprobe": 16, "m": 48, "nbits": 8},
+}
+
+
+def manifest_path(index_path):
+    return f"{index_path}.json"
+
+
+def resolve_params(index_type, count, dimension, **overrides):
+    """Fills in defaults and clamps IVF/PQ parameters to what the corpus size can train."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {INDEX_TYPES}")
+    params = dict(DEFAULT_PARAMS[index_type])
+    params.update({key: value for key, value in overrides.items() if key in params and value is not None})
+
+    if index_type.startswith("ivf"):
+        # ~4 * sqrt(N) lists, but keep >= 39 training points per centroid
+        nlist = params["nlist"] or int(4 * math.sqrt(max(count, 1)))
+        params["nlist"] = max(1, min(nlist, count // 39 or 1))
+        params["nprobe"] = min(params["nprobe"], params["nlist"])
+    if index_type == "ivf_pq":
+        params["m"] = max(m for m in range(1, min(params["m"], dimension) + 1) if dimension % m == 0)
+        params["nbits"] = max(1, min(params["nbits"], int(math.log2(max(count // 39, 2)))))
+    return params
+
+
+def factory_string(index_type, params):
+    if index_type == "flat":
+        return "IDMap2,Flat"
+    if index_type == "hnsw":
+        return f"IDMap2,HNSW{params['M']},Flat"
+    if index_type == "ivf_flat":
+        return f"IVF{params['nlist']},Flat"
+    return f"IVF{params['nlist']},PQ{params['m']}x{params['nbits']}"
+
+
+def inner_index(index):
+    """The index doing the actual search: the wrapped one for IDMap indexes, else the index itself."""
+    index = faiss.downcast_index(index)
+    return faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+
+
+def supports_remove_ids(index):
+    """Whether `remove_ids` keeps ids consistent; HNSW and IDMap-wrapped IVF need a rebuild instead."""
+    index = faiss.downcast_index(index)
+    inner = inner_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return False
+    return not (hasattr(index, "id_map") and faiss.try_extract_index_ivf(inner) is not None)
+
+
+def apply_search_params(index, index_type, params):
+    """Sets query-time knobs (efSearch / nprobe) on the searching index."""
+    if index_type == "hnsw":
+        inner_index(index).hnsw.efSearch = int(params["ef_search"])
+    elif index_type.startswith("ivf"):
+        faiss.extract_index_ivf(inner_index(index)).nprobe = int(params["nprobe"])
+
+
+# **Build / save / load**
+def build_ann_index(embeddings, ids, index_type="flat", **overrides):
+    """Builds an IDMap2-wrapped index of the requested type; returns (index, resolved params)."""
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    count, dimension = embeddings.shape
+    params = resolve_params(index_type, count, dimension, **overrides)
+
+    index = faiss.index_factory(dimension, factory_string(index_type, params), faiss.METRIC_L2)
+    if index_type == "hnsw":
+        inner_index(index).hnsw.efConstruction = int(params["ef_construction"])
+    if not index.is_trained:
+        index.train(embeddings)
+    enable_reconstruct(index)
+    index.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
+    apply_search_params(index, index_type, params)
+    return index, params
+
+
+def write_ann_index(index, path, index_type, params, **extra):
+    faiss.write_index(index, path)
+    manifest = {"index_type": index_type, "params": params, "dimension": index.d, "ntotal": index.ntotal, **extra}
+    with open(manifest_path(path), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=4)
+
+
+def read_manifest(path):
+    if os.path.exists(manifest_path(path)):
+        with open(manifest_path(path), "r", encoding="utf-8") as file:
+            return json.load(file)
+    # Indexes written before the manifest existed are brute-force IndexIDMap(IndexFlatL2)
+    return {"index_type": "flat", "params": {}}
+
+
+def read_ann_index(path, io_flags=0, **search_overrides):
+    """Loads an index written by write_ann_index and applies its (optionally overridden) search params."""
+    manifest = read_manifest(path)
+    index = faiss.read_index(path, io_flags)
+    params = {**manifest.get("params", {}), **{key: value for key, value in search_overrides.items() if value is not None}}
+    manifest["params"] = params
+    apply_search_params(index, manifest["index_type"], params)
+    return index, manifest
+
+
+def enable_reconstruct(index):
+    """IVF indexes need a direct map before vectors can be reconstructed (or removed) by id; builds it once."""
+    ivf = faiss.try_extract_index_ivf(inner_index(index))
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        # Wrapped IVF sees sequential ids (array map); native IVF holds arbitrary company ids
+        map_type = faiss.DirectMap.Array if hasattr(faiss.downcast_index(index), "id_map") else faiss.DirectMap.Hashtable
+        ivf.set_direct_map_type(map_type)
+    return index
+
+
+def index_vectors(index):
+    """Returns (ids, vectors) stored in the index (approximate for PQ)."""
+    index = faiss.downcast_index(enable_reconstruct(index))
+    if hasattr(index, "id_map"):
+        inner = inner_index(index)
+        ids = faiss.vector_to_array(index.id_map).astype(np.int64)
+        return ids, inner.reconstruct_n(0, inner.ntotal)
+
+    ivf = faiss.extract_index_ivf(index)
+    lists = ivf.invlists
+    ids = np.concatenate([
+        faiss.rev_swig_ptr(lists.get_ids(list_no), lists.list_size(list_no)).copy()
+        for list_no in range(lists.nlist)
+    ] or [np.empty(0, dtype=np.int64)]).astype(np.int64)
+    return ids, index.reconstruct_batch(ids) if len(ids) else np.empty((0, index.d), dtype=np.float32)
@@ -0,0 +1,111 @@
+import os
+import time
+import json
+import argparse
+import faiss
+import numpy as np
+from ann_index import INDEX_TYPES, build_ann_index, read_ann_index, index_vectors
+
+
+# **Constants**
+FAISS_INDEX_FILE = "faiss_index.bin"
+DIMENSION = 384
+
+
+# **Corpora**
+def company_corpus(index_path):
+    """Vectors of our real company corpus, read back from the saved FAISS index."""
+    index, _ = read_ann_index(index_path)
+    _, vectors = index_vectors(index)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def synthetic_corpus(count, dimension, seed=0):
+    """Clustered unit vectors, a closer stand-in for sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(count // 1000, 16), dimension)).astype(np.float32)
+    vectors = np.empty((count, dimension), dtype=np.float32)
+    for start in range(0, count, 100000):
+        end = min(start + 100000, count)
+        assignments = rng.integers(0, len(centers), end - start)
+        vectors[start:end] = centers[assignments] + 0.5 * rng.standard_normal((end - start, dimension)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(vectors, count, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), count)]
+    queries = picks + 0.1 * rng.standard_normal(picks.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+# **Measure one index type**
+def evaluate(index, queries, ground_truth, k, threads):
+    build_threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(threads)
+    latencies = []
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, ids = index.search(queries[i:i + 1], k)
+        latencies.append(time.perf_counter() - start)
+        found[i] = ids[0]
+    faiss.omp_set_num_threads(build_threads)
+
+    hits = sum(len(set(found[i]) & set(ground_truth[i])) for i in range(len(queries)))
+    latencies = np.array(latencies) * 1000
+    return {
+        "recall_at_k": round(hits / (len(queries) * k), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "memory_mb": round(len(faiss.serialize_index(index)) / 2**20, 2),
+    }
+
+
+def benchmark_corpus(name, vectors, index_types, queries_count, k, threads):
+    print(f"\n📌 Corpus '{name}': {len(vectors)} vectors x {vectors.shape[1]} dims")
+    queries = make_queries(vectors, queries_count)
+    ids = np.arange(len(vectors), dtype=np.int64)
+
+    # Ground truth from exact brute-force search
+    exact, _ = build_ann_index(vectors, ids, "flat")
+    _, ground_truth = exact.search(queries, k)
+
+    results = []
+    for index_type in index_types:
+        start = time.perf_counter()
+        index, params = (exact, {}) if index_type == "flat" else build_ann_index(vectors, ids, index_type)
+        build_s = time.perf_counter() - start
+        result = {"corpus": name, "vectors": len(vectors), "index_type": index_type, "params": params,
+                  "build_s": round(build_s, 2), **evaluate(index, queries, ground_truth, k, threads)}
+        results.append(result)
+        print(f"✅ {index_type:>9} | recall@{k} {result['recall_at_k']:.4f} | p50 {result['p50_ms']} ms | "
+              f"p99 {result['p99_ms']} ms | {result['memory_mb']} MB | build {result['build_s']} s")
+    return results
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@k, latency and memory of each FAISS index type.")
+    parser.add_argument("--index-types", type=str, nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--index-file", type=str, default=FAISS_INDEX_FILE,
+                        help="Saved FAISS index whose vectors form the company corpus")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[10000, 100000, 1000000],
+                        help="Synthetic corpus sizes (default: 10k 100k 1M)")
+    parser.add_argument("--queries", type=int, default=500, help="Queries per corpus")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads while searching (builds use all cores)")
+    args = parser.parse_args()
+
+    results = []
+    if os.path.exists(args.index_file):
+        results += benchmark_corpus("companies", company_corpus(args.index_file), args.index_types, args.queries, args.k, args.threads)
+    else:
+        print(f"⚠️ {args.index_file} not found, skipping the company corpus.")
+
+    for count in args.synthetic:
+        results += benchmark_corpus(f"synthetic-{count}", synthetic_corpus(count, DIMENSION), args.index_types, args.queries, args.k, args.threads)
+
+    print(json.dumps(results, indent=4))
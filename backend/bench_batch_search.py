@@ -0,0 +1,56 @@
+import time
+import json
+import random
+import argparse
+import httpx
+
+
+# **Constants**
+API_URL = "http://127.0.0.1:8000"
+BATCH_SIZES = [10, 100, 500]
+SAMPLE_QUERIES = [
+    "fintech", "payments api", "developer tools", "robotics", "healthcare", "insurance",
+    "crypto-web3", "ai agents", "San Francisco", "B2B", "education", "climate",
+]
+
+
+def make_queries(count, seed=0):
+    """Distinct queries (numbered variants) so the embedding cache does not hide encode cost."""
+    rng = random.Random(seed)
+    return [{"query": f"{rng.choice(SAMPLE_QUERIES)} {i}"} for i in range(count)]
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queries/sec of POST /search/batch vs the same queries sent one request at a time.")
+    parser.add_argument("--url", type=str, default=API_URL, help=f"Base URL of the API server (default: {API_URL})")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BATCH_SIZES, help="Queries per batch")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    results = []
+    with httpx.Client(base_url=args.url, timeout=args.timeout) as client:
+        client.post("/search/batch", json={"queries": [{"query": "warm up"}]}).raise_for_status()
+        for round_number, size in enumerate(args.sizes):
+            batched_queries = make_queries(size, seed=2 * round_number)
+            start = time.perf_counter()
+            client.post("/search/batch", json={"queries": batched_queries, "top_k": args.top_k}).raise_for_status()
+            batch_s = time.perf_counter() - start
+
+            sequential_queries = make_queries(size, seed=2 * round_number + 1)
+            start = time.perf_counter()
+            for query in sequential_queries:
+                client.post("/search/batch", json={"queries": [query], "top_k": args.top_k}).raise_for_status()
+            sequential_s = time.perf_counter() - start
+
+            result = {
+                "queries": size,
+                "batch_qps": round(size / batch_s, 1),
+                "sequential_qps": round(size / sequential_s, 1),
+                "speedup": round(sequential_s / batch_s, 2),
+            }
+            results.append(result)
+            print(f"✅ N={size:>5} | batch {result['batch_qps']} q/s | sequential {result['sequential_qps']} q/s | x{result['speedup']}")
+
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,86 @@
+import time
+import json
+import argparse
+import numpy as np
+from bm25 import BM25_INDEX_DIR, load_or_build_bm25
+
+
+# **Constants**
+DATA_FILE = "data/company_data_cleaned_final.json"
+ES_HOST = "http://localhost:9200"
+ES_INDEX_NAME = "y_combinator_companies"
+SAMPLE_QUERIES = [
+    "fintech", "W21", "S18", "BlindPay", "Mastra", "Browser Use", "robotics", "healthcare",
+    "San Francisco", "crypto-web3", "developer tools", "Active", "payments api", "India",
+]
+
+
+def document_key(document):
+    metadata = document.get("metadata") or {}
+    return str(metadata.get("ycombinator") or metadata.get("company_name")).lower().rstrip("/")
+
+
+def timed(search, queries, rounds):
+    """Runs every query `rounds` times; returns (latencies in ms, last results per query)."""
+    latencies = []
+    results = {}
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            results[query] = search(query) or []
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies), results
+
+
+def summary(engine, latencies):
+    return {
+        "engine": engine,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+    }
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency and top-k agreement of the embedded BM25 engine vs Elasticsearch.")
+    parser.add_argument("--data", type=str, default=DATA_FILE)
+    parser.add_argument("--index-dir", type=str, default=BM25_INDEX_DIR)
+    parser.add_argument("--es-host", type=str, default=ES_HOST)
+    parser.add_argument("--size", type=int, default=10, help="Results per query")
+    parser.add_argument("--rounds", type=int, default=20, help="Times each query is repeated")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    engine = load_or_build_bm25(args.data, args.index_dir)
+    print(f"📌 BM25 index ready in {time.perf_counter() - start:.3f} s ({len(engine.documents)} documents)")
+
+    bm25_latencies, bm25_results = timed(lambda query: engine.search(query, args.size), SAMPLE_QUERIES, args.rounds)
+    results = [summary("bm25", bm25_latencies)]
+
+    try:
+        from elasticsearch import Elasticsearch
+        es = Elasticsearch(hosts=[args.es_host])
+        if not es.ping():
+            raise ConnectionError(f"no response from {args.es_host}")
+
+        def es_search(query):
+            response = es.search(index=ES_INDEX_NAME, body={"query": {"query_string": {"query": query}}}, size=args.size)
+            return [hit["_source"] for hit in response["hits"]["hits"]]
+
+        es_latencies, es_results = timed(es_search, SAMPLE_QUERIES, args.rounds)
+        es_summary = summary("elasticsearch", es_latencies)
+        overlaps = []
+        for query in SAMPLE_QUERIES:
+            bm25_keys = {document_key(document) for document in bm25_results[query]}
+            es_keys = {document_key(document) for document in es_results[query]}
+            overlaps.append(len(bm25_keys & es_keys) / len(bm25_keys | es_keys) if bm25_keys | es_keys else 1.0)
+        es_summary["top_k_overlap_with_bm25"] = round(float(np.mean(overlaps)), 3)
+        results.append(es_summary)
+    except Exception as e:
+        print(f"⚠️ Elasticsearch unavailable, benchmarking BM25 only: {e}")
+
+    for result in results:
+        print(f"✅ {result['engine']:>13} | p50 {result['p50_ms']} ms | p99 {result['p99_ms']} ms | "
+              f"overlap {result.get('top_k_overlap_with_bm25', '-')}")
+    print(json.dumps(results, indent=4))
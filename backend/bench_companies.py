@@ -0,0 +1,102 @@
+import time
+import json
+import random
+import argparse
+import numpy as np
+from company_directory import CompanyDirectory, load_company_directory
+
+
+# **Constants**
+SIZES = [10000, 100000, 250000]
+WORDS = ["pay", "robo", "health", "dev", "tools", "climate", "data", "secure", "fin", "labs", "ai", "cloud", "bio", "go"]
+STATUSES = ["Active", "Inactive", "Acquired", "Public"]
+BATCHES = [f"{season}{year:02d}" for season in "WS" for year in range(5, 26)]
+TAGS = [f"tag-{i}" for i in range(300)]
+LOCATIONS = [f"City {i}, Country {i % 40}" for i in range(400)]
+
+
+def synthetic_companies(count, seed=0):
+    rng = random.Random(seed)
+    companies = []
+    for i in range(count):
+        location = rng.choice(LOCATIONS)
+        companies.append({
+            "company_id": i,
+            "company_name": "".join(rng.choices(WORDS, k=2)).capitalize() + f" {i}",
+            "batch": rng.choice(BATCHES),
+            "status": rng.choice(STATUSES),
+            "tags": rng.sample(TAGS, rng.randint(1, 4)),
+            "location": location,
+            "country": location.split(", ")[1],
+            "year_founded": rng.randint(2005, 2025),
+            "team_size": rng.randint(1, 1000),
+        })
+    return companies
+
+
+def sample_queries(count, seed=1):
+    """Mixes of name search and facet filters like the directory UI sends."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        filters = {}
+        if rng.random() < 0.5:
+            filters["status"] = [rng.choice(STATUSES)]
+        if rng.random() < 0.4:
+            filters["batch"] = [rng.choice(BATCHES)]
+        if rng.random() < 0.4:
+            filters["tag"] = [rng.choice(TAGS)]
+        if rng.random() < 0.2:
+            filters["location"] = [f"city {rng.randrange(400)}"]
+        q = rng.choice(["", "", rng.choice(WORDS), rng.choice(WORDS) + rng.choice(WORDS)[:2]])
+        queries.append((q, filters, rng.choice(["", "", "name"])))
+    return queries
+
+
+def time_queries(directory, queries, facets):
+    latencies = []
+    for q, filters, sort in queries:
+        start = time.perf_counter()
+        if facets:
+            directory.search(q, filters, sort=sort)
+        else:
+            # Filter + page only: what the listing needs on every keystroke
+            directory.search(q, filters, sort=sort, facets=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency of /companies filtering, paging and facet counts on synthetic directories.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Synthetic directory sizes")
+    parser.add_argument("--data", type=str, default=None, help="Also measure a real company data file")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    directories = []
+    for size in args.sizes:
+        start = time.perf_counter()
+        directories.append((f"synthetic_{size}", CompanyDirectory(synthetic_companies(size))))
+        print(f"📌 Built synthetic_{size} in {time.perf_counter() - start:.2f}s")
+    if args.data:
+        directories.append((args.data, load_company_directory(args.data)))
+
+    queries = sample_queries(args.queries)
+    results = []
+    for name, directory in directories:
+        time_queries(directory, queries[:50], True)  # warm-up
+        filter_ms = time_queries(directory, queries, False)
+        facet_ms = time_queries(directory, queries, True)
+        result = {
+            "directory": name,
+            "companies": directory.count,
+            "filter_p50_ms": round(float(np.percentile(filter_ms, 50)), 3),
+            "filter_p99_ms": round(float(np.percentile(filter_ms, 99)), 3),
+            "with_facets_p50_ms": round(float(np.percentile(facet_ms, 50)), 3),
+            "with_facets_p99_ms": round(float(np.percentile(facet_ms, 99)), 3),
+        }
+        results.append(result)
+        print(f"✅ {name:>18} | filter + page p50 {result['filter_p50_ms']} ms, p99 {result['filter_p99_ms']} ms | "
+              f"with facets p50 {result['with_facets_p50_ms']} ms, p99 {result['with_facets_p99_ms']} ms")
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,109 @@
+import os
+import time
+import json
+import random
+import asyncio
+import argparse
+import tempfile
+import httpx
+from fastapi import FastAPI
+
+# The app is driven in-process; lazy loading keeps models and indexes out of the way
+os.environ.setdefault("COMPONENT_LOADING", "lazy")
+import main
+
+
+# **Constants**
+CASES = [
+    # (name, query string, request headers)
+    ("full", "", {"Accept-Encoding": "identity"}),
+    ("full_gzip", "", {"Accept-Encoding": "gzip"}),
+    ("full_br", "", {"Accept-Encoding": "br, gzip"}),
+    ("if_none_match", "", {"Accept-Encoding": "gzip", "If-None-Match": None}),
+    ("names_page", "?fields=company_name,company_id&limit=50", {"Accept-Encoding": "gzip"}),
+]
+
+
+def legacy_app(path):
+    """The endpoint as it was: parse the file and JSON-encode the whole dataset on every request."""
+    app = FastAPI()
+
+    @app.get("/company_data")
+    def retrieve_company_data():
+        return json.load(open(path))
+
+    return app
+
+
+def synthetic_companies(count, seed=0):
+    rng = random.Random(seed)
+    words = ["ai", "payments", "robotics", "health", "developer", "tools", "climate", "data", "security", "fintech"]
+    return [{
+        "company_id": i,
+        "company_name": f"Company {i}",
+        "short_description": " ".join(rng.choices(words, k=8)),
+        "long_description": " ".join(rng.choices(words, k=120)),
+        "batch": rng.choice(["W21", "S21", "W22", "S22", "W23"]),
+        "status": rng.choice(["Active", "Acquired", "Inactive"]),
+        "tags": rng.sample(words, 3),
+        "location": rng.choice(["San Francisco", "New York", "London", "Bangalore"]),
+        "team_size": rng.randint(1, 500),
+        "year_founded": rng.randint(2005, 2024),
+        "website": f"https://company{i}.example.com",
+    } for i in range(count)]
+
+
+# **Run one case**
+async def run_case(app, query, headers, concurrency, total_requests):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        if "If-None-Match" in headers:
+            etag = (await client.get(f"/company_data{query}")).headers.get("etag")
+            headers = {**headers, "If-None-Match": etag or '"none"'}
+        response = await client.get(f"/company_data{query}", headers=headers)  # warm-up, also loads the payload
+        wire_bytes = int(response.headers.get("content-length", 0))  # compressed size when encoded
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one_request():
+            async with semaphore:
+                # Raw bytes: decompressing on the client side would dominate the measurement
+                async with client.stream("GET", f"/company_data{query}", headers=headers) as response:
+                    if response.status_code >= 400:
+                        response.raise_for_status()
+                    async for _ in response.aiter_raw():
+                        pass
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(total_requests)))
+        elapsed = time.perf_counter() - start
+    return {"requests_per_s": round(total_requests / elapsed, 1), "status": response.status_code, "wire_bytes": wire_bytes}
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Requests/sec of /company_data before (parse + encode per request) and after (cached, compressed, conditional).")
+    parser.add_argument("--data", type=str, default="company_data.json", help="Company data file (synthetic data if it does not exist)")
+    parser.add_argument("--synthetic", type=int, default=5000, help="Companies in the synthetic file")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    path = args.data
+    if not os.path.exists(path):
+        path = os.path.join(tempfile.mkdtemp(), "company_data.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(synthetic_companies(args.synthetic), file, indent=4)
+        print(f"📌 {args.data} not found, using {args.synthetic} synthetic companies")
+    main.company_data_payload = main.JSONFilePayload(path)
+    print(f"📌 {path}: {os.path.getsize(path)} bytes on disk")
+
+    results = [{"case": "legacy", **asyncio.run(run_case(legacy_app(path), "", {}, args.concurrency, args.requests))}]
+    for name, query, headers in CASES:
+        results.append({"case": name, **asyncio.run(run_case(main.app, query, headers, args.concurrency, args.requests))})
+
+    baseline = results[0]["requests_per_s"]
+    for result in results:
+        result["speedup"] = round(result["requests_per_s"] / baseline, 1) if baseline else None
+        print(f"✅ {result['case']:>14} | {result['requests_per_s']:>9} req/s (x{result['speedup']}) | "
+              f"HTTP {result['status']} | {result['wire_bytes']} bytes")
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,102 @@
+import time
+import json
+import random
+import asyncio
+import argparse
+import statistics
+import httpx
+from urllib.parse import quote
+
+
+# **Constants**
+API_URL = "http://127.0.0.1:8000"
+CONCURRENCY_LEVELS = [50, 200, 1000]
+SAMPLE_CHATS = [
+    ("General", "Which fintech companies are in the W21 batch?"),
+    ("General", "Show me companies working on robotics"),
+    ("General", "Who founded Stripe?"),
+    ("General", "Which companies were founded in 2018?"),
+    ("BlindPay", "What does this company do?"),
+    ("BlindPay", "Who are the founders?"),
+    ("Mastra", "How big is the team?"),
+    ("Browser Use", "Where is the company located?"),
+]
+
+
+def percentile(values, pct):
+    """Returns the pct-th percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+# **Run a single concurrency level**
+async def run_level(url, phase, concurrency, total_requests, chats, timeout):
+    """Keeps `concurrency` chats in flight until `total_requests` have completed."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        async def one_chat():
+            nonlocal errors
+            context, user_query = random.choice(chats)
+            path = f"/response/{phase}/{quote(context, safe='')}/{quote(user_query, safe='')}"
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except Exception:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_chat() for _ in range(total_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure chat throughput of a running API server at several in-flight levels.")
+    parser.add_argument("--url", type=str, default=API_URL, help=f"Base URL of the API server (default: {API_URL})")
+    parser.add_argument("--phase", type=str, default="phase2", help="Endpoint phase to hit, e.g. phase1 or phase2 (default: phase2)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=CONCURRENCY_LEVELS,
+                        help="In-flight chat levels to measure (default: 50 200 1000)")
+    parser.add_argument("--requests-per-level", type=int, default=None,
+                        help="Requests sent per level (default: 2x the concurrency level)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--chats", type=str, default=None,
+                        help="Optional JSON file with a list of [context, user_query] pairs")
+    args = parser.parse_args()
+
+    chats = SAMPLE_CHATS
+    if args.chats:
+        with open(args.chats, "r", encoding="utf-8") as file:
+            chats = [tuple(pair) for pair in json.load(file)]
+
+    print(f"📌 Benchmarking {args.url} /response/{args.phase} with {len(chats)} distinct chats")
+    results = []
+    for level in args.concurrency:
+        total = args.requests_per_level or level * 2
+        result = asyncio.run(run_level(args.url, args.phase, level, total, chats, args.timeout))
+        results.append(result)
+        print(f"✅ {level:>5} in-flight | {result['throughput_rps']:>8} req/s | "
+              f"p50 {result['p50_ms']} ms | p99 {result['p99_ms']} ms | errors {result['errors']}")
+
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,75 @@
+import os
+import time
+import json
+import argparse
+import numpy as np
+from embedders import EMBEDDER_BACKENDS, ONNX_MODEL_DIR, PARITY_TEXTS, load_embedder, parity_check
+from metadata_store import MetadataStore
+
+
+# **Constants**
+FAISS_METADATA_DIR = "faiss_metadata"
+SAMPLE_QUERIES = [
+    "Which fintech companies are in the W21 batch?",
+    "Show me companies working on robotics",
+    "Who founded Stripe?",
+    "AI startups in San Francisco",
+]
+
+
+def corpus_texts(count):
+    """Company texts from the metadata store, or repeated sample sentences when it is missing."""
+    if os.path.exists(FAISS_METADATA_DIR):
+        texts = [text for text in MetadataStore(FAISS_METADATA_DIR).column_values("text") if text]
+        if texts:
+            return (texts * (count // len(texts) + 1))[:count]
+    print(f"⚠️ {FAISS_METADATA_DIR} not found, using sample sentences as the bulk corpus.")
+    return (PARITY_TEXTS * (count // len(PARITY_TEXTS) + 1))[:count]
+
+
+# **Measure one backend**
+def benchmark_backend(embedder, texts, queries, batch_size):
+    embedder.encode(queries[:1])  # warm-up
+    latencies = []
+    queries_count = len(queries) * 25
+    for i in range(queries_count):
+        start = time.perf_counter()
+        embedder.encode([queries[i % len(queries)]])
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+
+    start = time.perf_counter()
+    embedder.encode(texts, batch_size=batch_size)
+    bulk_s = time.perf_counter() - start
+    return {
+        "backend": embedder.backend,
+        "query_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "query_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "queries": queries_count,
+        "bulk_texts_per_s": round(len(texts) / bulk_s, 1),
+    }
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-query latency, bulk throughput and parity of each embedder backend.")
+    parser.add_argument("--backends", type=str, nargs="+", default=list(EMBEDDER_BACKENDS), choices=EMBEDDER_BACKENDS)
+    parser.add_argument("--model-dir", type=str, default=ONNX_MODEL_DIR)
+    parser.add_argument("--bulk", type=int, default=2000, help="Texts encoded in the bulk run")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    texts = corpus_texts(args.bulk)
+    embedders = {backend: load_embedder(backend, args.model_dir) for backend in args.backends}
+    reference = embedders.get("torch")
+
+    results = []
+    for backend, embedder in embedders.items():
+        result = benchmark_backend(embedder, texts, SAMPLE_QUERIES, args.batch_size)
+        if reference is not None and embedder is not reference:
+            result.update(parity_check(embedder, reference, SAMPLE_QUERIES + texts[:200]))
+        results.append(result)
+        print(f"✅ {backend:>9} | query p50 {result['query_p50_ms']} ms | p99 {result['query_p99_ms']} ms | "
+              f"bulk {result['bulk_texts_per_s']} texts/s | min cosine {result.get('min_cosine', '-')}")
+
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,56 @@
+import os
+import time
+import json
+import shutil
+import argparse
+import numpy as np
+from embedders import EMBEDDER_BACKENDS, ONNX_MODEL_DIR
+from embedding_build import EMBED_CHUNK_SIZE, encode_parallel
+from bench_embedders import corpus_texts
+
+
+# **Constants**
+CHUNK_DIR = "bench_embedding_chunks"
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    workers = [1]
+    while workers[-1] * 2 <= cores:
+        workers.append(workers[-1] * 2)
+    return workers if workers[-1] == cores else workers + [cores]
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding build throughput from 1 to N worker processes.")
+    parser.add_argument("--backend", type=str, default=os.environ.get("EMBEDDER_BACKEND", "torch"), choices=EMBEDDER_BACKENDS)
+    parser.add_argument("--model-dir", type=str, default=ONNX_MODEL_DIR)
+    parser.add_argument("--texts", type=int, default=20000, help="Texts encoded per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers())
+    parser.add_argument("--chunk-size", type=int, default=EMBED_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    texts = corpus_texts(args.texts)
+    results = []
+    reference = None
+    for workers in args.workers:
+        shutil.rmtree(CHUNK_DIR, ignore_errors=True)
+        start = time.perf_counter()
+        # Worker start-up (model load) is part of the cost a build pays, so it is timed too
+        embeddings = encode_parallel(texts, workers, backend=args.backend, chunk_dir=CHUNK_DIR,
+                                     chunk_size=args.chunk_size, model_dir=args.model_dir)
+        seconds = time.perf_counter() - start
+        if reference is None:
+            reference = embeddings
+        results.append({
+            "workers": workers,
+            "seconds": round(seconds, 3),
+            "texts_per_s": round(len(texts) / seconds, 1),
+            "speedup": round(results[0]["seconds"] / seconds, 2) if results else 1.0,
+            "max_abs_diff_vs_1": float(np.abs(embeddings - reference).max()),
+        })
+
+    for result in results:
+        print(f"✅ {result['workers']:>3} workers | {result['texts_per_s']} texts/s | x{result['speedup']}")
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,89 @@
+import time
+import json
+import argparse
+import statistics
+import httpx
+from urllib.parse import quote
+
+
+# **Constants**
+API_URL = "http://127.0.0.1:8000"
+PHASES = ["phase1", "phase2", "hybrid"]
+SAMPLE_CHATS = [
+    ("BlindPay", "What does this company do?"),
+    ("Mastra", "How big is the team?"),
+    ("Browser Use", "Where is the company located?"),
+    ("fintech", "Which companies work on this?"),
+    ("robotics", "Which companies work on this?"),
+    ("San Francisco", "Which companies are based here?"),
+]
+
+
+def retrieval_metadata(client, phase, context, user_query):
+    """Reads the SSE stream up to its metadata event; returns (retrieval_ms, companies)."""
+    path = f"/response/{phase}/stream/{quote(context, safe='')}/{quote(user_query, safe='')}"
+    event = None
+    with client.stream("GET", path) as response:
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event in ("metadata", "error"):
+                data = json.loads(line[len("data: "):])
+                if event == "error":
+                    return None, []
+                return data.get("retrieval_ms"), [name for name in data.get("companies", []) if name]
+    return None, []
+
+
+def overlap(first, second):
+    """Jaccard overlap of two company lists."""
+    first, second = set(first), set(second)
+    return len(first & second) / len(first | second) if first | second else 0.0
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieval latency and hit overlap of phase1 (ES), phase2 (FAISS) and hybrid (RRF).")
+    parser.add_argument("--url", type=str, default=API_URL, help=f"Base URL of the API server (default: {API_URL})")
+    parser.add_argument("--rounds", type=int, default=5, help="Times each chat is sent to each phase")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--chats", type=str, default=None,
+                        help="Optional JSON file with a list of [context, user_query] pairs")
+    args = parser.parse_args()
+
+    chats = SAMPLE_CHATS
+    if args.chats:
+        with open(args.chats, "r", encoding="utf-8") as file:
+            chats = [tuple(pair) for pair in json.load(file)]
+
+    latencies = {phase: [] for phase in PHASES}
+    companies = {phase: {} for phase in PHASES}
+    with httpx.Client(base_url=args.url, timeout=args.timeout) as client:
+        for round_number in range(args.rounds):
+            for context, user_query in chats:
+                # A per-round suffix keeps the answer cache from skipping retrieval
+                query = f"{user_query} (run {time.time_ns()}-{round_number})"
+                for phase in PHASES:
+                    retrieval_ms, names = retrieval_metadata(client, phase, context, query)
+                    if retrieval_ms is not None:
+                        latencies[phase].append(retrieval_ms)
+                    companies[phase][context] = names
+
+    results = {"latency": {}, "overlap": {}}
+    for phase in PHASES:
+        values = sorted(latencies[phase])
+        results["latency"][phase] = {
+            "requests": len(values),
+            "p50_ms": round(values[len(values) // 2], 1) if values else None,
+            "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1) if values else None,
+            "mean_ms": round(statistics.mean(values), 1) if values else None,
+        }
+        print(f"✅ {phase:>7} | retrieval p50 {results['latency'][phase]['p50_ms']} ms | "
+              f"p95 {results['latency'][phase]['p95_ms']} ms")
+
+    for first, second in (("hybrid", "phase1"), ("hybrid", "phase2"), ("phase1", "phase2")):
+        values = [overlap(companies[first].get(context, []), companies[second].get(context, [])) for context, _ in chats]
+        results["overlap"][f"{first}_vs_{second}"] = round(statistics.mean(values), 3)
+        print(f"📌 Mean company overlap {first} vs {second}: {results['overlap'][f'{first}_vs_{second}']}")
+
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,91 @@
+import time
+import json
+import asyncio
+import argparse
+import statistics
+from llm_client import LLMClient, LLMError
+
+
+# **Constants**
+STUB_URL = "http://127.0.0.1:8100/v1"
+PROMPT = [{"role": "user", "content": "Which fintech companies are in the W21 batch?"}]
+
+
+def percentile(values, pct):
+    """Returns the pct-th percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+# **Run one configuration**
+async def run(base_url, hedge, concurrency, total_requests, warmup, deadline, stream):
+    """Keeps `concurrency` calls in flight until `total_requests` have completed; warm-up calls fill the latency window."""
+    client = LLMClient(api_key="stub", base_url=base_url, max_connections=concurrency, hedge=hedge)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one_call(record):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                if stream:
+                    async for _ in client.stream(PROMPT, "stub", deadline=deadline):
+                        pass
+                else:
+                    await client.complete(PROMPT, "stub", deadline=deadline)
+                if record:
+                    latencies.append(time.perf_counter() - start)
+            except LLMError:
+                errors += record
+
+    try:
+        await asyncio.gather(*(one_call(False) for _ in range(warmup)))
+        start = time.perf_counter()
+        await asyncio.gather(*(one_call(True) for _ in range(total_requests)))
+        elapsed = time.perf_counter() - start
+        stats = client.stats()
+    finally:
+        await client.close()
+
+    latencies.sort()
+    return {
+        "hedge": hedge,
+        "stream": stream,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        "retries": stats["retries"],
+        "hedges": stats["hedges"],
+        "hedges_won": stats["hedges_won"],
+    }
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput and tail latency of the LLM client against llm_stub_server.py, with and without hedging.")
+    parser.add_argument("--url", type=str, default=STUB_URL, help=f"OpenAI-compatible base URL (default: {STUB_URL})")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=100, help="Calls made first to learn the latency percentile")
+    parser.add_argument("--deadline", type=float, default=30.0, help="Per-call deadline in seconds")
+    parser.add_argument("--stream", action="store_true", help="Measure streamed calls (never hedged) instead")
+    args = parser.parse_args()
+
+    print(f"📌 Benchmarking {args.url} with {args.concurrency} calls in flight (start the stub with e.g. --tail-prob 0.05)")
+    results = []
+    for hedge in ([False] if args.stream else [False, True]):
+        result = asyncio.run(run(args.url, hedge, args.concurrency, args.requests, args.warmup, args.deadline, args.stream))
+        results.append(result)
+        print(f"✅ hedge={'on ' if hedge else 'off'} | {result['throughput_rps']:>8} calls/s | p50 {result['p50_ms']} ms | "
+              f"p95 {result['p95_ms']} ms | p99 {result['p99_ms']} ms | hedges {result['hedges']} (won {result['hedges_won']}) | "
+              f"errors {result['errors']}")
+
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,112 @@
+import os
+import time
+import json
+import asyncio
+import argparse
+import numpy as np
+
+# Passage search needs the "passages" component, which main only registers in passage mode
+os.environ.setdefault("PASSAGE_MODE", "max")
+os.environ.setdefault("COMPONENT_LOADING", "lazy")
+import main
+
+
+# **Constants**
+SAMPLE_QUERIES = [
+    "payments infrastructure for developers",
+    "robotics startups",
+    "AI agents for customer support",
+    "healthcare data platform",
+    "open source developer tools",
+    "climate and energy",
+    "fintech in India",
+    "browser automation",
+]
+MODES = ["document", "passages_max", "passages_sum"]
+
+
+def retrieve(mode, query, top_k):
+    index, store = main.components.get("faiss")
+    if mode == "document":
+        return main.search_faiss(query, index, store, top_k)
+    return main.search_passages(query, main.components.get("passages"), store, top_k, aggregation=mode.split("_")[1])
+
+
+async def llm_latencies(prompts):
+    """
+    End-to-end LLM calls, one after another; returns [(seconds, prompt tokens reported by the API)].
+    All calls share one event loop because the pooled client's connections are bound to it.
+    """
+    client = main.components.get("llm_client")
+    latencies = []
+    try:
+        for prompt in prompts:
+            start = time.perf_counter()
+            output = await client.chat(prompt, main.groq_model)
+            latencies.append((time.perf_counter() - start, (output.get("usage") or {}).get("prompt_tokens")))
+    finally:
+        await client.close()
+    return latencies
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt size and latency of whole-document vs passage-level retrieval.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5, help="Retrieval repetitions per query")
+    parser.add_argument("--llm", action="store_true", help="Also call the LLM (GROQ_API_KEY, or LLM_BASE_URL of llm_stub_server.py) for end-to-end latency")
+    parser.add_argument("--queries", type=str, default=None, help="Optional JSON file with a list of queries")
+    args = parser.parse_args()
+
+    queries = SAMPLE_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as file:
+            queries = json.load(file)
+
+    for query in queries[:1]:
+        for mode in MODES:
+            retrieve(mode, query, args.top_k)  # warm-up: loads the indexes and the embedder
+
+    measurements = {}
+    for mode in MODES:
+        retrieval_ms, prompts = [], []
+        for query in queries:
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                documents = retrieve(mode, query, args.top_k)
+                retrieval_ms.append((time.perf_counter() - start) * 1000)
+            prompts.append(main.generate_prompt("General", query, documents))
+        measurements[mode] = (retrieval_ms, prompts)
+
+    llm_results = {mode: [] for mode in MODES}
+    if args.llm:
+        all_prompts = [(mode, prompt) for mode in MODES for prompt in measurements[mode][1]]
+        latencies = asyncio.run(llm_latencies([prompt for _, prompt in all_prompts]))
+        for (mode, _), latency in zip(all_prompts, latencies):
+            llm_results[mode].append(latency)
+
+    results = []
+    for mode in MODES:
+        retrieval_ms, prompts = measurements[mode]
+        prompt_chars = [len(prompt[0]["content"]) for prompt in prompts]
+        llm_seconds = [seconds for seconds, _ in llm_results[mode]]
+        prompt_tokens = [tokens for _, tokens in llm_results[mode] if tokens is not None]
+
+        result = {
+            "mode": mode,
+            "retrieval_p50_ms": round(float(np.percentile(retrieval_ms, 50)), 3),
+            "prompt_chars_mean": round(float(np.mean(prompt_chars)), 1),
+            # ~4 characters per token for English text when the API does not report usage
+            "prompt_tokens_mean": round(float(np.mean(prompt_tokens)), 1) if prompt_tokens else round(float(np.mean(prompt_chars)) / 4, 1),
+        }
+        if llm_seconds:
+            result["end_to_end_p50_s"] = round(float(np.percentile(llm_seconds, 50)) + result["retrieval_p50_ms"] / 1000, 3)
+        results.append(result)
+
+    baseline = results[0]["prompt_chars_mean"]
+    for result in results:
+        result["prompt_size_vs_document"] = round(result["prompt_chars_mean"] / baseline, 3) if baseline else None
+        print(f"✅ {result['mode']:>13} | retrieval p50 {result['retrieval_p50_ms']} ms | "
+              f"prompt ~{result['prompt_tokens_mean']} tokens (x{result['prompt_size_vs_document']}) | "
+              f"end-to-end {result.get('end_to_end_p50_s', '-')} s")
+    print(json.dumps(results, indent=4))
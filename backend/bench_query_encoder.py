@@ -0,0 +1,64 @@
+import time
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from sentence_transformers import SentenceTransformer
+from query_encoder import QueryEncoder
+
+
+# **Constants**
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+BASE_QUERIES = [
+    "fintech companies", "robotics startups", "developer tools for ai agents", "healthcare billing",
+    "who founded stripe", "companies in san francisco", "climate tech", "b2b saas for logistics",
+    "crypto payments api", "insurance brokerage", "education platform", "open source database",
+]
+
+
+def make_queries(count):
+    """Distinct query strings so the embedding cache does not hide the encoder cost."""
+    return [f"{BASE_QUERIES[i % len(BASE_QUERIES)]} {i}" for i in range(count)]
+
+
+# **Measure encode QPS with concurrent callers**
+def run(encoder, queries, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(encoder.encode_one, queries))
+    elapsed = time.perf_counter() - start
+    return round(len(queries) / elapsed, 1), round(elapsed, 3)
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare query encode QPS with and without cross-request micro-batching.")
+    parser.add_argument("--queries", type=int, default=2000, help="Number of distinct queries to encode")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32, 64], help="Concurrent caller counts")
+    parser.add_argument("--max-batch", type=int, default=32, help="Micro-batcher max batch size")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="Micro-batcher max wait in milliseconds")
+    args = parser.parse_args()
+
+    model = SentenceTransformer(MODEL_NAME)
+    encode_fn = lambda texts: model.encode(texts, convert_to_numpy=True, batch_size=args.max_batch)
+    encode_fn(["warmup"])
+
+    results = []
+    for threads in args.threads:
+        queries = make_queries(args.queries)
+        unbatched = QueryEncoder(encode_fn, cache_size=0, batching=False)
+        batched = QueryEncoder(encode_fn, cache_size=0, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+
+        qps_plain, _ = run(unbatched, queries, threads)
+        qps_batched, _ = run(batched, queries, threads)
+        result = {
+            "threads": threads,
+            "unbatched_qps": qps_plain,
+            "batched_qps": qps_batched,
+            "speedup": round(qps_batched / qps_plain, 2) if qps_plain else None,
+            "avg_batch_size": batched.stats()["avg_batch_size"],
+        }
+        results.append(result)
+        print(f"✅ {threads:>3} callers | unbatched {qps_plain:>8} q/s | batched {qps_batched:>8} q/s | "
+              f"avg batch {result['avg_batch_size']}")
+
+    print(json.dumps(results, indent=4))
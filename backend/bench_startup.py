@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import json
+import argparse
+import subprocess
+import httpx
+from urllib.parse import quote
+
+
+# **Constants**
+PORT = 8011
+LOADING_MODES = ["eager", "lazy", "background"]
+SAMPLE_QUERY = ("BlindPay", "What does this company do?")
+
+
+def cold_import_seconds(python):
+    """Seconds for a fresh interpreter to import main (no components loaded)."""
+    start = time.perf_counter()
+    subprocess.run([python, "-c", "import main"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def wait_for(client, path, start, timeout, ok=lambda response: response.status_code == 200):
+    """Polls `path` until `ok(response)`; returns seconds since `start` or None on timeout."""
+    while time.perf_counter() - start < timeout:
+        try:
+            if ok(client.get(path)):
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def first_query_ok(response):
+    # The metadata event is sent right after retrieval, before any LLM tokens
+    return response.status_code == 200 and "event: metadata" in response.text
+
+
+# **Measure one loading mode**
+def measure_mode(mode, python, timeout):
+    env = {**os.environ, "COMPONENT_LOADING": mode}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [python, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(PORT)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    context, query = SAMPLE_QUERY
+    # A unique query string keeps the answer cache out of the measurement
+    query = f"{query} {time.time_ns()}"
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{PORT}", timeout=timeout) as client:
+            healthz = wait_for(client, "/healthz", start, timeout)
+            first_query = wait_for(client, f"/response/phase2/stream/{quote(context)}/{quote(query)}", start, timeout, first_query_ok)
+            readyz = wait_for(client, "/readyz", start, timeout)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "mode": mode,
+        "healthz_s": round(healthz, 3) if healthz else None,
+        "readyz_s": round(readyz, 3) if readyz else None,
+        "first_query_s": round(first_query, 3) if first_query else None,
+    }
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup time of the API per component loading mode.")
+    parser.add_argument("--modes", type=str, nargs="+", default=LOADING_MODES, choices=LOADING_MODES)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for each milestone")
+    args = parser.parse_args()
+
+    results = {"cold_import_s": round(cold_import_seconds(sys.executable), 3), "modes": []}
+    print(f"📌 Cold import of main: {results['cold_import_s']} s")
+    for mode in args.modes:
+        result = measure_mode(mode, sys.executable, args.timeout)
+        results["modes"].append(result)
+        print(f"✅ {mode:>10} | /healthz {result['healthz_s']} s | first query {result['first_query_s']} s | /readyz {result['readyz_s']} s")
+
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,159 @@
+import os
+import json
+import argparse
+import numpy as np
+from scipy import sparse
+from inverted_index import tokenize
+
+
+# **Embedded BM25 engine (drop-in for Elasticsearch phase1 retrieval)**
+#
+# Every text field of the ES mapping gets its own BM25 term weights (its own length
+# normalization), scaled by a field boost and summed into one docs x vocabulary sparse
+# matrix. Scoring a query is then a column slice of that matrix times the query term counts.
+FIELD_BOOSTS = {
+    "text": 1.0,
+    "metadata.company_name": 3.0,
+    "metadata.tags": 2.0,
+    "metadata.founders_names": 2.0,
+    "metadata.description": 1.0,
+    "metadata.status": 1.0,
+    "metadata.location": 1.0,
+    "metadata.country": 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+QUERY_OPERATORS = {"and", "or", "not"}  # query_string operators, not search terms
+
+BM25_INDEX_DIR = "bm25_index"
+MATRIX_FILE = "weights.npz"
+VOCABULARY_FILE = "vocabulary.json"
+DOCUMENTS_FILE = "documents.json"
+
+
+def field_value(document, field):
+    parent, _, child = field.partition(".")
+    value = document.get(parent)
+    if child:
+        value = (value or {}).get(child)
+    if value is None:
+        return ""
+    return " ".join(str(item) for item in value) if isinstance(value, list) else str(value)
+
+
+def field_weights(token_lists, vocabulary, k1=BM25_K1, b=BM25_B):
+    """BM25 weight idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len)) per (doc, term)."""
+    rows, cols = [], []
+    for row, tokens in enumerate(token_lists):
+        for token in tokens:
+            rows.append(row)
+            cols.append(vocabulary[token])
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(token_lists), len(vocabulary))
+    )
+    counts.sum_duplicates()
+
+    lengths = np.array([len(tokens) for tokens in token_lists], dtype=np.float32)
+    avg_length = max(float(lengths.mean()) if len(lengths) else 0.0, 1.0)
+    document_frequency = np.bincount(counts.indices, minlength=len(vocabulary)).astype(np.float32)
+    idf = np.log(1 + (len(token_lists) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    tf = counts.data
+    row_lengths = np.repeat(lengths, np.diff(counts.indptr))
+    counts.data = idf[counts.indices] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * row_lengths / avg_length))
+    return counts
+
+
+class BM25Index:
+    """
+    In-process BM25 over ES-shaped documents ({"text": ..., "metadata": {...}}). `search`
+    mirrors `search_documents` in main.py: best-first list of documents, or None on no hit.
+    """
+
+    def __init__(self, weights, vocabulary, documents):
+        self.weights = weights.tocsc()  # column slices per query term
+        self.vocabulary = vocabulary
+        self.documents = documents
+
+    @classmethod
+    def build(cls, documents, field_boosts=FIELD_BOOSTS):
+        token_lists = {field: [tokenize(field_value(document, field)) for document in documents] for field in field_boosts}
+        vocabulary = {}
+        for lists in token_lists.values():
+            for tokens in lists:
+                for token in tokens:
+                    vocabulary.setdefault(token, len(vocabulary))
+
+        weights = sparse.csr_matrix((len(documents), len(vocabulary)), dtype=np.float32)
+        for field, boost in field_boosts.items():
+            weights = weights + boost * field_weights(token_lists[field], vocabulary)
+        return cls(weights.astype(np.float32), vocabulary, documents)
+
+    def save(self, directory=BM25_INDEX_DIR):
+        os.makedirs(directory, exist_ok=True)
+        sparse.save_npz(os.path.join(directory, MATRIX_FILE), self.weights)
+        with open(os.path.join(directory, VOCABULARY_FILE), "w", encoding="utf-8") as file:
+            json.dump(self.vocabulary, file)
+        with open(os.path.join(directory, DOCUMENTS_FILE), "w", encoding="utf-8") as file:
+            json.dump(self.documents, file)
+
+    @classmethod
+    def load(cls, directory=BM25_INDEX_DIR):
+        weights = sparse.load_npz(os.path.join(directory, MATRIX_FILE))
+        with open(os.path.join(directory, VOCABULARY_FILE), "r", encoding="utf-8") as file:
+            vocabulary = json.load(file)
+        with open(os.path.join(directory, DOCUMENTS_FILE), "r", encoding="utf-8") as file:
+            documents = json.load(file)
+        return cls(weights, vocabulary, documents)
+
+    def scores(self, query):
+        term_ids, counts = np.unique(
+            [self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary and token not in QUERY_OPERATORS],
+            return_counts=True,
+        )
+        if not len(term_ids):
+            return np.zeros(len(self.documents), dtype=np.float32)
+        return np.asarray(self.weights[:, term_ids] @ counts.astype(np.float32)).ravel()
+
+    def search(self, query, size=10):
+        scores = self.scores(query)
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return None
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:size]]
+        return [self.documents[row] for row in top]
+
+
+def load_or_build_bm25(data_file, directory=BM25_INDEX_DIR):
+    """
+    Loads the saved index, rebuilding it when missing or older than the data file. Without the
+    data file (serving-only deployments ship just the index) the saved index is used as it is.
+    """
+    matrix_path = os.path.join(directory, MATRIX_FILE)
+    if os.path.exists(matrix_path):
+        if not os.path.exists(data_file):
+            print(f"⚠️ {data_file} not found, using the saved BM25 index in {directory}")
+            return BM25Index.load(directory)
+        if os.path.getmtime(matrix_path) >= os.path.getmtime(data_file):
+            return BM25Index.load(directory)
+
+    print(f"🔄 Building BM25 index from {data_file}...")
+    with open(data_file, "r", encoding="utf-8") as file:
+        index = BM25Index.build(json.load(file))
+    index.save(directory)
+    print(f"✅ BM25 index built: {len(index.documents)} documents, {len(index.vocabulary)} terms")
+    return index
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the embedded BM25 index and search it.")
+    parser.add_argument("--data", type=str, default="data/company_data_cleaned_final.json")
+    parser.add_argument("--index-dir", type=str, default=BM25_INDEX_DIR)
+    parser.add_argument("--query", type=str, default=None, help="Run one query after building")
+    args = parser.parse_args()
+
+    engine = load_or_build_bm25(args.data, args.index_dir)
+    if args.query:
+        for document in engine.search(args.query) or []:
+            print(f"📌 {document['metadata'].get('company_name')}")
@@ -0,0 +1,329 @@
+import os
+import json
+import bisect
+import argparse
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+# **Faceted company directory: filtered, paginated listing with facet counts**
+#
+# Built once from the company records, entirely in memory:
+#   - every facet value (status, batch, tag, country, location) has a packed bitmap of its rows,
+#     and every facet keeps its value codes per row (tags: (row, code) pairs in row order), so
+#     facet counts over any result set are one np.bincount over the codes of the selected rows
+#   - company names have a suffix array over all (lowercased) names joined by a separator:
+#     every name containing a substring sits in one contiguous range of it, found with two
+#     binary searches, so name search is exact without scanning names; recent name queries
+#     keep their row bitmap in a small LRU (typing repeats prefixes)
+# Filters AND across facets and OR within one. A facet's counts ignore that facet's own filter
+# (disjunctive faceting), so the options of a selected facet stay visible.
+#
+# Records are the flat scraped companies of company_data.json (also what /company_data serves);
+# prepared {"text", "metadata"} documents and .jl files are accepted too. Pages carry only the
+# LIST_FIELDS of each company; the long description and base64 images come from `get()`.
+COMPANIES_FILE = os.environ.get("COMPANIES_FILE", "company_data.json")
+FACETS = {
+    # facet -> record field
+    "status": "status",
+    "batch": "batch",
+    "tag": "tags",
+    "country": "country",
+    "location": "location",
+}
+SUBSTRING_FACETS = {"location"}  # filter values match every facet value containing them
+NAME_SEPARATOR = "\x00"
+NAME_CACHE_ENTRIES = 1024
+SORTS = ("", "name", "-year_founded", "-team_size")
+LIST_FIELDS = ("company_id", "company_name", "short_description", "batch", "status", "tags", "location", "country",
+               "year_founded", "num_founders", "founders_names", "team_size", "website", "cb_url", "linkedin_url")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+FACET_LIMIT = 100
+
+
+def normalize(value):
+    return " ".join(str(value).lower().split())
+
+
+class CompanyDirectory:
+    def __init__(self, records):
+        self.records = [record for record in records if isinstance(record, dict)]
+        self.count = len(self.records)
+        self.bytes = (self.count + 7) // 8
+        self._build_facets()
+        self._build_name_index()
+        self._build_sorts()
+        self._all = self._bitmap(np.arange(self.count))
+        self._all_counts = {}
+        self.rows_by_id = {str(record["company_id"]): row for row, record in enumerate(self.records)
+                           if record.get("company_id") not in (None, "")}
+
+    def _bitmap(self, rows):
+        mask = np.zeros(self.count, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask, bitorder="little")
+
+    def _mask(self, bitmap):
+        return np.unpackbits(bitmap, count=self.count, bitorder="little").view(bool)
+
+    # **Build**
+    def _build_facets(self):
+        self.facets = {}
+        for facet, field in FACETS.items():
+            codes, labels, entry_rows, entry_codes = {}, [], [], []
+            for row, record in enumerate(self.records):
+                value = record.get(field)
+                for item in value if isinstance(value, list) else [value]:
+                    if item in (None, ""):
+                        continue
+                    key = normalize(item)
+                    if key not in codes:
+                        codes[key] = len(labels)
+                        labels.append(str(item).strip())
+                    entry_rows.append(row)
+                    entry_codes.append(codes[key])
+            entry_rows = np.array(entry_rows, dtype=np.int32)
+            entry_codes = np.array(entry_codes, dtype=np.int32)
+            order = np.argsort(entry_codes, kind="stable")
+            bounds = np.searchsorted(entry_codes[order], np.arange(len(labels) + 1))
+            self.facets[facet] = {
+                "codes": codes,
+                "labels": labels,
+                "entry_rows": entry_rows,
+                "entry_codes": entry_codes,
+                # entries are in row order: row r owns entries row_starts[r]:row_starts[r + 1]
+                "row_starts": np.searchsorted(entry_rows, np.arange(self.count + 1)),
+                "bitmaps": [self._bitmap(entry_rows[order[bounds[code]:bounds[code + 1]]]) for code in range(len(labels))],
+            }
+            if len(np.unique(entry_rows)) == len(entry_rows):
+                # Single-valued: one code per row (len(labels) = no value) is the cheapest to count
+                row_codes = np.full(self.count, len(labels), dtype=np.int32)
+                row_codes[entry_rows] = entry_codes
+                self.facets[facet]["row_codes"] = row_codes
+
+    def _build_name_index(self):
+        self.names = [normalize(record.get("company_name") or "").replace(NAME_SEPARATOR, "") for record in self.records]
+        self.name_text = NAME_SEPARATOR.join(self.names) + NAME_SEPARATOR
+        self.name_suffixes = suffix_array(self.name_text)
+        lengths = np.array([len(name) + 1 for name in self.names], dtype=np.int64)
+        self.name_position_rows = np.repeat(np.arange(self.count, dtype=np.int32), lengths)
+        self._name_cache = OrderedDict()
+        self._name_cache_lock = threading.Lock()
+
+    def _build_sorts(self):
+        def numeric(field):
+            values = np.array([record.get(field) if isinstance(record.get(field), (int, float)) else np.nan
+                               for record in self.records], dtype=np.float64)
+            # Descending, companies without a value last
+            return np.lexsort((np.arange(self.count), -np.nan_to_num(values, nan=-np.inf)))
+
+        orders = {
+            "name": np.array(sorted(range(self.count), key=lambda row: self.names[row]), dtype=np.int64),
+            "-year_founded": numeric("year_founded"),
+            "-team_size": numeric("team_size"),
+        }
+        # Each order plus the position of every row in it
+        self.sort_orders = orders
+        self.sort_ranks = {}
+        for sort, order in orders.items():
+            ranks = np.empty(self.count, dtype=np.int32)
+            ranks[order] = np.arange(self.count, dtype=np.int32)
+            self.sort_ranks[sort] = ranks
+
+    # **Query**
+    def name_bitmap(self, query):
+        """Bitmap of rows whose name contains `query` (case-insensitive)."""
+        query = normalize(query).replace(NAME_SEPARATOR, "")
+        with self._name_cache_lock:
+            bitmap = self._name_cache.get(query)
+            if bitmap is not None:
+                self._name_cache.move_to_end(query)
+                return bitmap
+
+        def prefix(position):
+            return self.name_text[position:position + len(query)]
+
+        low = bisect.bisect_left(self.name_suffixes, query, key=prefix)
+        high = bisect.bisect_right(self.name_suffixes, query, lo=low, key=prefix)
+        mask = np.zeros(self.count, dtype=bool)
+        mask[self.name_position_rows[self.name_suffixes[low:high]]] = True
+        bitmap = np.packbits(mask, bitorder="little")
+        with self._name_cache_lock:
+            self._name_cache[query] = bitmap
+            while len(self._name_cache) > NAME_CACHE_ENTRIES:
+                self._name_cache.popitem(last=False)
+        return bitmap
+
+    def facet_bitmap(self, facet, values):
+        """OR of the bitmaps of the given values of one facet."""
+        facet_index = self.facets[facet]
+        codes = set()
+        for value in values:
+            value = normalize(value)
+            if facet in SUBSTRING_FACETS:
+                codes.update(code for key, code in facet_index["codes"].items() if value in key)
+            elif value in facet_index["codes"]:
+                codes.add(facet_index["codes"][value])
+        bitmap = np.zeros(self.bytes, dtype=np.uint8)
+        for code in codes:
+            bitmap |= facet_index["bitmaps"][code]
+        return bitmap
+
+    def facet_counts(self, facet, mask, rows=None, limit=FACET_LIMIT):
+        """Top `limit` values of a facet by count over the rows set in `mask` (`rows`: the same rows, if known)."""
+        facet_index = self.facets[facet]
+        if mask is None:
+            counts = self._all_counts.get(facet)
+            if counts is None:
+                counts = self._all_counts[facet] = np.bincount(facet_index["entry_codes"], minlength=len(facet_index["labels"]))
+        elif "row_codes" in facet_index:
+            codes = facet_index["row_codes"][mask if rows is None else rows]
+            counts = np.bincount(codes, minlength=len(facet_index["labels"]) + 1)[:-1]
+        else:
+            rows = np.flatnonzero(mask) if rows is None else rows
+            if len(rows) * 4 < self.count:
+                # Few rows: gather just their entries
+                starts = facet_index["row_starts"][rows]
+                lengths = facet_index["row_starts"][rows + 1] - starts
+                positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+                codes = facet_index["entry_codes"][positions]
+            else:
+                codes = facet_index["entry_codes"][mask[facet_index["entry_rows"]]]
+            counts = np.bincount(codes, minlength=len(facet_index["labels"]))
+        top = np.flatnonzero(counts)
+        top = top[np.lexsort((top, -counts[top]))][:limit]
+        return [{"value": facet_index["labels"][code], "count": int(counts[code])} for code in top]
+
+    def get(self, company_id):
+        """The full record of a company, or None."""
+        row = self.rows_by_id.get(str(company_id))
+        return self.records[row] if row is not None else None
+
+    def search(self, q=None, filters=None, sort="", offset=0, limit=DEFAULT_LIMIT, facets=True, facet_limit=FACET_LIMIT,
+               fields=LIST_FIELDS):
+        """
+        `filters` maps facets to lists of values. Returns {"total", "offset", "limit",
+        "companies": [`fields` of the page's records], "facets": {facet: [{"value", "count"}]}}.
+        """
+        filters = {facet: values for facet, values in (filters or {}).items() if facet in FACETS and values}
+        searching = bool(q and normalize(q))
+        base = self.name_bitmap(q) if searching else self._all
+        facet_bitmaps = {facet: self.facet_bitmap(facet, values) for facet, values in filters.items()}
+
+        result = base.copy()
+        for bitmap in facet_bitmaps.values():
+            result &= bitmap
+        mask = self._mask(result)
+        selected = np.flatnonzero(mask)
+
+        counts = {}
+        for facet in FACETS if facets else ():
+            others = [bitmap for other, bitmap in facet_bitmaps.items() if other != facet]
+            if facet not in facet_bitmaps:
+                counts[facet] = self.facet_counts(facet, mask if searching or others else None, selected, facet_limit)
+            elif not searching and not others:
+                counts[facet] = self.facet_counts(facet, None, limit=facet_limit)
+            else:
+                # Every filter except the facet's own
+                others_bitmap = base.copy()
+                for bitmap in others:
+                    others_bitmap &= bitmap
+                counts[facet] = self.facet_counts(facet, self._mask(others_bitmap), limit=facet_limit)
+
+        offset = max(0, offset)
+        limit = min(max(0, limit), MAX_LIMIT)
+        return {
+            "total": int(len(selected)),
+            "offset": offset,
+            "limit": limit,
+            "companies": [{field: self.records[row].get(field) for field in fields}
+                          for row in self.page(selected, sort, offset, limit, mask)],
+            "facets": counts,
+        }
+
+    def page(self, rows, sort, offset, limit, mask=None):
+        """
+        Rows offset:offset + limit of `rows` in `sort` order. Large result sets walk the sort order
+        until the page end is reached; small ones sort only their rows up to the page end.
+        """
+        ranks = self.sort_ranks.get(sort)
+        if ranks is None:
+            return rows[offset:offset + limit]
+        end = min(offset + limit, len(rows))
+        if end <= offset:
+            return rows[:0]
+        if mask is not None and end * self.count < len(rows) ** 2:
+            order = self.sort_orders[sort]
+            scanned = min(self.count, 2 * end * self.count // len(rows) + 64)
+            while True:
+                head = order[:scanned][mask[order[:scanned]]]
+                if len(head) >= end or scanned == self.count:
+                    return head[offset:end]
+                scanned = min(self.count, scanned * 2)
+        row_ranks = ranks[rows]
+        head = np.argpartition(row_ranks, end - 1)[:end] if end < len(rows) else np.arange(len(rows))
+        head = head[np.argsort(row_ranks[head], kind="stable")]
+        return rows[head[offset:end]]
+
+
+def suffix_array(text):
+    """Start positions of all suffixes of `text` in sorted order (prefix doubling, O(n log^2 n) in numpy)."""
+    ranks = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    count = len(ranks)
+    if count < 2:
+        return np.arange(count, dtype=np.int32)
+    step = 1
+    while True:
+        following = np.full(count, -1, dtype=np.int64)
+        following[:count - step] = ranks[step:]
+        order = np.lexsort((following, ranks))
+        changed = (np.diff(ranks[order]) != 0) | (np.diff(following[order]) != 0)
+        new_ranks = np.empty(count, dtype=np.int64)
+        new_ranks[order] = np.concatenate(([0], np.cumsum(changed)))
+        ranks = new_ranks
+        if ranks.max() == count - 1 or step >= count:
+            return order.astype(np.int32)
+        step *= 2
+
+
+def directory_record(item):
+    """A flat company record from a scraped company or a prepared document (batch lives in metadata.description)."""
+    if not isinstance(item, dict) or "metadata" not in item or "company_name" in item:
+        return item
+    metadata = item.get("metadata") or {}
+    record = {field: value for field, value in metadata.items() if field not in ("description", "ycombinator")}
+    record["batch"] = metadata.get("description")
+    record["company_url"] = metadata.get("ycombinator")
+    return record
+
+
+def load_company_directory(path=COMPANIES_FILE):
+    with open(path, "r", encoding="utf-8") as file:
+        if path.endswith(".jl"):
+            items = [json.loads(line) for line in file if line.strip()]
+        else:
+            items = json.load(file)
+    directory = CompanyDirectory(directory_record(item) for item in items)
+    print(f"✅ Company directory loaded: {directory.count} companies, {len(directory.name_text)} characters of names indexed")
+    return directory
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the faceted company directory from the command line.")
+    parser.add_argument("--data", type=str, default=COMPANIES_FILE)
+    parser.add_argument("--q", type=str, default=None, help="Substring of the company name")
+    for facet in FACETS:
+        parser.add_argument(f"--{facet}", type=str, action="append", default=None)
+    parser.add_argument("--sort", type=str, choices=SORTS, default="")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    directory = load_company_directory(args.data)
+    result = directory.search(args.q, {facet: getattr(args, facet) for facet in FACETS}, sort=args.sort, limit=args.limit)
+    print(f"📌 {result['total']} companies match")
+    for record in result["companies"]:
+        print(f"  {record.get('company_name')} | {record.get('batch')} | {record.get('status')} | {record.get('location')}")
+    print(json.dumps({facet: counts[:10] for facet, counts in result["facets"].items()}, indent=4, ensure_ascii=False))
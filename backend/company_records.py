@@ -0,0 +1,112 @@
+import json
+import hashlib
+
+
+# **Company records: scraped item -> search document, stable id and content hash**
+#
+# Scraped items (output.jl) carry the YC `company_id`; it is kept in metadata so every
+# index (FAISS, Elasticsearch, metadata store) can key documents by it instead of by position.
+
+# Elasticsearch mapping of a prepared document
+ES_MAPPING = {
+    "mappings": {
+        "properties": {
+            "text": {"type": "text"},
+            "metadata": {
+                "properties": {
+                    "company_id": {"type": "long"},
+                    "company_name": {"type": "text"},
+                    "description": {"type": "text"},
+                    "tags": {"type": "text"},
+                    "location": {"type": "text"},
+                    "country": {"type": "text"},
+                    "year_founded": {"type": "integer"},
+                    "num_founders": {"type": "integer"},
+                    "founders_names": {"type": "text"},
+                    "team_size": {"type": "integer"},
+                    "website": {"type": "keyword"},
+                    "linkedin_url": {"type": "keyword"},
+                    "status": {"type": "text"},
+                    "ycombinator": {"type": "keyword"}
+                }
+            },
+        }
+    }
+}
+
+
+def prepare_document(obj):
+    """Turns one scraped company into the {"text", "metadata"} document used by ES and FAISS."""
+    text_data = f"{obj['company_name']} {obj['short_description']} {obj['long_description']}"
+    metadata = {
+        "company_id": obj.get("company_id"),
+        "company_name": obj["company_name"],
+        "description": obj["batch"],
+        "status": obj["status"],
+        "tags": obj["tags"],
+        "location": obj["location"],
+        "country": obj["country"],
+        "year_founded": obj["year_founded"],
+        "num_founders": obj["num_founders"],
+        "founders_names": obj["founders_names"],
+        "team_size": obj["team_size"],
+        "website": obj["website"],
+        "cb_url": obj["cb_url"],
+        "linkedin_url": obj["linkedin_url"],
+        "ycombinator": obj.get("company_url"),
+    }
+    return {"text": text_data, "metadata": metadata}
+
+
+# ✅ Safe handling of None values
+def preprocess_data(item):
+    """Text that gets embedded for a document."""
+    meta = item.get("metadata", {})
+    combined_text = " ".join([
+        str(item.get("text", "")),
+        str(meta.get("company_name", "")),
+        str(meta.get("description", "")),
+        str(meta.get("status", "")),
+        " ".join(map(str, meta.get("tags") or [])),
+        str(meta.get("location", "")),
+        str(meta.get("country", "")),
+        str(meta.get("year_founded", "")),
+        " ".join(map(str, meta.get("founders_names") or [])),
+        str(meta.get("team_size", "")),
+        str(meta.get("website", "")),
+        str(meta.get("linkedin_url", "")),
+        str(meta.get("ycombinator", ""))
+    ])
+    return combined_text.strip().lower()
+
+
+def content_hash(item):
+    """Changes exactly when the embedded text changes, so unchanged companies are never re-encoded."""
+    return hashlib.blake2b(preprocess_data(item).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def document_hash(item):
+    """Hash of the whole stored document (text and every metadata field), for the Elasticsearch loaders."""
+    return hashlib.blake2b(json.dumps(item, sort_keys=True, ensure_ascii=False).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def company_id(item):
+    """
+    Stable integer id of a document: the scraped company_id, or for documents prepared before
+    it was kept, a 62-bit hash of the YC company URL (else the name) so ids never depend on order.
+    """
+    meta = item.get("metadata", {})
+    if meta.get("company_id") not in (None, ""):
+        return int(meta["company_id"])
+    key = str(meta.get("ycombinator") or meta.get("company_name") or item.get("text", "")).strip().lower().rstrip("/")
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") >> 2
+
+
+def with_company_ids(data):
+    """Sets metadata.company_id on every document and drops duplicates (last occurrence wins)."""
+    documents = {}
+    for item in data:
+        item = {**item, "metadata": {**item.get("metadata", {})}}
+        item["metadata"]["company_id"] = company_id(item)
+        documents[item["metadata"]["company_id"]] = item
+    return list(documents.values())
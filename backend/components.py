@@ -0,0 +1,83 @@
+import time
+import threading
+from starlette.concurrency import run_in_threadpool
+
+
+# **Lazily loaded server components with readiness tracking**
+class Component:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.state = "pending"  # pending -> loading -> ready | failed
+        self.value = None
+        self.error = None
+        self.load_seconds = None
+        self.lock = threading.Lock()
+
+
+class ComponentRegistry:
+    """
+    Holds expensive server dependencies (embedding model, FAISS index, API clients) behind
+    loader functions. A component loads on first `get()`, or earlier from `start_background()`;
+    concurrent callers wait for the same load. `status()` feeds the readiness probe.
+    """
+
+    def __init__(self):
+        self.components = {}
+
+    def register(self, name, loader):
+        self.components[name] = Component(name, loader)
+
+    def get(self, name):
+        component = self.components[name]
+        if component.state == "ready":
+            return component.value
+        with component.lock:
+            if component.state != "ready":
+                component.state = "loading"
+                start = time.perf_counter()
+                try:
+                    component.value = component.loader()
+                except Exception as e:
+                    component.state = "failed"
+                    component.error = str(e)
+                    print(f"❌ Failed to load {name}: {e}")
+                    raise
+                component.load_seconds = round(time.perf_counter() - start, 3)
+                component.error = None
+                component.state = "ready"
+                print(f"✅ {name} ready in {component.load_seconds}s")
+        return component.value
+
+    async def aget(self, name):
+        """Async accessor: returns immediately when ready, otherwise loads off the event loop."""
+        component = self.components[name]
+        if component.state == "ready":
+            return component.value
+        return await run_in_threadpool(self.get, name)
+
+    def peek(self, name):
+        """Returns the component if it is registered and already loaded, without triggering a load."""
+        component = self.components.get(name)
+        return component.value if component is not None and component.state == "ready" else None
+
+    def load_all(self, names=None):
+        for name in names or list(self.components):
+            try:
+                self.get(name)
+            except Exception:
+                pass
+
+    def start_background(self, names=None):
+        thread = threading.Thread(target=self.load_all, args=(names,), name="component-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def ready(self, names=None):
+        return all(self.components[name].state == "ready" for name in names or self.components)
+
+    def status(self):
+        return {
+            name: {"state": component.state, "load_seconds": component.load_seconds, "error": component.error}
+            for name, component in self.components.items()
+        }
@@ -0,0 +1,244 @@
+import os
+import re
+import threading
+from collections import deque
+import numpy as np
+
+
+# **Token-budgeted context packing for LLM prompts**
+#
+# Retrieved documents are rendered as one compact block each: a header line with the metadata
+# fields that matter for the question, then as much of the description as the budget allows
+# (sentences sharing words with the question first). Fields only needed for specific questions,
+# like URLs, are left out otherwise. Documents are packed in retrieval order until
+# CONTEXT_TOKEN_BUDGET tokens are used, so every prompt has a bounded size: the best ranked
+# documents get descriptions first, lower ranked ones only a header if room is left.
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 1200))
+# tokenizer.json of the LLM (e.g. Llama 3's); otherwise the embedder's tokenizer approximates it
+LLM_TOKENIZER_FILE = os.environ.get("LLM_TOKENIZER_FILE")
+MIN_TEXT_TOKENS = 24  # below this a description is not worth starting
+
+# (metadata field, label, words in the question that make the field relevant or None = always kept)
+FIELDS = [
+    ("company_name", "Company", None),
+    ("description", "Batch", None),
+    ("status", "Status", None),
+    ("tags", "Tags", None),
+    ("location", "Location", None),
+    ("year_founded", "Founded", None),
+    ("team_size", "Team size", None),
+    ("num_founders", "Founders count", ("founder", "founders", "cofounder", "co-founder", "how many")),
+    ("founders_names", "Founders", ("founder", "founders", "cofounder", "co-founder", "ceo", "cto", "who", "team", "people")),
+    ("country", "Country", ("country", "countries", "where", "based", "located")),
+    ("website", "Website", ("website", "site", "url", "link", "domain", "homepage")),
+    ("ycombinator", "YC page", ("yc page", "ycombinator", "y combinator page", "url", "link")),
+    ("linkedin_url", "LinkedIn", ("linkedin",)),
+    ("cb_url", "Crunchbase", ("crunchbase",)),
+]
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+WORD = re.compile(r"\w+")
+STOP_WORDS = {"the", "a", "an", "of", "and", "or", "in", "on", "for", "to", "is", "are", "what", "which", "who",
+              "does", "do", "this", "that", "with", "company", "companies", "how", "me", "show", "about", "their"}
+
+
+# **Token counting**
+class TokenCounter:
+    """Counts tokens with a local `tokenizers` tokenizer, or ~4 characters per token without one."""
+
+    def __init__(self, tokenizer_file=None):
+        self.tokenizer_file = tokenizer_file
+        self._tokenizer = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _candidates(self):
+        from embedders import ONNX_MODEL_DIR
+        return [path for path in (self.tokenizer_file, LLM_TOKENIZER_FILE, os.path.join(ONNX_MODEL_DIR, "tokenizer.json")) if path]
+
+    @property
+    def tokenizer(self):
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                for path in self._candidates():
+                    if os.path.exists(path):
+                        try:
+                            from tokenizers import Tokenizer
+                            self._tokenizer = Tokenizer.from_file(path)
+                            self._tokenizer.no_truncation()
+                            print(f"✅ Prompt token counts use {path}")
+                            break
+                        except Exception as e:
+                            print(f"⚠️ Could not load tokenizer {path}: {e}")
+                if self._tokenizer is None:
+                    print("⚠️ No local tokenizer found, estimating prompt tokens as characters / 4.")
+        return self._tokenizer
+
+    def count(self, text):
+        text = str(text or "")
+        if self.tokenizer is None:
+            return (len(text) + 3) // 4
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def truncate(self, text, max_tokens):
+        """Longest prefix of `text` within `max_tokens`, cut at a word boundary."""
+        text = str(text or "")
+        if max_tokens <= 0:
+            return ""
+        if self.tokenizer is None:
+            cut = max_tokens * 4
+        else:
+            offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+            if len(offsets) <= max_tokens:
+                return text
+            cut = offsets[max_tokens - 1][1]
+        if cut >= len(text):
+            return text
+        return text[:cut].rsplit(" ", 1)[0].rstrip(" ,;:") + " …"
+
+
+token_counter = TokenCounter()
+
+
+def count_tokens(text):
+    return token_counter.count(text)
+
+
+def prompt_tokens(messages):
+    """Tokens in the content of a chat prompt."""
+    return sum(count_tokens(message.get("content", "")) for message in messages)
+
+
+# **Packing**
+def query_terms(query):
+    return {word for word in WORD.findall(str(query or "").lower()) if word not in STOP_WORDS and len(word) > 1}
+
+
+def relevant_fields(query):
+    """
+    The metadata fields worth sending for this question. Single-word triggers must appear as
+    whole words ("who" does not match "whole"); multi-word ones like "how many" as phrases.
+    """
+    query = " ".join(WORD.findall(str(query or "").lower()))
+    words = set(query.split())
+
+    def triggered(trigger):
+        if WORD.fullmatch(trigger):
+            return trigger in words
+        return f" {' '.join(WORD.findall(trigger))} " in f" {query} "
+
+    return [(field, label) for field, label, triggers in FIELDS if triggers is None or any(triggered(trigger) for trigger in triggers)]
+
+
+def format_value(value):
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value if item not in (None, ""))
+    return "" if value is None else str(value)
+
+
+def document_header(document, fields, rank):
+    metadata = document.get("metadata") or {}
+    parts = [f"{label}: {format_value(metadata.get(field))}" for field, label in fields if format_value(metadata.get(field))]
+    return f"[{rank}] " + " | ".join(parts)
+
+
+def select_sentences(text, terms, max_tokens):
+    """Fits the description into `max_tokens`: sentences mentioning query terms first, kept in their original order."""
+    text = " ".join(str(text or "").split())
+    if count_tokens(text) <= max_tokens:
+        return text, False
+    sentences = SENTENCE_SPLIT.split(text)
+    scores = [len(terms & set(WORD.findall(sentence.lower()))) for sentence in sentences]
+    order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+    chosen, used = [], 0
+    for i in order:
+        cost = count_tokens(sentences[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        chosen.append(i)
+        used += cost
+    if not chosen:
+        return token_counter.truncate(sentences[order[0]], max_tokens), True
+    return " ".join(sentences[i] for i in sorted(chosen)), True
+
+
+class PackedContext:
+    """Packed reference text plus what it cost and what was left out."""
+
+    def __init__(self, text, tokens, included, dropped, truncated):
+        self.text = text
+        self.tokens = tokens
+        self.included = included
+        self.dropped = dropped
+        self.truncated = truncated
+
+    def stats(self):
+        return {"context_tokens": self.tokens, "documents": self.included, "dropped": self.dropped, "truncated": self.truncated}
+
+
+def pack_documents(documents, query, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Packs documents in rank order into at most `budget` tokens. The top documents get their
+    header plus a description: as many of them as fit with at least MIN_TEXT_TOKENS of text each,
+    the budget shared out in rank order, a document's unused share passing on to the next ones.
+    Lower ranked documents then get just their header while the budget lasts.
+    """
+    documents = [document for document in documents or [] if isinstance(document, dict)]
+    fields = relevant_fields(query)
+    terms = query_terms(query)
+    headers = [document_header(document, fields, rank) for rank, document in enumerate(documents, 1)]
+    costs = [count_tokens(header) + 1 for header in headers]
+
+    described, used = 0, 0
+    for cost in costs:
+        if used + cost + (described + 1) * MIN_TEXT_TOKENS > budget:
+            break
+        described += 1
+        used += cost
+
+    blocks, truncated = [], 0
+    remaining = budget - used
+    for position in range(described):
+        share = remaining // (described - position)
+        description = ""
+        if share >= MIN_TEXT_TOKENS:
+            description, was_truncated = select_sentences(documents[position].get("text"), terms, share - 1)
+            truncated += was_truncated
+            remaining -= count_tokens(description) + 1 if description else 0
+        blocks.append(f"{headers[position]}\n{description}" if description else headers[position])
+    for position in range(described, len(documents)):
+        if costs[position] > remaining:
+            break
+        blocks.append(headers[position])
+        remaining -= costs[position]
+
+    text = "\n\n".join(blocks)
+    return PackedContext(text, count_tokens(text), len(blocks), len(documents) - len(blocks), truncated)
+
+
+# **Prompt size metrics**
+class PromptStats:
+    """Prompt token counts per phase over the last `window` prompts."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._window = window
+
+    def record(self, phase, tokens):
+        with self._lock:
+            self._tokens.setdefault(phase, deque(maxlen=self._window)).append(tokens)
+
+    def stats(self):
+        with self._lock:
+            snapshot = {phase: np.array(values) for phase, values in self._tokens.items()}
+        return {
+            phase: {
+                "prompts": len(values),
+                "mean_tokens": round(float(values.mean()), 1),
+                "p95_tokens": round(float(np.percentile(values, 95)), 1),
+                "max_tokens": int(values.max()),
+            }
+            for phase, values in snapshot.items() if len(values)
+        }
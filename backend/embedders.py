@@ -0,0 +1,214 @@
+import os
+import json
+import argparse
+import numpy as np
+
+
+# **Pluggable sentence embedders**
+#
+# All backends produce the same 384-dim, L2-normalized all-MiniLM-L6-v2 embeddings:
+#   torch      -> sentence-transformers on PyTorch (reference, needs torch)
+#   onnx       -> exported ONNX graph on ONNX Runtime + `tokenizers` (no torch)
+#   onnx_int8  -> same graph with dynamically quantized int8 weights
+# The ONNX files are produced once with `python embedders.py export` (needs torch at build time).
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDER_BACKENDS = ("torch", "onnx", "onnx_int8")
+ONNX_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", "onnx_model")
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+ONNX_CONFIG_FILE = "embedder.json"
+MAX_SEQ_LENGTH = 256
+
+
+class Embedder:
+    """Interface: `encode(texts)` returns a float32 (len(texts), dimension) matrix of unit vectors."""
+
+    backend = None
+    dimension = None
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        raise NotImplementedError
+
+
+class TorchEmbedder(Embedder):
+    backend = "torch"
+
+    def __init__(self, model_name=MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        embeddings = self.model.encode(
+            list(texts), batch_size=batch_size, convert_to_numpy=True,
+            normalize_embeddings=True, show_progress_bar=show_progress_bar,
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+class OnnxEmbedder(Embedder):
+    """Runs the exported transformer on ONNX Runtime, then mean-pools and normalizes like sentence-transformers."""
+
+    backend = "onnx"
+    model_file = ONNX_MODEL_FILE
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, self.model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found, run `python embedders.py export` first")
+        with open(os.path.join(model_dir, ONNX_CONFIG_FILE), "r", encoding="utf-8") as file:
+            config = json.load(file)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.dimension = config["dimension"]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=config.get("max_seq_length", MAX_SEQ_LENGTH))
+        self.tokenizer.enable_padding(pad_id=config.get("pad_token_id", 0))
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        # Sort by length so each batch pads to similar lengths, then restore the input order
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            embeddings[rows] = self._encode_batch([texts[row] for row in rows])
+            if show_progress_bar:
+                print(f"🔄 Encoded {min(start + batch_size, len(texts))}/{len(texts)}", end="\r")
+        return embeddings
+
+
+class OnnxInt8Embedder(OnnxEmbedder):
+    backend = "onnx_int8"
+    model_file = ONNX_INT8_MODEL_FILE
+
+
+def load_embedder(backend="torch", model_dir=ONNX_MODEL_DIR):
+    if backend == "torch":
+        return TorchEmbedder()
+    if backend == "onnx":
+        return OnnxEmbedder(model_dir, threads=os.environ.get("EMBEDDER_THREADS"))
+    if backend == "onnx_int8":
+        return OnnxInt8Embedder(model_dir, threads=os.environ.get("EMBEDDER_THREADS"))
+    raise ValueError(f"Unknown embedder backend '{backend}', expected one of {EMBEDDER_BACKENDS}")
+
+
+# **Build-time: export and quantize (needs torch + transformers, not needed for serving)**
+def export_onnx(model_name=MODEL_NAME, model_dir=ONNX_MODEL_DIR):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    sentence_model = SentenceTransformer(model_name, device="cpu")
+    transformer = sentence_model[0].auto_model.eval()
+    tokenizer = sentence_model.tokenizer
+    os.makedirs(model_dir, exist_ok=True)
+
+    sample = tokenizer(["an example sentence", "another one"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        TokenEmbeddings(transformer), tuple(sample[name] for name in input_names),
+        os.path.join(model_dir, ONNX_MODEL_FILE), input_names=input_names,
+        output_names=["token_embeddings"], dynamic_axes=dynamic_axes, opset_version=17, dynamo=False,
+    )
+    tokenizer.save_pretrained(model_dir)
+    config = {
+        "model": model_name,
+        "dimension": sentence_model.get_sentence_embedding_dimension(),
+        "max_seq_length": sentence_model.max_seq_length,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    with open(os.path.join(model_dir, ONNX_CONFIG_FILE), "w", encoding="utf-8") as file:
+        json.dump(config, file, indent=4)
+    print(f"✅ Exported {model_name} to {model_dir}/{ONNX_MODEL_FILE}")
+
+
+def quantize_onnx(model_dir=ONNX_MODEL_DIR):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        os.path.join(model_dir, ONNX_MODEL_FILE),
+        os.path.join(model_dir, ONNX_INT8_MODEL_FILE),
+        weight_type=QuantType.QInt8,
+    )
+    print(f"✅ Wrote int8 model to {model_dir}/{ONNX_INT8_MODEL_FILE}")
+
+
+# **Parity: cosine agreement with the reference model**
+PARITY_TEXTS = [
+    "Stripe builds payments infrastructure for the internet",
+    "fintech companies in the W21 batch",
+    "Who founded Airbnb?",
+    "AI developer tools for code review",
+    "Healthcare startup based in San Francisco with 10 employees",
+    "robotics",
+]
+
+
+def parity_check(candidate, reference, texts=PARITY_TEXTS):
+    """Cosine similarity between each text's candidate and reference embedding."""
+    cosines = np.sum(candidate.encode(texts) * reference.encode(texts), axis=1)
+    return {"min_cosine": round(float(cosines.min()), 5), "mean_cosine": round(float(cosines.mean()), 5)}
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export, quantize and check the ONNX embedders.")
+    parser.add_argument("command", choices=["export", "quantize", "parity"])
+    parser.add_argument("--model-dir", type=str, default=ONNX_MODEL_DIR)
+    parser.add_argument("--data", type=str, default=None, help="JSON file with texts to check parity on")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Fail parity below this cosine")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx(model_dir=args.model_dir)
+        quantize_onnx(args.model_dir)
+    elif args.command == "quantize":
+        quantize_onnx(args.model_dir)
+    else:
+        texts = PARITY_TEXTS
+        if args.data:
+            with open(args.data, "r", encoding="utf-8") as file:
+                texts = json.load(file)
+        reference = TorchEmbedder()
+        failed = False
+        for backend in ("onnx", "onnx_int8"):
+            result = parity_check(load_embedder(backend, args.model_dir), reference, texts)
+            failed |= result["min_cosine"] < args.min_cosine
+            print(f"{'✅' if result['min_cosine'] >= args.min_cosine else '❌'} {backend}: {result}")
+        raise SystemExit(1 if failed else 0)
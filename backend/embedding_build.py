@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from embedders import MODEL_NAME, ONNX_MODEL_DIR, load_embedder
+
+
+# **Multi-process, resumable embedding build**
+#
+# Texts are cut into fixed-size chunks and encoded by a pool of worker processes, each with its
+# own embedder and an equal share of the cores. Every finished chunk is written atomically to
+# <chunk_dir>/chunk_<n>.npy, so a crashed or interrupted build resumes from the chunks already
+# on disk. <chunk_dir>/progress.json fingerprints the inputs (model, backend, chunk size, texts);
+# chunks of a different input set are discarded instead of being reused.
+EMBED_WORKERS = int(os.environ.get("EMBED_WORKERS", 1))
+EMBED_CHUNK_SIZE = int(os.environ.get("EMBED_CHUNK_SIZE", 2048))
+EMBED_CHUNK_DIR = "embedding_chunks"
+PROGRESS_FILE = "progress.json"
+
+_worker_embedder = None
+
+
+def texts_fingerprint(texts, backend, chunk_size):
+    digest = hashlib.blake2b(f"{MODEL_NAME}|{backend}|{chunk_size}".encode("utf-8"), digest_size=16)
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def chunk_path(chunk_dir, chunk):
+    return os.path.join(chunk_dir, f"chunk_{chunk:05d}.npy")
+
+
+def prepare_chunk_dir(chunk_dir, fingerprint, count, chunk_size):
+    """Keeps chunks from an interrupted build of the same inputs, clears anything else; returns done chunk numbers."""
+    progress_path = os.path.join(chunk_dir, PROGRESS_FILE)
+    if os.path.exists(progress_path):
+        with open(progress_path, "r", encoding="utf-8") as file:
+            if json.load(file).get("fingerprint") != fingerprint:
+                print(f"⚠️ {chunk_dir} holds chunks of different inputs, starting over.")
+                shutil.rmtree(chunk_dir)
+    elif os.path.exists(chunk_dir):
+        shutil.rmtree(chunk_dir)
+    os.makedirs(chunk_dir, exist_ok=True)
+    with open(progress_path, "w", encoding="utf-8") as file:
+        json.dump({"fingerprint": fingerprint, "count": count, "chunk_size": chunk_size}, file, indent=4)
+    chunks = (count + chunk_size - 1) // chunk_size
+    return {chunk for chunk in range(chunks) if os.path.exists(chunk_path(chunk_dir, chunk))}
+
+
+def save_chunk(chunk_dir, chunk, embeddings):
+    # np.save appends .npy unless the name already ends with it
+    tmp_path = chunk_path(chunk_dir, chunk) + ".tmp.npy"
+    np.save(tmp_path, np.ascontiguousarray(embeddings, dtype=np.float32))
+    os.replace(tmp_path, chunk_path(chunk_dir, chunk))
+
+
+# **Worker process**
+def _init_worker(backend, model_dir, threads):
+    """Loads one embedder per process, limited to its share of the cores."""
+    global _worker_embedder
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["EMBEDDER_THREADS"] = str(threads)
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+    _worker_embedder = load_embedder(backend, model_dir)
+
+
+def _encode_chunk(chunk_dir, chunk, texts, batch_size):
+    save_chunk(chunk_dir, chunk, _worker_embedder.encode(texts, batch_size=batch_size))
+    return chunk, len(texts)
+
+
+# **Build**
+def encode_parallel(texts, workers=EMBED_WORKERS, backend=None, chunk_dir=EMBED_CHUNK_DIR,
+                    chunk_size=EMBED_CHUNK_SIZE, batch_size=32, embedder=None, model_dir=ONNX_MODEL_DIR, keep_chunks=False):
+    """
+    Encodes `texts` with `workers` processes (or in-process with `embedder` when workers == 1),
+    resuming from chunks left by an interrupted run. Returns a (len(texts), dimension) float32 array.
+    """
+    texts = list(texts)
+    backend = backend or (embedder.backend if embedder is not None else os.environ.get("EMBEDDER_BACKEND", "torch"))
+    fingerprint = texts_fingerprint(texts, backend, chunk_size)
+    done = prepare_chunk_dir(chunk_dir, fingerprint, len(texts), chunk_size)
+    todo = [chunk for chunk in range((len(texts) + chunk_size - 1) // chunk_size) if chunk not in done]
+    if done:
+        print(f"🔄 Resuming embedding build: {len(done)} chunks already on disk, {len(todo)} to go")
+
+    start = time.time()
+    encoded = 0
+    if workers <= 1:
+        embedder = embedder or load_embedder(backend, model_dir)
+        for chunk in todo:
+            chunk_texts = texts[chunk * chunk_size:(chunk + 1) * chunk_size]
+            save_chunk(chunk_dir, chunk, embedder.encode(chunk_texts, batch_size=batch_size))
+            encoded += len(chunk_texts)
+            print(f"✅ Chunk {chunk + 1}/{len(todo) + len(done)} ({encoded / (time.time() - start):.0f} texts/sec)")
+    elif todo:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        # spawn: forking a process that already loaded torch / onnxruntime can deadlock
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(backend, model_dir, threads)) as pool:
+            futures = [
+                pool.submit(_encode_chunk, chunk_dir, chunk, texts[chunk * chunk_size:(chunk + 1) * chunk_size], batch_size)
+                for chunk in todo
+            ]
+            for finished, future in enumerate(as_completed(futures), 1):
+                chunk, count = future.result()
+                encoded += count
+                print(f"✅ Chunk {chunk + 1} done, {finished}/{len(todo)} ({encoded / (time.time() - start):.0f} texts/sec)")
+
+    embeddings = load_chunks(chunk_dir, len(texts), chunk_size)
+    if not keep_chunks:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+    return embeddings
+
+
+def load_chunks(chunk_dir, count, chunk_size):
+    chunks = [np.load(chunk_path(chunk_dir, chunk)) for chunk in range((count + chunk_size - 1) // chunk_size)]
+    return np.vstack(chunks) if chunks else np.empty((0, 0), dtype=np.float32)
@@ -0,0 +1,222 @@
+import os
+import json
+import shutil
+import hashlib
+import argparse
+import numpy as np
+from embedders import MODEL_NAME
+
+
+# **Content-addressed embedding cache**
+#
+# Embeddings are stored under blake2b(model id, text) so a rebuild only encodes texts that are
+# new or changed since any earlier build. Layout of the cache directory:
+#   manifest.json   -> model id, dtype and dimension
+#   keys.bin        -> 16-byte keys, one per row, appended in order
+#   vectors.bin     -> row-major vectors (float16 by default), appended in the same order
+# Vectors are appended before their keys, so a crash mid-write leaves at most an unreferenced
+# tail that is ignored on open. `gc` rewrites both files keeping only keys still in use.
+EMBEDDING_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR", "embedding_cache")
+EMBEDDING_CACHE_DTYPE = os.environ.get("EMBEDDING_CACHE_DTYPE", "float16")
+# A build triggers gc once this share of the cached rows belongs to no current company
+EMBEDDING_CACHE_GC_FRACTION = float(os.environ.get("EMBEDDING_CACHE_GC_FRACTION", 0.25))
+KEY_SIZE = 16
+MANIFEST_FILE = "manifest.json"
+KEYS_FILE = "keys.bin"
+VECTORS_FILE = "vectors.bin"
+GC_CHUNK_ROWS = 65536
+
+
+class EmbeddingStore:
+    """Memory-mapped key -> vector cache; `encode(texts, encode_fn)` only calls `encode_fn` on misses."""
+
+    def __init__(self, directory=EMBEDDING_CACHE_DIR, model_id=MODEL_NAME, dtype=EMBEDDING_CACHE_DTYPE):
+        self.directory = directory
+        self.model_id = model_id
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        self.dimension = None
+        self.rows = {}
+        self._vectors = None
+        os.makedirs(directory, exist_ok=True)
+
+        manifest = self._read_manifest()
+        if manifest and (manifest.get("model_id") != model_id or manifest.get("dtype") != self.dtype.name):
+            print(f"⚠️ Embedding cache in {directory} belongs to {manifest.get('model_id')} ({manifest.get('dtype')}), clearing it.")
+            self.clear()
+            manifest = None
+        if manifest:
+            self.dimension = manifest.get("dimension")
+            self._load_keys()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_manifest(self):
+        if not os.path.exists(self._path(MANIFEST_FILE)):
+            return None
+        with open(self._path(MANIFEST_FILE), "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _write_manifest(self):
+        with open(self._path(MANIFEST_FILE), "w", encoding="utf-8") as file:
+            json.dump({"model_id": self.model_id, "dtype": self.dtype.name, "dimension": self.dimension}, file, indent=4)
+
+    def _load_keys(self):
+        keys = np.fromfile(self._path(KEYS_FILE), dtype=np.uint8) if os.path.exists(self._path(KEYS_FILE)) else np.empty(0, np.uint8)
+        keys = keys[:len(keys) // KEY_SIZE * KEY_SIZE].reshape(-1, KEY_SIZE)
+        vector_rows = self._vector_rows()
+        self.rows = {keys[row].tobytes(): row for row in range(min(len(keys), vector_rows))}
+
+    def _vector_rows(self):
+        if not self.dimension or not os.path.exists(self._path(VECTORS_FILE)):
+            return 0
+        return os.path.getsize(self._path(VECTORS_FILE)) // (self.dimension * self.dtype.itemsize)
+
+    def vectors(self):
+        """(rows, dimension) memory map of the stored vectors, reopened after appends."""
+        count = len(self.rows)
+        if self._vectors is None or len(self._vectors) != count:
+            self._vectors = np.memmap(self._path(VECTORS_FILE), dtype=self.dtype, mode="r", shape=(count, self.dimension)) \
+                if count else np.empty((0, self.dimension or 0), dtype=self.dtype)
+        return self._vectors
+
+    def __len__(self):
+        return len(self.rows)
+
+    def key(self, text):
+        return hashlib.blake2b(f"{self.model_id}\x00{text}".encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+    def put(self, keys, embeddings):
+        """Appends vectors for keys not stored yet."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = int(embeddings.shape[1])
+            self._write_manifest()
+        first_positions = {}
+        for position, key in enumerate(keys):
+            if key not in self.rows and key not in first_positions:
+                first_positions[key] = position
+        new = list(first_positions.values())
+        if not new:
+            return
+        # Drop any torn tail first so rows stay aligned with keys
+        with open(self._path(VECTORS_FILE), "ab") as file:
+            file.truncate(len(self.rows) * self.dimension * self.dtype.itemsize)
+            file.write(np.ascontiguousarray(embeddings[new], dtype=self.dtype).tobytes())
+        with open(self._path(KEYS_FILE), "ab") as file:
+            file.truncate(len(self.rows) * KEY_SIZE)
+            file.write(b"".join(keys[position] for position in new))
+        for position in new:
+            self.rows[keys[position]] = len(self.rows)
+
+    def encode(self, texts, encode_fn):
+        """
+        Embeddings for `texts` as float32, encoding only the texts missing from the cache. Texts
+        encoded by this call come back at full precision; only the stored copy is `dtype`.
+        """
+        texts = list(texts)
+        keys = [self.key(text) for text in texts]
+        missing = list(dict.fromkeys(key for key in keys if key not in self.rows))
+        # Repeats of a missing text are encoded once, so they count as hits
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        fresh = {}
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            encoded = np.asarray(encode_fn([text_by_key[key] for key in missing]), dtype=np.float32)
+            self.put(missing, encoded)
+            fresh = {key: position for position, key in enumerate(missing)}
+        if not texts:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+
+        embeddings = np.empty((len(keys), self.dimension), dtype=np.float32)
+        fresh_positions = [position for position, key in enumerate(keys) if key in fresh]
+        cached_positions = [position for position, key in enumerate(keys) if key not in fresh]
+        if fresh_positions:
+            embeddings[fresh_positions] = encoded[[fresh[keys[position]] for position in fresh_positions]]
+        if cached_positions:
+            rows = np.fromiter((self.rows[keys[position]] for position in cached_positions), dtype=np.int64, count=len(cached_positions))
+            embeddings[cached_positions] = self.vectors()[rows]
+        return embeddings
+
+    def encoder(self, encode_fn):
+        """Wraps an `encode_fn(texts)` so every call goes through the cache."""
+        return lambda texts: self.encode(texts, encode_fn)
+
+    def stats(self, live_keys=None):
+        stats = {
+            "entries": len(self.rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / (self.hits + self.misses), 4) if self.hits + self.misses else None,
+            "bytes": sum(os.path.getsize(self._path(name)) for name in (KEYS_FILE, VECTORS_FILE) if os.path.exists(self._path(name))),
+        }
+        if live_keys is not None:
+            stats["orphaned"] = len(self.rows) - len(set(live_keys) & self.rows.keys())
+        return stats
+
+    def gc(self, live_keys, min_orphan_fraction=EMBEDDING_CACHE_GC_FRACTION):
+        """Rewrites the cache without rows whose key is not in `live_keys` once they reach the given share; returns rows removed."""
+        live_keys = set(live_keys)
+        keep = [(key, row) for key, row in self.rows.items() if key in live_keys]
+        removed = len(self.rows) - len(keep)
+        if not removed or removed < min_orphan_fraction * len(self.rows):
+            return 0
+
+        keep.sort(key=lambda item: item[1])
+        rows = np.array([row for _, row in keep], dtype=np.int64)
+        vectors = self.vectors()
+        # Written next to the cache and swapped in whole, so keys and vectors never go out of step
+        tmp_directory = f"{self.directory.rstrip(os.sep)}.tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+        with open(os.path.join(tmp_directory, VECTORS_FILE), "wb") as file:
+            for start in range(0, len(rows), GC_CHUNK_ROWS):
+                file.write(np.ascontiguousarray(vectors[rows[start:start + GC_CHUNK_ROWS]]).tobytes())
+        with open(os.path.join(tmp_directory, KEYS_FILE), "wb") as file:
+            file.write(b"".join(key for key, _ in keep))
+        shutil.copy(self._path(MANIFEST_FILE), os.path.join(tmp_directory, MANIFEST_FILE))
+        self._vectors = vectors = None
+        shutil.rmtree(self.directory)
+        os.replace(tmp_directory, self.directory)
+        self.rows = {key: row for row, (key, _) in enumerate(keep)}
+        print(f"✅ Embedding cache gc: removed {removed} orphaned entries, {len(self.rows)} kept")
+        return removed
+
+    def clear(self):
+        self._vectors = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self.rows = {}
+        self.dimension = None
+
+
+def embedding_model_id(backend):
+    """Cache namespace of an embedder: the int8 model produces (slightly) different vectors."""
+    return MODEL_NAME if backend in (None, "torch", "onnx") else f"{MODEL_NAME}:{backend}"
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    from company_records import preprocess_data
+
+    parser = argparse.ArgumentParser(description="Inspect or garbage-collect the embedding cache.")
+    parser.add_argument("command", choices=["stats", "gc"])
+    parser.add_argument("--data", type=str, default="company_data_cleaned_final.json",
+                        help="Current company documents; cached texts not among them are orphaned")
+    parser.add_argument("--dir", type=str, default=EMBEDDING_CACHE_DIR)
+    parser.add_argument("--backend", type=str, default=os.environ.get("EMBEDDER_BACKEND", "torch"))
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.dir, embedding_model_id(args.backend))
+    live_keys = None
+    if os.path.exists(args.data):
+        with open(args.data, "r", encoding="utf-8") as file:
+            live_keys = [store.key(preprocess_data(document)) for document in json.load(file)]
+    if args.command == "gc":
+        if live_keys is None:
+            raise SystemExit(f"❌ {args.data} not found, cannot tell which entries are orphaned")
+        store.gc(live_keys, min_orphan_fraction=0)
+    print(json.dumps(store.stats(live_keys), indent=4))
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+from company_records import ES_MAPPING, company_id, document_hash
+
+
+# **Incremental, parallel Elasticsearch loading**
+#
+# Shared by "DataBase DataLoader.py", "Environment Setup/PyElasticDumper.py" and stream_ingest.py.
+# Documents are indexed under their company_id. es_<index>.state.json keeps a content hash per
+# indexed document, so a run only sends new or changed companies and deletes the ones that
+# disappeared. Bulk items that fail (e.g. 429s) are reported per chunk and retried with backoff.
+ES_HOST = "http://localhost:9200"
+ES_INDEX_NAME = "y_combinator_companies"
+BULK_CHUNK_SIZE = int(os.environ.get("ES_BULK_CHUNK_SIZE", 500))
+BULK_THREADS = int(os.environ.get("ES_BULK_THREADS", 4))
+BULK_MAX_RETRIES = 3
+
+
+def create_es_index(es, index_name, mapping=ES_MAPPING):
+    """Creates an Elasticsearch index with proper mapping if it does not already exist."""
+    if not es.indices.exists(index=index_name):
+        es.indices.create(index=index_name, body=mapping)
+        print(f"✅ Index '{index_name}' created successfully.")
+        return True
+    print(f"⚠️ Index '{index_name}' already exists.")
+    return False
+
+
+def prepare_es_index(es, index_name, mapping=ES_MAPPING):
+    """Creates the index if needed; returns True when it starts empty (new, or cleared for lack of a load state)."""
+    if create_es_index(es, index_name, mapping):
+        return True
+    if not os.path.exists(state_file(index_name)):
+        # Indexes loaded before company_id keys used positional ids; clear them so nothing is duplicated
+        print("⚠️ No load state for the existing index, clearing it before a full load...")
+        es.delete_by_query(index=index_name, body={"query": {"match_all": {}}}, refresh=True)
+        return True
+    return False
+
+
+# **Load state**
+def state_file(index_name):
+    return f"es_{index_name}.state.json"
+
+
+def load_state(index_name):
+    """{_id: content hash} of the documents already indexed by earlier runs."""
+    if not os.path.exists(state_file(index_name)):
+        return {}
+    with open(state_file(index_name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(index_name, state):
+    with open(state_file(index_name), "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+# **Bulk actions**
+def generate_actions(index_name, documents, state, hashes):
+    """Yields index actions for new/changed documents and delete actions for removed ones."""
+    for doc_id, doc in documents.items():
+        if state.get(doc_id) != hashes[doc_id]:
+            yield {"_op_type": "index", "_index": index_name, "_id": doc_id, "_source": doc}
+    for doc_id in state:
+        if doc_id not in documents:
+            yield {"_op_type": "delete", "_index": index_name, "_id": doc_id}
+
+
+def run_parallel_bulk(es, actions, chunk_size=BULK_CHUNK_SIZE, thread_count=BULK_THREADS):
+    """Streams actions through parallel_bulk; returns (succeeded ids, failed ids) with per-chunk failure reports."""
+    from elasticsearch import helpers
+    succeeded, failed = [], []
+    chunk_failures = {}
+    results = helpers.parallel_bulk(es, actions, chunk_size=chunk_size, thread_count=thread_count,
+                                    raise_on_error=False, raise_on_exception=False)
+    # Results come back in action order, so the position gives the chunk
+    for position, (ok, info) in enumerate(results):
+        op_type, result = next(iter(info.items()))
+        # Deleting a document that is already gone is fine
+        if ok or (op_type == "delete" and result.get("status") == 404):
+            succeeded.append(result.get("_id"))
+        else:
+            failed.append(result.get("_id"))
+            chunk_failures.setdefault(position // chunk_size, []).append(str(result.get("status")))
+    for chunk, statuses in sorted(chunk_failures.items()):
+        print(f"⚠️ Chunk {chunk}: {len(statuses)} failed (status {', '.join(sorted(set(statuses)))})")
+    return succeeded, failed
+
+
+def updated_state(state, hashes, succeeded):
+    """
+    The load state after a bulk run: sent documents take their new hash, deleted ones leave it.
+    Failed sends keep their old hash (so they are re-sent) and failed deletes stay (so they are retried).
+    """
+    state = dict(state)
+    for doc_id in succeeded:
+        if doc_id in hashes:
+            state[doc_id] = hashes[doc_id]
+        else:
+            state.pop(doc_id, None)
+    return state
+
+
+def index_documents_in_es(es, index_name, documents, chunk_size=BULK_CHUNK_SIZE, thread_count=BULK_THREADS,
+                          max_retries=BULK_MAX_RETRIES, full=False):
+    """
+    Indexes documents under their company_id, skipping ones whose content hash is unchanged
+    since the last run and deleting ones that disappeared. Failed items are retried with backoff.
+    """
+    start = time.time()
+    documents = {str(company_id(doc)): doc for doc in documents}
+    hashes = {doc_id: document_hash(doc) for doc_id, doc in documents.items()}
+    state = load_state(index_name)
+    if full:
+        # Re-send everything, but keep the old ids so removed companies still get deleted
+        state = {doc_id: None for doc_id in state}
+    skipped = sum(1 for doc_id in documents if state.get(doc_id) == hashes[doc_id])
+
+    sent, failed = 0, []
+    for attempt in range(max_retries + 1):
+        if attempt == 0:
+            actions = generate_actions(index_name, documents, state, hashes)
+        else:
+            delay = 2 ** (attempt - 1)
+            print(f"🔄 Retrying {len(failed)} failed documents in {delay}s (attempt {attempt}/{max_retries})")
+            time.sleep(delay)
+            actions = generate_actions(index_name, {key: documents[key] for key in failed if key in documents},
+                                       {key: state[key] for key in failed if key not in documents}, hashes)
+        succeeded, failed = run_parallel_bulk(es, actions, chunk_size, thread_count)
+        sent += len(succeeded)
+        state = updated_state(state, hashes, succeeded)
+        save_state(index_name, state)
+        if not failed:
+            break
+
+    elapsed = time.time() - start
+    print(f"✅ Indexed {sent} documents ({skipped} unchanged skipped) in {elapsed:.2f}s "
+          f"({sent / elapsed if elapsed else 0:.0f} docs/sec).")
+    if failed:
+        print(f"❌ {len(failed)} documents still failing after {max_retries} retries; they will be retried next run.")
+    return not failed
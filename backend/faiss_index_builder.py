@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import numpy as np
+from ann_index import build_ann_index, write_ann_index, read_ann_index, index_vectors, supports_remove_ids
+from metadata_store import build_metadata_store
+from company_records import preprocess_data, content_hash, with_company_ids
+
+
+# **Full and incremental FAISS index builds keyed by company_id**
+#
+# The index stores each company under its stable company_id. A state file next to the index
+# (<index>.state.json) keeps the content hash of every indexed company, so a refresh only
+# encodes added/changed companies and removes changed/removed ones. Churn since the last full
+# build is tracked; past FAISS_COMPACT_FRACTION of the index, or when the index type cannot
+# remove ids (HNSW), the index is compacted: rebuilt (and IVF retrained) from its stored
+# vectors plus the delta, without re-encoding unchanged companies. With an `embedding_cache`
+# (embedding_store.EmbeddingStore) every encode goes through it, so even a full build only encodes
+# texts never seen before.
+FAISS_COMPACT_FRACTION = float(os.environ.get("FAISS_COMPACT_FRACTION", 0.2))
+ID_COLUMN = "metadata.company_id"
+
+
+def state_path(index_path):
+    return f"{index_path}.state.json"
+
+
+def load_index_state(index_path):
+    if not os.path.exists(state_path(index_path)):
+        return None
+    with open(state_path(index_path), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_index_state(index_path, hashes, churn):
+    state = {"hashes": hashes, "churn": churn, "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    tmp_path = f"{state_path(index_path)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    os.replace(tmp_path, state_path(index_path))
+
+
+def diff_records(hashes, previous_hashes):
+    """Returns (added, changed, removed) company id lists between two {id: content hash} maps."""
+    added = [key for key in hashes if key not in previous_hashes]
+    changed = [key for key in hashes if key in previous_hashes and previous_hashes[key] != hashes[key]]
+    removed = [key for key in previous_hashes if key not in hashes]
+    return added, changed, removed
+
+
+def finish_embedding_cache(embedding_cache, documents):
+    """Drops cache entries no current company uses (past the gc threshold) and reports hit stats."""
+    if embedding_cache is None:
+        return
+    live_keys = [embedding_cache.key(preprocess_data(document)) for document in documents]
+    embedding_cache.gc(live_keys)
+    stats = embedding_cache.stats()
+    print(f"📌 Embedding cache: {stats['hits']} hits, {stats['misses']} encoded, {stats['entries']} entries")
+
+
+def build_faiss_index(data, encode_fn, index_path, metadata_dir, index_type="flat", model_name=None,
+                      embedding_cache=None, **index_params):
+    """Encodes every company and writes the index, its manifest and state, and the metadata store."""
+    if embedding_cache is not None:
+        encode_fn = embedding_cache.encoder(encode_fn)
+    documents = with_company_ids(data)
+    ids = np.array([document["metadata"]["company_id"] for document in documents], dtype=np.int64)
+    embeddings = encode_fn([preprocess_data(document) for document in documents])
+
+    index, params = build_ann_index(embeddings, ids, index_type, **index_params)
+    write_ann_index(index, index_path, index_type, params, model=model_name)
+    save_index_state(index_path, {str(key): content_hash(document) for key, document in zip(ids, documents)}, churn=0)
+    build_metadata_store(documents, metadata_dir, id_column=ID_COLUMN)
+    finish_embedding_cache(embedding_cache, documents)
+    print(f"✅ FAISS {index_type} index built with {len(documents)} companies")
+    return index
+
+
+def update_faiss_index(data, encode_fn, index_path, metadata_dir, index_type="flat", model_name=None,
+                       compact_fraction=FAISS_COMPACT_FRACTION, embedding_cache=None, **index_params):
+    """Applies only the added/changed/removed companies to the saved index; full build if there is none."""
+    state = load_index_state(index_path)
+    if state is None or not os.path.exists(index_path):
+        print("⚠️ No index state found, building the full index...")
+        return build_faiss_index(data, encode_fn, index_path, metadata_dir, index_type, model_name,
+                                 embedding_cache=embedding_cache, **index_params)
+    if embedding_cache is not None:
+        encode_fn = embedding_cache.encoder(encode_fn)
+
+    index, manifest = read_ann_index(index_path)
+    index_type = manifest["index_type"]  # switching types needs a full rebuild
+    params = manifest.get("params", {})
+    documents = with_company_ids(data)
+    hashes = {str(document["metadata"]["company_id"]): content_hash(document) for document in documents}
+    added, changed, removed = diff_records(hashes, state["hashes"])
+    print(f"📌 Delta: {len(added)} added, {len(changed)} changed, {len(removed)} removed, {len(hashes) - len(added) - len(changed)} unchanged")
+
+    # Only new and changed companies are encoded
+    delta = set(added) | set(changed)
+    delta_documents = [document for document in documents if str(document["metadata"]["company_id"]) in delta]
+    delta_ids = np.array([document["metadata"]["company_id"] for document in delta_documents], dtype=np.int64)
+    delta_embeddings = encode_fn([preprocess_data(document) for document in delta_documents]) if delta_documents else None
+    stale_ids = np.array([int(key) for key in changed + removed], dtype=np.int64)
+
+    churn = state.get("churn", 0) + len(added) + len(changed) + len(removed)
+    needs_compaction = churn > compact_fraction * max(index.ntotal, 1) or (len(stale_ids) and not supports_remove_ids(index))
+    if needs_compaction:
+        index, params = compact_index(index, index_type, params, stale_ids, delta_ids, delta_embeddings, documents, encode_fn)
+        churn = 0
+    else:
+        if len(stale_ids):
+            index.remove_ids(stale_ids)
+        if len(delta_ids):
+            index.add_with_ids(np.ascontiguousarray(delta_embeddings, dtype=np.float32), delta_ids)
+
+    write_ann_index(index, index_path, index_type, params, model=model_name)
+    save_index_state(index_path, hashes, churn)
+    build_metadata_store(documents, metadata_dir, id_column=ID_COLUMN)
+    finish_embedding_cache(embedding_cache, documents)
+    print(f"✅ FAISS {index_type} index updated: {index.ntotal} vectors{' (compacted)' if needs_compaction else ''}")
+    return index
+
+
+def compact_index(index, index_type, params, stale_ids, delta_ids, delta_embeddings, documents, encode_fn):
+    """
+    Rebuilds the index from kept vectors + the delta and returns (index, params). PQ codes are
+    lossy, so IVF-PQ re-encodes everything instead.
+    """
+    print(f"🔄 Compacting {index_type} index...")
+    if index_type == "ivf_pq":
+        ids = np.array([document["metadata"]["company_id"] for document in documents], dtype=np.int64)
+        vectors = encode_fn([preprocess_data(document) for document in documents])
+    else:
+        ids, vectors = index_vectors(index)
+        keep = ~np.isin(ids, stale_ids)
+        ids, vectors = ids[keep], vectors[keep]
+        if delta_embeddings is not None and len(delta_ids):
+            ids = np.concatenate([ids, delta_ids])
+            vectors = np.vstack([vectors, delta_embeddings])
+    # nlist is re-derived from the new corpus size, the query-time knobs are kept
+    overrides = {key: value for key, value in params.items() if key != "nlist"}
+    return build_ann_index(vectors, ids, index_type, **overrides)
@@ -0,0 +1,89 @@
+import re
+import math
+import numpy as np
+from collections import defaultdict
+
+
+# **Exact-match inverted index over company metadata**
+TOKEN_PATTERN = re.compile(r"\w+")
+DEFAULT_FIELDS = ("metadata.company_name", "metadata.tags", "metadata.founders_names", "metadata.location")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def normalize_phrase(text):
+    return " ".join(tokenize(text))
+
+
+class InvertedIndex:
+    """
+    Token -> row postings and whole-value phrase -> row postings, built once at load time
+    from the metadata store. `match` scores rows by the IDF-weighted share of query tokens
+    they contain, plus a bonus when the whole query equals a company name, tag, founder or
+    location. Cost is proportional to the postings touched, not to the corpus size.
+    """
+
+    def __init__(self, store, fields=DEFAULT_FIELDS):
+        token_rows = defaultdict(set)
+        phrase_rows = defaultdict(set)
+        for field in fields:
+            for row, value in enumerate(store.column_values(field)):
+                if value is None:
+                    continue
+                values = value if isinstance(value, list) else [value]
+                for item in values:
+                    phrase = normalize_phrase(item)
+                    if not phrase:
+                        continue
+                    phrase_rows[phrase].add(row)
+                    for token in phrase.split():
+                        token_rows[token].add(row)
+
+        self.count = len(store)
+        self.postings = {token: np.fromiter(sorted(rows), dtype=np.int64) for token, rows in token_rows.items()}
+        self.phrases = {phrase: np.fromiter(sorted(rows), dtype=np.int64) for phrase, rows in phrase_rows.items()}
+        self.idf = {token: math.log(1 + self.count / len(rows)) for token, rows in self.postings.items()}
+
+    def match(self, query, limit=None):
+        """Returns (rows, scores) with scores in [0, 1], best first, for rows matching the query."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # Unknown tokens still count toward the total, so partial matches score lower
+        total_idf = sum(self.idf.get(token, math.log(1 + self.count)) for token in tokens)
+        known = [token for token in tokens if token in self.postings]
+        phrase_hits = self.phrases.get(" ".join(tokens))
+        if not known and phrase_hits is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows_parts = [self.postings[token] for token in known]
+        weight_parts = [np.full(len(self.postings[token]), self.idf[token] / total_idf) for token in known]
+        if phrase_hits is not None:
+            rows_parts.append(phrase_hits)
+            weight_parts.append(np.ones(len(phrase_hits)))
+
+        rows, inverse = np.unique(np.concatenate(rows_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weight_parts)) / 2
+        order = np.argsort(-scores, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return rows[order], scores[order].astype(np.float32)
+
+
+# **Hybrid score: FAISS similarity + exact-match boost**
+def hybrid_rerank(distances, ids, lexical_ids, lexical_scores, top_k, vector_weight=0.7):
+    """
+    Merges FAISS hits with exact-match hits. Distances become similarities via 1 / (1 + d);
+    ids missing from one side score 0 there. Returns the top_k ids by
+    vector_weight * similarity + (1 - vector_weight) * lexical score.
+    """
+    scores = {}
+    for distance, idx in zip(distances, ids):
+        if idx != -1:
+            scores[int(idx)] = vector_weight / (1.0 + float(distance))
+    for idx, score in zip(lexical_ids, lexical_scores):
+        scores[int(idx)] = scores.get(int(idx), 0.0) + (1 - vector_weight) * float(score)
+    return sorted(scores, key=scores.get, reverse=True)[:top_k]
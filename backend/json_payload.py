@@ -0,0 +1,146 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # optional: without it clients get gzip
+    brotli = None
+
+
+# **Pre-serialized, pre-compressed JSON file payloads**
+#
+# The file is parsed once and kept as ready-to-send bytes: raw JSON plus gzip and (with the
+# `brotli` package) brotli encodings, all made when the file changes (size/mtime), not per
+# request. Responses carry a strong ETag so unchanged clients get a 304 with no body. Field
+# projections and pages of a list payload are serialized on first use and kept in a small LRU,
+# keyed by the file version, so repeat requests for the same view are served from memory too.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+MIN_COMPRESS_BYTES = 1024  # smaller bodies are sent as they are
+VIEW_CACHE_ENTRIES = int(os.environ.get("PAYLOAD_VIEW_CACHE_ENTRIES", 64))
+
+
+def dump_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class EncodedPayload:
+    """One JSON body with its ETag and compressed variants."""
+
+    def __init__(self, body, etag):
+        self.etag = etag
+        self.encodings = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.encodings["gzip"] = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            if brotli is not None:
+                self.encodings["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+
+    def negotiate(self, accept_encoding):
+        """(encoding, body) for an Accept-Encoding header: brotli, then gzip, else identity."""
+        qualities = accept_encoding_qualities(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if qualities.get(encoding, qualities.get("*", 0)) > 0 and encoding in self.encodings:
+                return encoding, self.encodings[encoding]
+        return "identity", self.encodings["identity"]
+
+
+def accept_encoding_qualities(accept_encoding):
+    """{coding: q} from an Accept-Encoding header; a missing or malformed q counts as 1, q=0 means refused."""
+    qualities = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value.strip())
+                except ValueError:
+                    pass
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class JSONFilePayload:
+    def __init__(self, path, view_cache_entries=VIEW_CACHE_ENTRIES):
+        self.path = path
+        self.view_cache_entries = view_cache_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = None
+        self._full = None
+        self._views = OrderedDict()
+        self.counters = {"loads": 0, "view_hits": 0, "view_misses": 0}
+
+    def _current(self):
+        """Reloads the file when its size or mtime changed; returns (data, full payload) or (None, None)."""
+        if not os.path.exists(self.path):
+            return None, None
+        stat = os.stat(self.path)
+        version = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if version != self._version:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    data = json.load(file)
+                body = dump_json(data)
+                etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+                self._data, self._full, self._version = data, EncodedPayload(body, etag), version
+                self._views.clear()
+                self.counters["loads"] += 1
+                print(f"✅ Loaded {self.path}: {len(body)} bytes, encodings {sorted(self._full.encodings)}")
+            return self._data, self._full
+
+    def get(self, fields=None, offset=0, limit=None):
+        """
+        The payload for a view: `fields` keeps only those keys of each record, `offset`/`limit`
+        select a page. Views only apply to a list of records. Returns (payload, total records)
+        or (None, None) when the file does not exist.
+        """
+        data, full = self._current()
+        if full is None:
+            return None, None
+        if not isinstance(data, list):
+            return full, None
+        fields = tuple(sorted(set(fields))) if fields else None
+        offset = max(0, offset or 0)
+        limit = max(0, limit) if limit is not None else None
+        if not fields and not offset and limit is None:
+            return full, len(data)
+
+        key = (full.etag, fields, offset, limit)
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                self.counters["view_hits"] += 1
+                return view, len(data)
+        self.counters["view_misses"] += 1
+        records = data[offset:offset + limit if limit is not None else None]
+        if fields:
+            records = [{field: record.get(field) for field in fields if field in record} if isinstance(record, dict) else record
+                       for record in records]
+        body = dump_json(records)
+        view = EncodedPayload(body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"')
+        with self._lock:
+            if key[0] == self._full.etag:
+                self._views[key] = view
+                while len(self._views) > self.view_cache_entries:
+                    self._views.popitem(last=False)
+        return view, len(data)
+
+    def stats(self):
+        return {**self.counters, "views_cached": len(self._views),
+                "bytes": {encoding: len(body) for encoding, body in self._full.encodings.items()} if self._full else None}
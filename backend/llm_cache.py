@@ -0,0 +1,429 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+
+
+# **Query normalization and data versioning**
+def normalize_query(query):
+    """Lowercases, strips punctuation and collapses whitespace so trivially different queries share a key."""
+    query = re.sub(r"[^\w\s]", " ", str(query).lower())
+    return " ".join(query.split())
+
+
+# Leading words that are capitalised only because they start the question
+QUESTION_WORDS = {"what", "which", "who", "whose", "how", "where", "when", "why", "list", "show", "find", "tell",
+                  "give", "name", "are", "is", "was", "do", "does", "did", "can", "could", "any", "i", "me", "the"}
+
+
+def query_signature(query):
+    """
+    The numbers and names in a query (tokens with a digit, capitalised words), lowercased and sorted.
+    Questions that differ only in "2018" vs "2019" or "W21" vs "S21" embed almost identically,
+    so a semantic hit also requires the same signature.
+    """
+    tokens = re.findall(r"\w+", str(query))
+    marks = {token.lower() for token in tokens if any(char.isdigit() for char in token)}
+    marks |= {token.lower() for position, token in enumerate(tokens)
+              if token[0].isupper() and not (position == 0 and token.lower() in QUESTION_WORDS)}
+    return " ".join(sorted(marks))
+
+
+def data_version(paths):
+    """Fingerprints the company data files by path, size and mtime; changes whenever any of them is rebuilt."""
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# **In-memory embedding matrix for one (namespace, context, version) scope**
+class _SemanticScope:
+    """
+    Normalized query embeddings of the cached answers in one scope, kept in a growable
+    float32 matrix so a semantic lookup is one matrix-vector product instead of reading every
+    embedding blob back from SQLite. `seen` is the newest created_at pulled from disk; rows
+    other workers write later are fetched incrementally.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.vectors = None
+        self.created = None
+        self.signatures = None
+        self.signature_ids = {}
+        self.answers = []
+        self.count = 0
+        self.seen = 0.0
+
+    def add(self, key, vector, answer, signature, created_at):
+        row = self.rows.get(key)
+        if row is None:
+            if self.vectors is None:
+                self.vectors = np.empty((64, len(vector)), dtype=np.float32)
+                self.created = np.empty(64, dtype=np.float64)
+                self.signatures = np.empty(64, dtype=np.int32)
+            elif self.count == len(self.vectors):
+                self.vectors = np.concatenate([self.vectors, np.empty_like(self.vectors)])
+                self.created = np.concatenate([self.created, np.empty_like(self.created)])
+                self.signatures = np.concatenate([self.signatures, np.empty_like(self.signatures)])
+            row = self.rows[key] = self.count
+            self.answers.append(answer)
+            self.count += 1
+        self.vectors[row] = vector
+        self.created[row] = created_at
+        self.signatures[row] = self.signature_ids.setdefault(signature, len(self.signature_ids))
+        self.answers[row] = answer
+
+    def best(self, query_embedding, signature, min_created):
+        """(answer, similarity) of the closest live entry with the same signature, or (None, None)."""
+        signature_id = self.signature_ids.get(signature)
+        if signature_id is None or not self.count:
+            return None, None
+        similarities = self.vectors[:self.count] @ query_embedding
+        eligible = (self.signatures[:self.count] == signature_id) & (self.created[:self.count] > min_created)
+        if not eligible.any():
+            return None, None
+        similarities = np.where(eligible, similarities, -np.inf)
+        best = int(np.argmax(similarities))
+        return self.answers[best], float(similarities[best])
+
+
+# **Two-tier LLM answer cache (exact + semantic)**
+class LLMCache:
+    """
+    Caches LLM answers keyed on (namespace, context, normalized query).
+
+    Tier 1 is an in-process LRU with TTL. Tier 2 is a SQLite file (WAL mode) shared by every
+    worker and surviving restarts. On an exact miss, the semantic tier compares the query
+    embedding against cached queries for the same namespace/context and reuses the answer
+    when cosine similarity is above `semantic_threshold` and both queries mention the same
+    numbers and names (see `query_signature`). Entries are tagged with the data
+    version and anything from an older version is dropped when the version changes.
+    """
+
+    def __init__(self, db_path, embed_fn=None, version_fn=None, max_memory_entries=1024,
+                 max_disk_entries=100000, ttl_seconds=86400, semantic_threshold=0.92,
+                 version_check_interval=5.0):
+        self.db_path = db_path
+        self.embed_fn = embed_fn
+        self.version_fn = version_fn
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self.version_check_interval = version_check_interval
+
+        self._memory = OrderedDict()
+        self._semantic = {}
+        self._lock = threading.Lock()
+        self._puts_since_prune = 0
+        self._last_version_check = 0.0
+        self.version = version_fn() if version_fn else ""
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "semantic_hits": 0, "misses": 0, "puts": 0, "invalidations": 0}
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                context TEXT NOT NULL,
+                query TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                embedding BLOB,
+                signature TEXT,
+                version TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(answers)")}
+        if "signature" not in columns:
+            # Older cache files: their rows have no signature and are never semantic hits
+            self._conn.execute("ALTER TABLE answers ADD COLUMN signature TEXT")
+        self._conn.execute("DROP INDEX IF EXISTS answers_scope")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_scope_created ON answers (namespace, context, version, created_at)")
+        # When each data version was first seen by any worker, so versions can be ordered
+        self._conn.execute("CREATE TABLE IF NOT EXISTS versions (version TEXT PRIMARY KEY, first_seen REAL NOT NULL)")
+        self._conn.commit()
+        self._drop_stale_versions()
+
+    def make_key(self, namespace, context, query):
+        raw = f"{self.version}|{namespace}|{context}|{normalize_query(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # **Lookup: memory -> disk -> semantic**
+    def get(self, namespace, context, query):
+        self._check_version()
+        key = self.make_key(namespace, context, query)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                answer, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.metrics["memory_hits"] += 1
+                    return answer
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT answer, created_at FROM answers WHERE key = ? AND version = ?", (key, self.version)
+            ).fetchone()
+        if row is not None and row[1] + self.ttl_seconds > now:
+            self._remember(key, row[0], row[1])
+            self.metrics["disk_hits"] += 1
+            return row[0]
+
+        answer = self._semantic_lookup(namespace, context, query, now)
+        if answer is not None:
+            self._remember(key, answer, now)
+            self.metrics["semantic_hits"] += 1
+            return answer
+
+        self.metrics["misses"] += 1
+        return None
+
+    def _semantic_lookup(self, namespace, context, query, now):
+        if self.embed_fn is None or self.semantic_threshold is None:
+            return None
+        with self._lock:
+            scope = self._semantic_scope(namespace, context, now)
+            if not scope.count:
+                return None
+        query_embedding = self._embed(query)
+        with self._lock:
+            answer, similarity = scope.best(query_embedding, query_signature(query), now - self.ttl_seconds)
+        if answer is not None and similarity >= self.semantic_threshold:
+            return answer
+        return None
+
+    def _semantic_scope(self, namespace, context, now):
+        """The scope's in-memory matrix, topped up with rows written since the last lookup. Caller holds the lock."""
+        scope = self._semantic.setdefault((namespace, context, self.version), _SemanticScope())
+        rows = self._conn.execute(
+            "SELECT key, answer, embedding, signature, created_at FROM answers "
+            "WHERE namespace = ? AND context = ? AND version = ? AND created_at > ? "
+            "AND embedding IS NOT NULL AND signature IS NOT NULL",
+            (namespace, context, self.version, max(scope.seen, now - self.ttl_seconds)),
+        ).fetchall()
+        for key, answer, embedding, signature, created_at in rows:
+            scope.add(key, np.frombuffer(embedding, dtype=np.float32), answer, signature, created_at)
+            scope.seen = max(scope.seen, created_at)
+        return scope
+
+    def _embed(self, query):
+        embedding = np.asarray(self.embed_fn(normalize_query(query)), dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def _remember(self, key, answer, created_at):
+        with self._lock:
+            self._memory[key] = (answer, created_at + self.ttl_seconds)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    # **Insert into both tiers**
+    def put(self, namespace, context, query, answer):
+        if not isinstance(answer, str):
+            return
+        self._check_version()
+        key = self.make_key(namespace, context, query)
+        now = time.time()
+        embedding = self._embed(query) if self.embed_fn is not None else None
+        signature = query_signature(query)
+
+        self._remember(key, answer, now)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, namespace, context, query, answer, embedding, signature, version, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, namespace, context, normalize_query(query), answer,
+                 embedding.tobytes() if embedding is not None else None, signature, self.version, now),
+            )
+            self._conn.commit()
+            scope = self._semantic.get((namespace, context, self.version))
+            if scope is not None and embedding is not None:
+                scope.add(key, embedding, answer, signature, now)
+            self.metrics["puts"] += 1
+            self._puts_since_prune += 1
+            if self._puts_since_prune >= 100:
+                self._prune(now)
+
+    def _prune(self, now):
+        self._puts_since_prune = 0
+        self._conn.execute("DELETE FROM answers WHERE created_at <= ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        self._conn.commit()
+        self._semantic.clear()  # reloaded from the trimmed table on the next lookup
+
+    # **Invalidation on data version change**
+    def _check_version(self):
+        if self.version_fn is None:
+            return
+        now = time.time()
+        if now - self._last_version_check < self.version_check_interval:
+            return
+        self._last_version_check = now
+        version = self.version_fn()
+        if version != self.version:
+            print(f"⚠️ Company data changed ({self.version} -> {version}), invalidating LLM answer cache.")
+            self.set_version(version)
+
+    def set_version(self, version):
+        with self._lock:
+            self.version = version
+            self._memory.clear()
+            self._semantic.clear()
+            self.metrics["invalidations"] += 1
+        self._drop_stale_versions()
+
+    def _drop_stale_versions(self):
+        """
+        Deletes answers of versions first seen before this one (and of versions never recorded).
+        Workers notice a new version at different times; one still on an older version must not
+        delete what workers already on the newer one have written.
+        """
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO versions (version, first_seen) VALUES (?, ?)", (self.version, time.time()))
+            first_seen = self._conn.execute("SELECT first_seen FROM versions WHERE version = ?", (self.version,)).fetchone()[0]
+            # Version rows are kept (one per data rebuild), so an old version never looks new again
+            self._conn.execute(
+                "DELETE FROM answers WHERE version NOT IN (SELECT version FROM versions WHERE first_seen >= ?)", (first_seen,)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        lookups = self.metrics["memory_hits"] + self.metrics["disk_hits"] + self.metrics["semantic_hits"] + self.metrics["misses"]
+        hits = lookups - self.metrics["misses"]
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            memory_entries = len(self._memory)
+            semantic_entries = sum(scope.count for scope in self._semantic.values())
+        return {
+            **self.metrics,
+            "lookups": lookups,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "disk_entries": disk_entries,
+            "semantic_entries": semantic_entries,
+            "data_version": self.version,
+        }
+
+
+# **Query translation cache for the GeneralSearch LLM hop**
+class QueryTranslationCache:
+    """
+    Remembers the parsed result of translating a General question into a search query
+    (e.g. {"field": "tags", "value": "fintech"}) per normalized query, so repeated and popular
+    questions skip the translation LLM call. Hot entries stay in an in-process LRU; everything
+    is persisted in SQLite, which is trimmed to `max_entries` least recently used rows.
+
+    Keys are prefixed with the prompt version from `version_fn` (resolved on first use), so a
+    changed translation prompt or response format never reuses translations made by the old one;
+    rows of other versions are deleted then.
+    """
+
+    def __init__(self, db_path, max_entries=50000, max_memory_entries=2048, version_fn=None):
+        self.version_fn = version_fn
+        self.version = None
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_prune = 0
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "puts": 0}
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                query TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self._conn.commit()
+
+    def _key(self, query):
+        if self.version is None:
+            version = self.version_fn() if self.version_fn else ""
+            with self._lock:
+                self._conn.execute("DELETE FROM translations WHERE substr(query, 1, ?) != ?", (len(version) + 1, f"{version}|"))
+                self._conn.commit()
+                self._memory.clear()
+            self.version = version
+        return f"{self.version}|{normalize_query(query)}"
+
+    def get(self, query):
+        key = self._key(query)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.metrics["memory_hits"] += 1
+                return self._memory[key]
+
+            row = self._conn.execute("SELECT translation FROM translations WHERE query = ?", (key,)).fetchone()
+            if row is None:
+                self.metrics["misses"] += 1
+                return None
+            self._conn.execute("UPDATE translations SET last_used = ? WHERE query = ?", (time.time(), key))
+            self._conn.commit()
+            translation = json.loads(row[0])
+            self._remember(key, translation)
+            self.metrics["disk_hits"] += 1
+            return translation
+
+    def put(self, query, translation):
+        key = self._key(query)
+        with self._lock:
+            self._remember(key, translation)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (query, translation, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(translation, ensure_ascii=False), time.time()),
+            )
+            self.metrics["puts"] += 1
+            self._puts_since_prune += 1
+            if self._puts_since_prune >= 100:
+                self._puts_since_prune = 0
+                self._conn.execute(
+                    "DELETE FROM translations WHERE query IN "
+                    "(SELECT query FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def _remember(self, key, translation):
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        lookups = self.metrics["memory_hits"] + self.metrics["disk_hits"] + self.metrics["misses"]
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            memory_entries = len(self._memory)
+        return {
+            **self.metrics,
+            "lookups": lookups,
+            "hit_ratio": round((lookups - self.metrics["misses"]) / lookups, 4) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "prompt_version": self.version,
+            "disk_entries": disk_entries,
+        }
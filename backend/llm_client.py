@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+import httpx
+import numpy as np
+
+
+# **LLM client: pooled OpenAI-compatible chat completions with deadlines, retries and hedging**
+#
+# Talks to any OpenAI-compatible /chat/completions endpoint (Groq by default, or the local stub
+# in llm_stub_server.py) over one pooled keep-alive httpx client. Every call has a deadline
+# covering all of its attempts. Connection errors, timeouts, 429s and 5xx responses are retried
+# with full-jitter exponential backoff (honouring Retry-After) while the deadline allows. With
+# hedging on, a call still running after the recent p95 latency gets one duplicate request and
+# the first answer wins, which cuts the tail caused by a single slow upstream request.
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 30.0))  # seconds per call, all attempts included
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", 5.0))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 2))
+LLM_HEDGE = os.environ.get("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", 95))
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 4.0
+HEDGE_MIN_SAMPLES = 20  # latencies needed before the percentile is trusted
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """The call failed for good: non-retryable response, retries exhausted or deadline passed."""
+
+
+class LLMTimeout(LLMError):
+    pass
+
+
+class _RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LatencyTracker:
+    """Latencies of recent successful calls, for the hedging threshold and stats."""
+
+    def __init__(self, window=500):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, q, min_samples=1):
+        with self._lock:
+            if len(self._latencies) < min_samples:
+                return None
+            values = np.array(self._latencies)
+        return float(np.percentile(values, q))
+
+
+class LLMClient:
+    def __init__(self, api_key=None, base_url=LLM_BASE_URL, max_connections=100, timeout=LLM_TIMEOUT,
+                 connect_timeout=LLM_CONNECT_TIMEOUT, max_retries=LLM_MAX_RETRIES, hedge=LLM_HEDGE,
+                 hedge_percentile=LLM_HEDGE_PERCENTILE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.http = httpx.AsyncClient(
+            headers=headers,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        )
+        self.latency = LatencyTracker()
+        self.first_token_latency = LatencyTracker()
+        self.counters = {"calls": 0, "retries": 0, "timeouts": 0, "errors": 0, "hedges": 0, "hedges_won": 0}
+
+    async def close(self):
+        await self.http.aclose()
+
+    # **One HTTP attempt**
+    def _attempt_timeout(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeout("LLM deadline exceeded")
+        return httpx.Timeout(remaining, connect=min(self.connect_timeout, remaining))
+
+    @staticmethod
+    def _check_response(response):
+        if response.status_code in RETRYABLE_STATUS:
+            retry_after = response.headers.get("retry-after")
+            try:
+                retry_after = float(retry_after) if retry_after is not None else None
+            except ValueError:
+                retry_after = None
+            raise _RetryableError(f"HTTP {response.status_code}", retry_after)
+        if response.status_code >= 400:
+            raise LLMError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    async def _post(self, payload, deadline):
+        try:
+            response = await self.http.post(f"{self.base_url}/chat/completions", json=payload,
+                                            timeout=self._attempt_timeout(deadline))
+        except httpx.TimeoutException as e:
+            raise _RetryableError(f"timeout: {e!r}")
+        except httpx.TransportError as e:
+            raise _RetryableError(f"connection error: {e!r}")
+        self._check_response(response)
+        return response.json()
+
+    async def _backoff(self, attempt, error, deadline):
+        delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+        if error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        if time.monotonic() + delay >= deadline:
+            raise LLMTimeout(f"LLM deadline exceeded while retrying ({error})")
+        self.counters["retries"] += 1
+        await asyncio.sleep(delay)
+
+    async def _post_with_retries(self, payload, deadline):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._post(payload, deadline)
+            except _RetryableError as error:
+                if attempt == self.max_retries:
+                    raise LLMError(f"LLM call failed after {attempt + 1} attempts: {error}")
+                await self._backoff(attempt, error, deadline)
+
+    # **Hedged call**
+    async def _hedged(self, payload, deadline):
+        hedge_after = self.latency.percentile(self.hedge_percentile, HEDGE_MIN_SAMPLES) if self.hedge else None
+        primary = asyncio.ensure_future(self._post_with_retries(payload, deadline))
+        if hedge_after is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=max(0.0, min(hedge_after, deadline - time.monotonic())))
+        if done:
+            return primary.result()
+        self.counters["hedges"] += 1
+        hedge = asyncio.ensure_future(self._post_with_retries(payload, deadline))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.counters["hedges_won"] += 1
+                        return task.result()
+            # Both failed: surface the primary's error
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+    async def chat(self, messages, model, deadline=None, **params):
+        """Full chat completion response (dict) within `deadline` seconds (default: the client timeout)."""
+        self.counters["calls"] += 1
+        start = time.monotonic()
+        deadline_at = start + (deadline or self.timeout)
+        payload = {"model": model, "messages": messages, **params}
+        try:
+            response = await asyncio.wait_for(self._hedged(payload, deadline_at), timeout=max(0.0, deadline_at - start))
+        except (asyncio.TimeoutError, LLMTimeout) as e:
+            self.counters["timeouts"] += 1
+            raise LLMTimeout(f"LLM call exceeded its {deadline or self.timeout:g}s deadline") from e
+        except LLMError:
+            self.counters["errors"] += 1
+            raise
+        self.latency.add(time.monotonic() - start)
+        return response
+
+    async def complete(self, messages, model, deadline=None, **params):
+        """Content of the first choice."""
+        response = await self.chat(messages, model, deadline, **params)
+        return response["choices"][0]["message"]["content"]
+
+    # **Streaming**
+    async def stream(self, messages, model, deadline=None, **params):
+        """
+        Yields content tokens as they arrive. Attempts are retried only until the first token,
+        after that a failure ends the stream with LLMError. Streams are not hedged.
+        """
+        self.counters["calls"] += 1
+        start = time.monotonic()
+        deadline_at = start + (deadline or self.timeout)
+        payload = {"model": model, "messages": messages, "stream": True, **params}
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self.http.stream("POST", f"{self.base_url}/chat/completions", json=payload,
+                                            timeout=self._attempt_timeout(deadline_at)) as response:
+                    if response.status_code >= 400:
+                        await response.aread()
+                    self._check_response(response)
+                    async for line in response.aiter_lines():
+                        if time.monotonic() > deadline_at:
+                            raise LLMTimeout("LLM stream exceeded its deadline")
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        chunk = json.loads(data)
+                        choices = chunk.get("choices") or []
+                        token = (choices[0].get("delta") or {}).get("content") if choices else None
+                        if token:
+                            if not started:
+                                self.first_token_latency.add(time.monotonic() - start)
+                            started = True
+                            yield token
+                return
+            except (httpx.TimeoutException, httpx.TransportError, _RetryableError) as error:
+                if started:
+                    self.counters["errors"] += 1
+                    raise LLMError(f"LLM stream interrupted: {error!r}")
+                if attempt == self.max_retries:
+                    self.counters["errors"] += 1
+                    raise LLMError(f"LLM stream failed after {attempt + 1} attempts: {error!r}")
+                if not isinstance(error, _RetryableError):
+                    error = _RetryableError(repr(error))
+                await self._backoff(attempt, error, deadline_at)
+            except LLMTimeout:
+                self.counters["timeouts"] += 1
+                raise
+
+    def stats(self):
+        return {
+            **self.counters,
+            "p50_s": self.latency.percentile(50),
+            "p95_s": self.latency.percentile(95),
+            "stream_first_token_p50_s": self.first_token_latency.percentile(50),
+            "hedge_after_s": self.latency.percentile(self.hedge_percentile, HEDGE_MIN_SAMPLES) if self.hedge else None,
+        }
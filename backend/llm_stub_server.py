@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+# **Local OpenAI-compatible LLM stand-in**
+#
+# Serves POST /v1/chat/completions (plain and "stream": true) with a canned answer after a
+# configurable delay, so throughput and tail latency of the API and of llm_client.py can be
+# measured offline. Latency is lognormal around --latency-ms; with --tail-prob a share of the
+# calls takes --tail-ms extra (the slow upstream request hedging is meant to hide), and
+# --error-rate answers a share of the calls with 503. Point the API at it with
+#   LLM_BASE_URL=http://127.0.0.1:8100/v1
+STUB_PORT = int(os.environ.get("LLM_STUB_PORT", 8100))
+STUB_ANSWER = ("Based on the provided context, the most relevant companies are listed above. "
+               "Each of them matches the question on industry, batch and location.")
+
+config = {"latency_ms": 300.0, "jitter": 0.3, "tail_prob": 0.0, "tail_ms": 2000.0, "error_rate": 0.0, "tokens_per_s": 0.0}
+counters = {"requests": 0, "errors": 0, "in_flight": 0}
+app = FastAPI()
+
+
+def sample_latency():
+    """Seconds before the answer (before the first token when streaming)."""
+    seconds = config["latency_ms"] / 1000 * random.lognormvariate(0, config["jitter"]) if config["jitter"] else config["latency_ms"] / 1000
+    if random.random() < config["tail_prob"]:
+        seconds += config["tail_ms"] / 1000
+    return seconds
+
+
+def approx_tokens(text):
+    return (len(text) + 3) // 4
+
+
+def usage(messages, answer):
+    prompt = sum(approx_tokens(message.get("content", "")) for message in messages)
+    return {"prompt_tokens": prompt, "completion_tokens": approx_tokens(answer), "total_tokens": prompt + approx_tokens(answer)}
+
+
+async def stream_chunks(completion_id, model, answer):
+    words = answer.split(" ")
+    for position, word in enumerate(words):
+        if position and config["tokens_per_s"]:
+            await asyncio.sleep(1 / config["tokens_per_s"])
+        chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                 "choices": [{"index": 0, "delta": {"content": word if position == 0 else f" {word}"}, "finish_reason": None}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+    final = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+             "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    counters["requests"] += 1
+    counters["in_flight"] += 1
+    try:
+        await asyncio.sleep(sample_latency())
+        if random.random() < config["error_rate"]:
+            counters["errors"] += 1
+            return JSONResponse({"error": {"message": "stub overloaded", "type": "server_error"}}, status_code=503)
+    finally:
+        counters["in_flight"] -= 1
+
+    model = body.get("model", "stub")
+    completion_id = f"chatcmpl-stub-{counters['requests']}"
+    if body.get("stream"):
+        return StreamingResponse(stream_chunks(completion_id, model, STUB_ANSWER), media_type="text/event-stream")
+    if config["tokens_per_s"]:
+        await asyncio.sleep(len(STUB_ANSWER.split(" ")) / config["tokens_per_s"])
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": STUB_ANSWER}, "finish_reason": "stop"}],
+        "usage": usage(body.get("messages") or [], STUB_ANSWER),
+    }
+
+
+@app.get("/stats")
+def stats():
+    return {**counters, "config": config}
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions stub with configurable latency.")
+    parser.add_argument("--port", type=int, default=STUB_PORT)
+    parser.add_argument("--latency-ms", type=float, default=config["latency_ms"], help="Median latency before the answer")
+    parser.add_argument("--jitter", type=float, default=config["jitter"], help="Sigma of the lognormal latency (0 = fixed)")
+    parser.add_argument("--tail-prob", type=float, default=config["tail_prob"], help="Share of calls that get --tail-ms extra")
+    parser.add_argument("--tail-ms", type=float, default=config["tail_ms"])
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"], help="Share of calls answered with 503")
+    parser.add_argument("--tokens-per-s", type=float, default=config["tokens_per_s"],
+                        help="Generation speed after the first token (0 = instant)")
+    args = parser.parse_args()
+
+    config.update(latency_ms=args.latency_ms, jitter=args.jitter, tail_prob=args.tail_prob, tail_ms=args.tail_ms,
+                  error_rate=args.error_rate, tokens_per_s=args.tokens_per_s)
+    print(f"📌 LLM stub on http://127.0.0.1:{args.port}/v1 with {json.dumps(config)}")
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -1,17 +1,29 @@
 import time
 import os
 import json
-import faiss
-import torch
+import hashlib
+import asyncio
 import numpy as np
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from transformers import AutoTokenizer, AutoModel
-from sentence_transformers import SentenceTransformer
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import List, Optional
 from dotenv import load_dotenv
-from elasticsearch import Elasticsearch
-from groq import Groq
+from components import ComponentRegistry
+from llm_cache import LLMCache, QueryTranslationCache, data_version, normalize_query
+from singleflight import SingleFlight
+from json_payload import JSONFilePayload, etag_matches
+from company_records import company_id
+from company_directory import COMPANIES_FILE, FACET_LIMIT, SORTS, load_company_directory
+from query_encoder import QueryEncoder
+from metadata_store import MetadataStore, build_metadata_store
+from inverted_index import InvertedIndex, hybrid_rerank
+from metadata_filters import MetadataFilterIndex, document_matches, filtered_search, normalize_filters
+from context_packer import CONTEXT_TOKEN_BUDGET, PromptStats, pack_documents, prompt_tokens
 import json
 import re
 
@@ -23,27 +35,144 @@ load_dotenv()
 # Set environment variable to avoid duplicate library errors
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
-groq_model = "llama-3.3-70b-versatile"
+groq_model = os.environ.get("LLM_MODEL", "llama-3.3-70b-versatile")
 
 # **Load FAISS Index and Metadata**
 DATA_FILE = "data/company_data_cleaned_final.json"
 FAISS_INDEX_FILE = "faiss_index.bin"
-FAISS_DATA_FILE = "faiss_data.json"
+FAISS_DATA_FILE = "faiss_data.json"  # legacy JSON store, converted once to FAISS_METADATA_DIR
+FAISS_METADATA_DIR = "faiss_metadata"
+FAISS_MMAP = os.environ.get("FAISS_MMAP", "1") == "1"
 
-# **Load BERT model and tokenizer**
-model_name = "bert-base-uncased"
+# **Optional query-time overrides for HNSW / IVF indexes (otherwise taken from the index manifest)**
+FAISS_EF_SEARCH = os.environ.get("FAISS_EF_SEARCH")
+FAISS_NPROBE = os.environ.get("FAISS_NPROBE")
 
-#chatbot clint
-client_llm = Groq(
-    api_key=os.environ.get("GROQ_API_KEY"),
-)
+# **Embedding backend: torch (sentence-transformers), onnx or onnx_int8 (no torch needed)**
+EMBEDDER_BACKEND = os.environ.get("EMBEDDER_BACKEND", "torch")
+
+# **Connection pool sizes (shared, keep-alive connections reused across requests)**
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 100))
+ES_MAX_CONNECTIONS = int(os.environ.get("ES_MAX_CONNECTIONS", 25))
+
+# **Phase 1 keyword search backend: "es" (Elasticsearch cluster) or "bm25" (embedded, no ES needed)**
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "es")
+BM25_INDEX_DIR = os.environ.get("BM25_INDEX_DIR", "bm25_index")
+
+# **Phase 2 retrieval granularity: "off" (one vector per company) or passage-level with hits
+# aggregated per company by their best ("max") or summed ("sum") passage similarity**
+PASSAGE_MODE = os.environ.get("PASSAGE_MODE", "off")
+PASSAGE_CANDIDATES = int(os.environ.get("PASSAGE_CANDIDATES", 8))  # passages fetched per requested company
 
-model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+# **Component loading: "background" (default) starts serving immediately and loads everything
+# in a background thread, "lazy" loads each component on first use, "eager" loads before serving**
+COMPONENT_LOADING = os.environ.get("COMPONENT_LOADING", "background")
+
+# Heavy libraries (torch or onnxruntime, faiss, elasticsearch) are imported inside the loaders
+# (and inside the search helpers of metadata_filters) so importing this module stays cheap.
+def load_llm_client():
+    from llm_client import LLMClient
+    #chatbot clint: Groq by default, any OpenAI-compatible endpoint via LLM_BASE_URL
+    return LLMClient(api_key=os.environ.get("GROQ_API_KEY"), max_connections=LLM_MAX_CONNECTIONS)
+
+def load_embedding_model():
+    from embedders import load_embedder
+    return load_embedder(EMBEDDER_BACKEND)
 
 # **Initialize Elasticsearch Client**
-es = Elasticsearch(hosts=["http://localhost:9200"])
+def load_es_client():
+    from elasticsearch import AsyncElasticsearch
+    return AsyncElasticsearch(hosts=["http://localhost:9200"], maxsize=ES_MAX_CONNECTIONS)
+
+def load_bm25_index():
+    from bm25 import load_or_build_bm25
+    return load_or_build_bm25(DATA_FILE, BM25_INDEX_DIR)
 
-app = FastAPI()
+def load_data(file_path):
+    with open(file_path, "r") as file:
+        return json.load(file)
+
+# ✅ Load FAISS Index and Data
+def load_faiss_index():
+    import faiss
+    from ann_index import read_ann_index
+
+    if not os.path.exists(FAISS_METADATA_DIR) and os.path.exists(FAISS_DATA_FILE):
+        print("🔄 Converting legacy faiss_data.json to the columnar metadata store...")
+        legacy_store = load_data(FAISS_DATA_FILE)
+        build_metadata_store((legacy_store[key] for key in sorted(legacy_store, key=int)), FAISS_METADATA_DIR)
+
+    if not os.path.exists(FAISS_INDEX_FILE) or not os.path.exists(FAISS_METADATA_DIR):
+        print("⚠️ FAISS index or data not found. Rebuilding index...")
+        data = load_data(DATA_FILE)
+        # build_faiss_index(data)
+    
+    # Memory-map the index so startup does not read it all and workers share the page cache
+    try:
+        io_flags = faiss.IO_FLAG_MMAP if FAISS_MMAP else 0
+        index, index_manifest = read_ann_index(FAISS_INDEX_FILE, io_flags, ef_search=FAISS_EF_SEARCH, nprobe=FAISS_NPROBE)
+    except RuntimeError as e:
+        print(f"⚠️ Could not mmap FAISS index ({e}), reading it into memory instead.")
+        index, index_manifest = read_ann_index(FAISS_INDEX_FILE, ef_search=FAISS_EF_SEARCH, nprobe=FAISS_NPROBE)
+    faiss_data_store = MetadataStore(FAISS_METADATA_DIR)
+
+    print(f"✅ FAISS {index_manifest['index_type']} index and data loaded successfully!")
+    return index, faiss_data_store
+
+def load_passage_index():
+    from ann_index import read_ann_index
+    from passages import PASSAGE_INDEX_FILE, PASSAGE_METADATA_DIR, PassageIndex
+
+    index, index_manifest = read_ann_index(PASSAGE_INDEX_FILE, ef_search=FAISS_EF_SEARCH, nprobe=FAISS_NPROBE)
+    passage_index = PassageIndex(index, MetadataStore(PASSAGE_METADATA_DIR), components.get("faiss")[1])
+    print(f"✅ FAISS {index_manifest['index_type']} passage index loaded ({index.ntotal} passages, {PASSAGE_MODE} aggregation)")
+    return passage_index
+
+components = ComponentRegistry()
+components.register("embedding_model", load_embedding_model)
+components.register("faiss", load_faiss_index)
+components.register("inverted_index", lambda: InvertedIndex(components.get("faiss")[1]))
+components.register("metadata_filters", lambda: MetadataFilterIndex(components.get("faiss")[1]))
+components.register("llm_client", load_llm_client)
+components.register("company_directory", lambda: load_company_directory(COMPANIES_FILE))
+if PASSAGE_MODE != "off":
+    components.register("passages", load_passage_index)
+if SEARCH_BACKEND == "bm25":
+    components.register("bm25", load_bm25_index)
+else:
+    components.register("elasticsearch", load_es_client)
+# Readiness waits only for what every /chat request needs; passages, the company directory and
+# the secondary indexes are optional and report their own state in /readyz
+REQUIRED_COMPONENTS = ["embedding_model", "faiss", "bm25" if SEARCH_BACKEND == "bm25" else "elasticsearch", "llm_client"]
+
+# **Query embeddings: LRU cache + cross-request micro-batching**
+EMBED_CACHE_SIZE = int(os.environ.get("EMBED_CACHE_SIZE", 4096))
+EMBED_MAX_BATCH = int(os.environ.get("EMBED_MAX_BATCH", 32))
+EMBED_MAX_WAIT_MS = float(os.environ.get("EMBED_MAX_WAIT_MS", 2.0))
+
+query_encoder = QueryEncoder(
+    lambda texts: components.get("embedding_model").encode(texts, batch_size=EMBED_MAX_BATCH),
+    cache_size=EMBED_CACHE_SIZE,
+    max_batch_size=EMBED_MAX_BATCH,
+    max_wait_ms=EMBED_MAX_WAIT_MS,
+)
+
+# **Start component loading with the server, close pooled clients on shutdown**
+@asynccontextmanager
+async def lifespan(app):
+    if COMPONENT_LOADING == "eager":
+        await run_in_threadpool(components.load_all)
+    elif COMPONENT_LOADING == "background":
+        components.start_background()
+    yield
+    es = components.peek("elasticsearch")
+    if es is not None:
+        await es.close()
+    client_llm = components.peek("llm_client")
+    if client_llm is not None:
+        await client_llm.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -52,79 +181,114 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count"],
 )
 
 # ✅ Hybrid Search: FAISS + Exact Match Boosting
-def search_faiss(query, index, faiss_data_store, top_k=5):
+HYBRID_VECTOR_WEIGHT = float(os.environ.get("HYBRID_VECTOR_WEIGHT", 0.7))
+HYBRID_CANDIDATES = int(os.environ.get("HYBRID_CANDIDATES", 4))  # FAISS candidates fetched per requested result
+
+def search_faiss(query, index, faiss_data_store, top_k=5, filters=None):
+    return search_faiss_batch([query], index, faiss_data_store, top_k, [filters])[0]
+
+def search_faiss_batch(queries, index, faiss_data_store, top_k=5, filters=None):
+    """
+    Searches many queries at once: one batched encode and one matrix `index.search` per
+    distinct filter. `filters` is None, one dict for every query, or a list with one per query.
+    """
     if index is None or faiss_data_store is None:
         print("⚠️ FAISS index is not loaded.")
-        return []
-
-    query = query.lower()  # Normalize query
-    query_embedding = model.encode([query], convert_to_numpy=True)
-    distances, indices = index.search(query_embedding, top_k)
+        return [[] for _ in queries]
+
+    queries = [query.lower() for query in queries]  # Normalize queries
+    query_embeddings = query_encoder.encode(queries)
+    depth = top_k * HYBRID_CANDIDATES
+
+    # ✅ Structured filters restrict the search to eligible ids; queries sharing a filter share a search
+    per_query_filters = filters if isinstance(filters, list) else [filters] * len(queries)
+    groups = {}
+    for i, query_filters in enumerate(per_query_filters):
+        groups.setdefault(json.dumps(normalize_filters(query_filters), sort_keys=True), []).append(i)
+
+    bitmaps = [None] * len(queries)
+    distances = np.empty((len(queries), depth), dtype=np.float32)
+    indices = np.empty((len(queries), depth), dtype=np.int64)
+    row_ids = faiss_data_store.ids if faiss_data_store.id_column else None
+    for key, rows in groups.items():
+        bitmap = components.get("metadata_filters").bitmap(json.loads(key)) if key != "{}" else None
+        distances[rows], indices[rows] = filtered_search(index, query_embeddings[rows], depth, bitmap, row_ids)
+        for i in rows:
+            bitmaps[i] = bitmap
+    # FAISS ids (company ids) -> metadata store rows, the id space of the lexical and filter indexes
+    indices = faiss_data_store.rows_for(indices)
 
     results = []
-    for idx in indices[0]:
-        if idx != -1:
-            results.append(faiss_data_store[str(idx)])  
-
-    # ✅ Boost Exact Matches
-    for item in faiss_data_store.values():
-        meta = item.get("metadata", {})  # Ensure metadata is a dictionary
-        metadata_fields = [
-            str(meta.get("company_name", "")).lower(),
-            " ".join(map(str, meta.get("tags", []))).lower(),
-            " ".join(map(str, meta.get("founders_names", []))).lower(),
-            str(meta.get("location", "")).lower()
-        ]
-        # if any(query in field for field in metadata_fields):
-        #     results.insert(0, item)  # Prioritize exact matches
-
-    return results[:top_k]
+    for i, query in enumerate(queries):
+        # ✅ Boost Exact Matches (precomputed postings, no scan over the store)
+        bitmap = bitmaps[i]
+        lexical_ids, lexical_scores = components.get("inverted_index").match(query, limit=None if bitmap is not None else depth)
+        if bitmap is not None:
+            eligible = np.unpackbits(bitmap, count=len(faiss_data_store), bitorder="little").astype(bool)
+            keep = eligible[lexical_ids]
+            lexical_ids, lexical_scores = lexical_ids[keep][:depth], lexical_scores[keep][:depth]
+        ranked_ids = hybrid_rerank(distances[i], indices[i], lexical_ids, lexical_scores, top_k, HYBRID_VECTOR_WEIGHT)
+        results.append([faiss_data_store[idx] for idx in ranked_ids])
+    return results
+
+# ✅ Passage search: nearest passages grouped back to companies, only matching passages kept as text
+def search_passages(query, passage_index, faiss_data_store, top_k=5, filters=None, aggregation=None):
+    from passages import aggregate_passages, passage_document
+
+    query_embedding = query_encoder.encode([query.lower()])
+    bitmap = None
+    if filters:
+        company_mask = components.get("metadata_filters").mask(filters)
+        if company_mask is not None:
+            bitmap = passage_index.passage_bitmap(company_mask)
+    distances, passage_ids = filtered_search(passage_index.index, query_embedding, top_k * PASSAGE_CANDIDATES, bitmap)
+    companies = aggregate_passages(distances[0], passage_ids[0], passage_index, top_k, aggregation or PASSAGE_MODE)
+    return [passage_document(faiss_data_store[row], passage_index, ids) for row, _, ids in companies]
+
+# **LLM answer cache (exact + semantic), invalidated when the company data changes**
+LLM_CACHE_FILE = os.environ.get("LLM_CACHE_FILE", "llm_cache.sqlite3")
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", 86400))
+LLM_CACHE_MEMORY_ENTRIES = int(os.environ.get("LLM_CACHE_MEMORY_ENTRIES", 1024))
+LLM_CACHE_SEMANTIC_THRESHOLD = float(os.environ.get("LLM_CACHE_SEMANTIC_THRESHOLD", 0.92))
+
+answer_cache = LLMCache(
+    LLM_CACHE_FILE,
+    embed_fn=query_encoder.encode_one,
+    version_fn=lambda: data_version([DATA_FILE, FAISS_INDEX_FILE, os.path.join(FAISS_METADATA_DIR, "manifest.json")]),
+    max_memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+    ttl_seconds=LLM_CACHE_TTL,
+    semantic_threshold=LLM_CACHE_SEMANTIC_THRESHOLD,
+)
 
-def load_data(file_path):
-    with open(file_path, "r") as file:
-        return json.load(file)
+# **GeneralSearch translation cache (query -> parsed search field/value)**
+TRANSLATION_CACHE_ENTRIES = int(os.environ.get("TRANSLATION_CACHE_ENTRIES", 50000))
+TRANSLATION_FORMAT_REVISION = 2  # bump when parsing of the GeneralSearch response changes (2: "filters")
 
-# ✅ Load FAISS Index and Data
-def load_faiss_index():
-    if not os.path.exists(FAISS_INDEX_FILE) or not os.path.exists(FAISS_DATA_FILE):
-        print("⚠️ FAISS index or data not found. Rebuilding index...")
-        data = load_data(DATA_FILE)
-        # build_faiss_index(data)
-    
-    index = faiss.read_index(FAISS_INDEX_FILE)
-    with open(FAISS_DATA_FILE, "r", encoding="utf-8") as file:
-        faiss_data_store = json.load(file)
+def translation_prompt_version():
+    """Fingerprint of the GeneralSearch prompt template, the model and the response format."""
+    template = json.dumps(generate_prompt("GeneralSearch", "{user_query}", rag_results=None))
+    raw = f"{TRANSLATION_FORMAT_REVISION}|{groq_model}|{template}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
 
-    print("✅ FAISS index and data loaded successfully!")
-    return index, faiss_data_store
+translation_cache = QueryTranslationCache(LLM_CACHE_FILE, max_entries=TRANSLATION_CACHE_ENTRIES,
+                                          version_fn=translation_prompt_version)
+
+# **Single-flight coalescing: identical concurrent questions share one retrieval + LLM call**
+answer_flights = SingleFlight()       # full answers (non-streaming endpoints)
+translation_flights = SingleFlight()  # GeneralSearch translations
+retrieval_flights = SingleFlight()    # retrievals of streaming endpoints (tokens are not shared)
 
-index, faiss_data_store = load_faiss_index()
-
-# **Generate Text Embeddings using BERT**
-def encode_texts(texts, tokenizer, model, batch_size=32, device="cpu"):
-    embeddings = []
-    model.to(device)
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i+batch_size]
-        encoded_inputs = tokenizer(
-            batch,
-            padding=True,
-            truncation=True,
-            return_tensors="pt",
-            max_length=512
-        ).to(device)
-        with torch.no_grad():
-            outputs = model(**encoded_inputs)
-        batch_embeddings = outputs.last_hidden_state[:, 0, :].cpu().numpy()
-        embeddings.append(batch_embeddings)
-    return np.vstack(embeddings)
+def flight_key(*parts):
+    *prefix, user_query = parts
+    return (*prefix, normalize_query(user_query))
 
 
 # **Elasticsearch Query Function**
-def search_documents(index_name, query, size=10):
+async def search_documents(index_name, query, size=10):
     search_query = {
         "query": {
             "query_string": {
@@ -132,8 +296,14 @@ def search_documents(index_name, query, size=10):
             }
         }
     }
+    if SEARCH_BACKEND == "bm25":
+        print(f"\nProcessing BM25 query: {query}")
+        bm25_index = await components.aget("bm25")
+        return await run_in_threadpool(bm25_index.search, query, size)
+
     print(f"\nProcessing Elasticsearch query: {query}")
-    response = es.search(index=index_name, body=search_query, size=size)
+    es = await components.aget("elasticsearch")
+    response = await es.search(index=index_name, body=search_query, size=size)
 
     data = []
     # Print search results
@@ -151,13 +321,17 @@ def search_documents(index_name, query, size=10):
         return None
 
 # **Generate LLM Prompt**
+# Reference documents are packed into CONTEXT_TOKEN_BUDGET tokens (relevant fields only, descriptions trimmed)
+prompt_stats = PromptStats()
+
 def generate_prompt(context, user_query, rag_results):
     if context == "General":
         return [{
             "role": "user",
             "content": f"""
             You are QuackBot, a General chatbot for 'Y Combinator'.
-            Given the user query: "{user_query}", and the reference document: "{rag_results}",
+            Given the user query: "{user_query}", and the reference documents:
+            {pack_documents(rag_results, user_query, CONTEXT_TOKEN_BUDGET).text}
             please provide a precise on point answer strictly based on this information provided if query is irrelavent reply with saying Out of Bound Question please ask related to Y Combinator Data.
             """
         }]
@@ -190,10 +364,15 @@ def generate_prompt(context, user_query, rag_results):
                     "match": {{
                     "<field_name>": "<value>"
                     }}
-                }}
+                }},
+                "filters": {{}}
                 }}
                 ```
                 Replace `<field_name>` with the appropriate field based on the user query.
+                Put every structured constraint of the query in "filters" (leave it empty when there are none):
+                - "year_founded", "team_size", "num_founders": a number, or a range like {{"gte": 2018, "lt": 2021}} using gt, gte, lt, lte, eq
+                - "status", "country", "batch", "tags", "location": a value or a list of values, e.g. {{"batch": ["W21"], "country": "US"}}
+                "batch" is the YC batch stored in description (e.g. W21, S24); "country" is a two letter code.
                 """
             }]
     else:       
@@ -201,15 +380,23 @@ def generate_prompt(context, user_query, rag_results):
             "role": "user",
             "content": f"""
             You are QuackBot, a specialized chatbot for {context}. 
-            Using only the information provided in the reference document: "{rag_results[0].get("text")}" with metadata: {rag_results[0].get("metadata")}, answer exactly the following query: "{user_query}".
+            Using only the information provided in the reference document:
+            {pack_documents(rag_results[:1], user_query, CONTEXT_TOKEN_BUDGET).text}
+            answer exactly the following query: "{user_query}".
             please provide a precise answer strictly based on this information if query is irrelavent reply with saying Out of Bound Question please ask related to {context}.
             """
         }]
 
 # **Call Groq API**
-def groq_call(prompt, model):
-    output = client_llm.chat.completions.create(messages=prompt, model=model)
-    return output.choices[0].message.content
+async def groq_call(prompt, model):
+    client_llm = await components.aget("llm_client")
+    return await client_llm.complete(prompt, model)
+
+# **Stream Groq API tokens as they are generated**
+async def groq_stream(prompt, model):
+    client_llm = await components.aget("llm_client")
+    async for token in client_llm.stream(prompt, model):
+        yield token
 
 def extract_value_from_groq_response(groq_response):
     try:
@@ -229,45 +416,114 @@ def extract_value_from_groq_response(groq_response):
         print(f"Error extracting value: {e}")
         return None, None
 
+def extract_filters_from_groq_response(groq_response):
+    """Returns the normalized "filters" object of a GeneralSearch response, or {} if there is none."""
+    try:
+        response_str = json.dumps(groq_response) if isinstance(groq_response, dict) else groq_response
+        parsed = json.loads(response_str[response_str.index("{"):response_str.rindex("}") + 1])
+        return normalize_filters(parsed.get("filters"))
+    except (ValueError, AttributeError) as e:
+        print(f"Error extracting filters: {e}")
+        return {}
+
 
 # **API Endpoints**
 @app.get("/")
 def home():
     return {"message": "Welcome to the Quak bot"}
 
+# **Liveness and readiness probes**
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    if COMPONENT_LOADING == "lazy":
+        # Nothing is preloaded in lazy mode, only a failed required load makes the instance unready
+        statuses = components.status()
+        ready = all(statuses[name]["state"] != "failed" for name in REQUIRED_COMPONENTS)
+    else:
+        ready = components.ready(REQUIRED_COMPONENTS)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "components": components.status()},
+    )
+
+# **Translate a General question into a search value + structured filters (cached per normalized query)**
+async def translate_general_query_with_filters(user_query):
+    translation = await run_in_threadpool(translation_cache.get, user_query)
+    if translation is None:
+        translation = await translation_flights.do(flight_key(user_query), lambda: llm_translate(user_query))
+        if not translation.get("value"):
+            return user_query, translation.get("filters") or {}
+    return f"{translation['value']}", translation.get("filters") or {}
+
+async def llm_translate(user_query):
+    General_prompt = generate_prompt("GeneralSearch", user_query, rag_results=None)
+    groq_response = await groq_call(prompt=General_prompt, model=groq_model)
+    # Extract value from Groq response
+    field_name, field_value = extract_value_from_groq_response(groq_response)
+    filters = extract_filters_from_groq_response(groq_response)
+    print("Extracted field name, value and filters:", field_name, field_value, filters)
+    if not (field_name and field_value):
+        return {"filters": filters}
+
+    translation = {"field": field_name, "value": field_value, "filters": filters}
+    await run_in_threadpool(translation_cache.put, user_query, translation)
+    return translation
+
+async def translate_general_query(user_query):
+    query_attribute, _ = await translate_general_query_with_filters(user_query)
+    return query_attribute
+
+
+# **Retrieval + LLM answer, served from the answer cache when possible, identical concurrent misses coalesced**
+async def generate_answer(phase, retrieve, context, user_query):
+    cached = await run_in_threadpool(answer_cache.get, phase, context, user_query)
+    if cached is not None:
+        print(f"✅ Answer cache hit for {phase} ({context}): {user_query}")
+        return cached
+    return await answer_flights.do(flight_key(phase, context, user_query),
+                                   lambda: compute_answer(phase, retrieve, context, user_query))
+
+async def compute_answer(phase, retrieve, context, user_query):
+    rag_results = await retrieve(context, user_query)
+    if not rag_results:
+        return None
+
+    print(f"Retrieved {len(rag_results)} documents for {phase}, generating prompt...")
+    prompt = generate_prompt(context, user_query, rag_results)
+    tokens = prompt_tokens(prompt)
+    prompt_stats.record(phase, tokens)
+    print(f"📌 Prompt for {phase}: {tokens} tokens")
+    output = await groq_call(prompt=prompt, model=groq_model)
+    await run_in_threadpool(answer_cache.put, phase, context, user_query, output)
+    return output
+
+
 # **Phase 1: Elasticsearch-based Retrieval**
-@app.get("/response/phase1/{context}/{user_query}")
-def retrival_phase1(context: str, user_query: str):
-    start = time.time()
-    index_name = "y_combinator_companies"
-    
-    print(f"Received phase1 retrieval request with context: {context}, user_query: {user_query}")
-    
-    if context == "General":
-        General_prompt = generate_prompt("GeneralSearch", user_query, rag_results=None)
-        groq_response = groq_call(prompt=General_prompt, model=groq_model)
-        # Extract value from Groq response
-        field_name, field_value = extract_value_from_groq_response(groq_response)
-        print("Extracted field name and value:", field_name, field_value)
-
-        if field_name and field_value:
-            query_attribute = f"{field_value}"
-        else:
-            query_attribute = groq_response.get("query", groq_response)
+ES_INDEX_NAME = "y_combinator_companies"
 
-        rag_results = search_documents(index_name, query_attribute)
+async def retrieve_phase1(context, user_query):
+    if context == "General":
+        query_attribute = await translate_general_query(user_query)
+        rag_results = await search_documents(ES_INDEX_NAME, query_attribute)
         print("Retrieved rag_results from Elasticsearch:", rag_results)
     else:
-        rag_results = search_documents(index_name, context)
+        rag_results = await search_documents(ES_INDEX_NAME, context)
         print("Retrieved rag_results for non-general context:", rag_results)
+    return rag_results
 
-    if not rag_results:
-        return {"error": "No relevant Elasticsearch data found."}
+@app.get("/response/phase1/{context}/{user_query}")
+async def retrival_phase1(context: str, user_query: str):
+    start = time.time()
+    
+    print(f"Received phase1 retrieval request with context: {context}, user_query: {user_query}")
+    output = await generate_answer("phase1", retrieve_phase1, context, user_query)
 
-    print("Generating prompt for Groq call with rag_results...")
-    prompt = generate_prompt(context, user_query, rag_results)
-    print("Generated prompt:", prompt)
-    output = groq_call(prompt=prompt, model=groq_model)
+    if output is None:
+        return {"error": "No relevant Elasticsearch data found."}
     print("Final output from groq_call:", output)
 
     print(f"Time taken: {time.time() - start}")
@@ -275,57 +531,295 @@ def retrival_phase1(context: str, user_query: str):
 
 
 # **Phase 2: FAISS-based Retrieval**
+async def search_faiss_async(query, top_k=5, filters=None):
+    index, faiss_data_store = await components.aget("faiss")
+    if filters:
+        await components.aget("metadata_filters")
+    # FAISS search and query embedding are CPU bound, keep them off the event loop
+    if PASSAGE_MODE != "off":
+        passage_index = await components.aget("passages")
+        return await run_in_threadpool(search_passages, query, passage_index, faiss_data_store, top_k=top_k, filters=filters)
+    return await run_in_threadpool(search_faiss, query, index=index, faiss_data_store=faiss_data_store, top_k=top_k, filters=filters)
+
+async def retrieve_phase2(context, user_query):
+    filters = None
+    if context == "General":
+        query_attribute, filters = await translate_general_query_with_filters(user_query)
+    else:
+        query_attribute = context
+    return await search_faiss_async(query_attribute, top_k=5, filters=filters)
+
 @app.get("/response/phase2/{context}/{user_query}")
-def retrival_phase2(context: str, user_query: str):
+async def retrival_phase2(context: str, user_query: str):
     start = time.time()
-    input_text = f"{context} {user_query}"
+    output = await generate_answer("phase2", retrieve_phase2, context, user_query)
+        
+    if output is None:
+        return {"error": "No relevant Faiss data found."}
 
-    if context == "General":
-        General_prompt = generate_prompt("GeneralSearch", user_query, rag_results=None)
-        groq_response = groq_call(prompt=General_prompt, model=groq_model)
-        print(groq_response)
+    print(f"Time taken: {time.time() - start}")
+    return output
 
-        # Extract value from Groq response
-        field_name, field_value = extract_value_from_groq_response(groq_response)
 
-        if field_name and field_value:
-            query_attribute = f"{field_value}"
-        else:
-            query_attribute = groq_response.get("query", groq_response)    
-    
-        faiss_results = search_faiss(query_attribute, index=index, faiss_data_store=faiss_data_store, top_k=5)
+# **Batched FAISS search (no LLM): N queries, one encode, one matrix search per filter**
+BATCH_SEARCH_MAX_QUERIES = int(os.environ.get("BATCH_SEARCH_MAX_QUERIES", 1000))
+
+class BatchSearchQuery(BaseModel):
+    query: str
+    filters: Optional[dict] = None
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery]
+    top_k: int = 5
+    filters: Optional[dict] = None  # default for queries without their own filters
+
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    if len(request.queries) > BATCH_SEARCH_MAX_QUERIES:
+        return JSONResponse(status_code=413, content={"error": f"At most {BATCH_SEARCH_MAX_QUERIES} queries per batch."})
+    start = time.time()
+    index, faiss_data_store = await components.aget("faiss")
+    await components.aget("metadata_filters")
+    filters = [item.filters if item.filters is not None else request.filters for item in request.queries]
+    results = await run_in_threadpool(
+        search_faiss_batch, [item.query for item in request.queries],
+        index=index, faiss_data_store=faiss_data_store, top_k=max(1, request.top_k), filters=filters,
+    )
+    return {"results": results, "count": len(results), "took_ms": round((time.time() - start) * 1000, 1)}
+
+
+# **Hybrid: Elasticsearch + FAISS concurrently, fused with reciprocal rank fusion**
+RRF_K = int(os.environ.get("RRF_K", 60))
+HYBRID_TOP_K = int(os.environ.get("HYBRID_TOP_K", 5))
+HYBRID_ENGINE_DEPTH = 10  # results taken from each engine before fusion
+
+def company_key(document):
+    """Stable company id shared by ES and FAISS documents: metadata company_id (see company_records.company_id)."""
+    return company_id(document)
+
+def reciprocal_rank_fusion(result_lists, k=RRF_K, top_k=HYBRID_TOP_K):
+    """Scores each company by sum(1 / (k + rank)) over the lists it appears in, best first."""
+    scores = {}
+    documents = {}
+    for results in result_lists:
+        for rank, document in enumerate(results or [], start=1):
+            key = company_key(document)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, document)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)[:top_k]]
+
+async def retrieve_hybrid(context, user_query):
+    filters = None
+    if context == "General":
+        query_attribute, filters = await translate_general_query_with_filters(user_query)
     else:
-        faiss_results = search_faiss(context, index=index, faiss_data_store=faiss_data_store, top_k=5)
-        
-    if not faiss_results:
-        return {"error": "No relevant Faiss data found."}
-    
-    print(faiss_results)
-    prompt = generate_prompt(context, user_query, faiss_results)
-    output = groq_call(prompt=prompt, model=groq_model)
+        query_attribute = context
+
+    # Both engines run at once, so retrieval takes max(ES, FAISS) rather than the sum
+    es_results, faiss_results = await asyncio.gather(
+        search_documents(ES_INDEX_NAME, query_attribute, size=HYBRID_ENGINE_DEPTH),
+        search_faiss_async(query_attribute, top_k=HYBRID_ENGINE_DEPTH, filters=filters),
+        return_exceptions=True,
+    )
+    # One engine failing degrades to the other instead of failing the request
+    for engine, results in (("Elasticsearch", es_results), ("FAISS", faiss_results)):
+        if isinstance(results, Exception):
+            print(f"⚠️ {engine} retrieval failed in hybrid search: {results}")
+    if isinstance(es_results, Exception) and isinstance(faiss_results, Exception):
+        raise faiss_results
+    result_lists = [results for results in (es_results, faiss_results) if not isinstance(results, Exception)]
+    if filters:
+        # FAISS applies the filters inside the search; keyword hits are filtered here
+        result_lists = [[document for document in results or [] if document_matches(document, filters)] for results in result_lists]
+    return reciprocal_rank_fusion(result_lists)
+
+@app.get("/response/hybrid/{context}/{user_query}")
+async def retrival_hybrid(context: str, user_query: str):
+    start = time.time()
+    output = await generate_answer("hybrid", retrieve_hybrid, context, user_query)
+
+    if output is None:
+        return {"error": "No relevant Elasticsearch or Faiss data found."}
 
     print(f"Time taken: {time.time() - start}")
     return output
 
-# **Retrieve Company Data**
+
+# **Streaming (SSE) variants: retrieval metadata first, then LLM tokens**
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_answer(phase, retrieve, context, user_query):
+    start = time.time()
+    try:
+        cached = await run_in_threadpool(answer_cache.get, phase, context, user_query)
+        if cached is not None:
+            elapsed_ms = round((time.time() - start) * 1000, 1)
+            yield sse_event("metadata", {"phase": phase, "context": context, "cached": True})
+            yield sse_event("token", cached)
+            yield sse_event("done", {"retrieval_ms": 0.0, "first_token_ms": elapsed_ms, "total_ms": elapsed_ms})
+            return
+
+        rag_results = await retrieval_flights.do(flight_key(phase, context, user_query), lambda: retrieve(context, user_query))
+        retrieval_ms = (time.time() - start) * 1000
+        if not rag_results:
+            yield sse_event("error", {"error": f"No relevant data found for {phase}."})
+            return
+
+        prompt = generate_prompt(context, user_query, rag_results)
+        tokens_in_prompt = prompt_tokens(prompt)
+        prompt_stats.record(phase, tokens_in_prompt)
+        yield sse_event("metadata", {
+            "phase": phase,
+            "context": context,
+            "cached": False,
+            "retrieval_ms": round(retrieval_ms, 1),
+            "companies": [item.get("metadata", {}).get("company_name") for item in rag_results],
+            "prompt_tokens": tokens_in_prompt,
+        })
+        first_token_ms = None
+        tokens = []
+        async for token in groq_stream(prompt=prompt, model=groq_model):
+            if first_token_ms is None:
+                first_token_ms = (time.time() - start) * 1000
+                print(f"Time to first token ({phase}): {first_token_ms:.1f} ms")
+            tokens.append(token)
+            yield sse_event("token", token)
+        await run_in_threadpool(answer_cache.put, phase, context, user_query, "".join(tokens))
+
+        yield sse_event("done", {
+            "retrieval_ms": round(retrieval_ms, 1),
+            "first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+            "total_ms": round((time.time() - start) * 1000, 1),
+        })
+    except Exception as e:
+        print(f"Error while streaming {phase} answer: {e}")
+        yield sse_event("error", {"error": f"Error generating answer: {e}"})
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@app.get("/response/phase1/stream/{context}/{user_query}")
+async def retrival_phase1_stream(context: str, user_query: str):
+    return StreamingResponse(
+        stream_answer("phase1", retrieve_phase1, context, user_query),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+@app.get("/response/phase2/stream/{context}/{user_query}")
+async def retrival_phase2_stream(context: str, user_query: str):
+    return StreamingResponse(
+        stream_answer("phase2", retrieve_phase2, context, user_query),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+@app.get("/response/hybrid/stream/{context}/{user_query}")
+async def retrival_hybrid_stream(context: str, user_query: str):
+    return StreamingResponse(
+        stream_answer("hybrid", retrieve_hybrid, context, user_query),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+# **Cache Metrics**
+@app.get("/metrics/cache")
+def cache_metrics():
+    return {"llm_answer_cache": answer_cache.stats(), "translation_cache": translation_cache.stats(),
+            "query_embeddings": query_encoder.stats(), "company_data": company_data_payload.stats()}
+
+# **Prompt size metrics (tokens per phase)**
+@app.get("/metrics/prompts")
+def prompt_metrics():
+    return {"budget_tokens": CONTEXT_TOKEN_BUDGET, "phases": prompt_stats.stats()}
+
+# **Coalescing metrics (identical in-flight requests collapsed into one computation)**
+@app.get("/metrics/coalescing")
+def coalescing_metrics():
+    return {"answers": answer_flights.stats(), "translations": translation_flights.stats(),
+            "stream_retrievals": retrieval_flights.stats()}
+
+# **LLM client metrics (latency percentiles, retries, timeouts, hedges)**
+@app.get("/metrics/llm")
+def llm_metrics():
+    client_llm = components.peek("llm_client")
+    return client_llm.stats() if client_llm is not None else {"loaded": False}
+
+# **Retrieve Company Data (kept in memory pre-serialized and pre-compressed, reloaded when the file changes)**
+company_data_payload = JSONFilePayload("company_data.json")
+
 @app.get("/company_data")
-def retrieve_company_data():
+def retrieve_company_data(request: Request, fields: Optional[str] = None, offset: int = 0, limit: Optional[int] = None):
     try:
-        company_data_path = "company_data.json"
-        if os.path.exists(company_data_path):
-            company_data = json.load(open(company_data_path))
-            return company_data
-        else:
+        payload, total = company_data_payload.get(
+            fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None,
+            offset=offset,
+            limit=limit,
+        )
+        if payload is None:
             return {"error": "Company data file not found."}
+        headers = {"ETag": payload.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if total is not None:
+            headers["X-Total-Count"] = str(total)
+        if etag_matches(request.headers.get("if-none-match"), payload.etag):
+            return Response(status_code=304, headers=headers)
+        encoding, body = payload.negotiate(request.headers.get("accept-encoding"))
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
     except Exception as e:
         return {"error": f"Error fetching company list: {e}"}
 
+# **Company directory: name search + facet filters, one page of companies and the facet counts**
+@app.get("/companies")
+async def list_companies(
+    q: Optional[str] = None,
+    status: Optional[List[str]] = Query(None),
+    batch: Optional[List[str]] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+    country: Optional[List[str]] = Query(None),
+    location: Optional[List[str]] = Query(None),
+    sort: str = "",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=0),
+    facets: bool = True,
+    facet_limit: int = Query(FACET_LIMIT, ge=0),
+):
+    if sort not in SORTS:
+        return JSONResponse(status_code=400, content={"error": f"sort must be one of {[value for value in SORTS if value]}"})
+    directory = await components.aget("company_directory")
+    start = time.perf_counter()
+    result = await run_in_threadpool(
+        directory.search,
+        q,
+        {"status": status, "batch": batch, "tag": tag, "country": country, "location": location},
+        sort=sort,
+        offset=offset,
+        limit=limit,
+        facets=facets,
+        facet_limit=facet_limit,
+    )
+    result["took_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+# **One company in full (long description, images) for the expanded list entry**
+@app.get("/companies/{company_id}")
+async def get_company(company_id: str):
+    directory = await components.aget("company_directory")
+    record = directory.get(company_id)
+    if record is None:
+        return JSONResponse(status_code=404, content={"error": f"Company {company_id} not found."})
+    return record
+
 # **Delete Existing Data in Elasticsearch**
 @app.delete("/delete_index/{index_name}")
-def delete_index(index_name: str):
+async def delete_index(index_name: str):
+    if SEARCH_BACKEND != "es":
+        return {"error": f"Elasticsearch is not used with SEARCH_BACKEND={SEARCH_BACKEND}."}
     try:
-        if es.indices.exists(index=index_name):
-            es.indices.delete(index=index_name)
+        es = await components.aget("elasticsearch")
+        if await es.indices.exists(index=index_name):
+            await es.indices.delete(index=index_name)
             return {"message": f"Index '{index_name}' deleted successfully."}
         else:
             return {"error": f"Index '{index_name}' does not exist."}
@@ -0,0 +1,217 @@
+import numpy as np
+from metadata_store import INT_NULL
+
+
+# **Structured metadata filters for FAISS search**
+#
+# Filters look like {"year_founded": {"gte": 2018}, "team_size": {"gt": 50}, "status": "Active",
+# "batch": ["W21", "S21"], "tags": "fintech"}: numbers take a value or a gt/gte/lt/lte/eq range,
+# categories take one value or a list (any of). Fields are ANDed together. The resulting row
+# mask becomes an IDSelectorBitmap (or an IDSelectorBatch of the rows' FAISS ids) inside `index.search`.
+NUMERIC_FIELDS = {
+    "year_founded": "metadata.year_founded",
+    "team_size": "metadata.team_size",
+    "num_founders": "metadata.num_founders",
+}
+CATEGORICAL_FIELDS = {
+    "status": "metadata.status",
+    "country": "metadata.country",
+    "batch": "metadata.description",
+    "tags": "metadata.tags",
+    "location": "metadata.location",
+}
+FIELD_ALIASES = {"description": "batch", "tag": "tags"}
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte", "eq")
+
+# Below this many eligible vectors an exact scan of just those vectors beats a filtered ANN search
+BRUTE_FORCE_LIMIT = 2048
+
+
+def numeric_value(value):
+    """An int for numbers and numeric strings (12, 7.5, "2019"); None for anything else (None, "10-50")."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def normalize_filters(filters):
+    """Keeps known fields with well-formed values; returns {} for anything unusable."""
+    if not isinstance(filters, dict):
+        return {}
+    normalized = {}
+    for field, value in filters.items():
+        field = FIELD_ALIASES.get(str(field).lower(), str(field).lower())
+        if field in NUMERIC_FIELDS:
+            bounds = value if isinstance(value, dict) else {"eq": value}
+            clean = {}
+            for operator, bound in bounds.items():
+                try:
+                    if operator in RANGE_OPERATORS and bound is not None:
+                        clean[operator] = int(float(bound))
+                except (TypeError, ValueError):
+                    continue
+            if clean:
+                normalized[field] = clean
+        elif field in CATEGORICAL_FIELDS:
+            values = value if isinstance(value, list) else [value]
+            values = [str(item).strip().lower() for item in values if item not in (None, "")]
+            if values:
+                normalized[field] = values
+    return normalized
+
+
+def document_matches(document, filters):
+    """Applies normalized filters to one {"text", "metadata"} document, e.g. an Elasticsearch hit."""
+    metadata = document.get("metadata") or {}
+    for field, condition in filters.items():
+        if field in NUMERIC_FIELDS:
+            value = numeric_value(metadata.get(NUMERIC_FIELDS[field].split(".", 1)[1]))
+            if value is None:
+                return False
+            if ("eq" in condition and value != condition["eq"]) or ("gt" in condition and value <= condition["gt"]) \
+                    or ("gte" in condition and value < condition["gte"]) or ("lt" in condition and value >= condition["lt"]) \
+                    or ("lte" in condition and value > condition["lte"]):
+                return False
+        else:
+            value = metadata.get(CATEGORICAL_FIELDS[field].split(".", 1)[1])
+            values = {str(item).strip().lower() for item in (value if isinstance(value, list) else [value]) if item is not None}
+            if not values & set(condition):
+                return False
+    return True
+
+
+class MetadataFilterIndex:
+    """
+    Per-field columnar indexes over the metadata store: numeric fields as rows sorted by value
+    (range -> two binary searches), categorical fields as one packed bitmap per distinct value.
+    """
+
+    def __init__(self, store):
+        self.count = len(store)
+        self.numeric = {}
+        for field, column in NUMERIC_FIELDS.items():
+            # Columns with mixed types come back as stored (json kind); non-numeric values are skipped
+            values = [numeric_value(value) for value in store.column_values(column)]
+            values = np.array([INT_NULL if value is None else value for value in values], dtype=np.int64)
+            rows = np.flatnonzero(values != INT_NULL)
+            order = np.argsort(values[rows], kind="stable")
+            self.numeric[field] = (values[rows][order], rows[order])
+
+        self.bitmaps = {}
+        for field, column in CATEGORICAL_FIELDS.items():
+            rows_by_value = {}
+            for row, value in enumerate(store.column_values(column)):
+                for item in value if isinstance(value, list) else [value]:
+                    if item not in (None, ""):
+                        rows_by_value.setdefault(str(item).strip().lower(), []).append(row)
+            self.bitmaps[field] = {value: self._bitmap(rows) for value, rows in rows_by_value.items()}
+
+    def _bitmap(self, rows):
+        mask = np.zeros(self.count, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask, bitorder="little")
+
+    def _range_rows(self, field, bounds):
+        values, rows = self.numeric[field]
+        low, high = 0, len(values)
+        if "eq" in bounds:
+            low = max(low, np.searchsorted(values, bounds["eq"], side="left"))
+            high = min(high, np.searchsorted(values, bounds["eq"], side="right"))
+        if "gte" in bounds:
+            low = max(low, np.searchsorted(values, bounds["gte"], side="left"))
+        if "gt" in bounds:
+            low = max(low, np.searchsorted(values, bounds["gt"], side="right"))
+        if "lte" in bounds:
+            high = min(high, np.searchsorted(values, bounds["lte"], side="right"))
+        if "lt" in bounds:
+            high = min(high, np.searchsorted(values, bounds["lt"], side="left"))
+        return rows[low:high] if low < high else rows[:0]
+
+    def bitmap(self, filters):
+        """Packed little-endian bitmap (FAISS IDSelectorBitmap layout) of rows passing every filter, or None."""
+        filters = normalize_filters(filters)
+        if not filters:
+            return None
+        result = np.full((self.count + 7) // 8, 0xFF, dtype=np.uint8)
+        for field, condition in filters.items():
+            if field in NUMERIC_FIELDS:
+                field_bitmap = self._bitmap(self._range_rows(field, condition))
+            else:
+                field_bitmap = np.zeros_like(result)
+                for value in condition:
+                    value_bitmap = self.bitmaps[field].get(value)
+                    if value_bitmap is not None:
+                        field_bitmap |= value_bitmap
+            result &= field_bitmap
+        return result
+
+    def mask(self, filters):
+        bitmap = self.bitmap(filters)
+        if bitmap is None:
+            return None
+        return np.unpackbits(bitmap, count=self.count, bitorder="little").astype(bool)
+
+
+# **Filtered search**
+def search_parameters(index, selector):
+    """SearchParameters of the right subclass so the filter keeps the index's own efSearch / nprobe."""
+    import faiss
+    from ann_index import inner_index
+    inner = inner_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+    ivf = faiss.try_extract_index_ivf(inner)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def brute_force_search(index, query_embeddings, ids, k):
+    """Exact L2 search over only the eligible vectors (reconstructed by FAISS id)."""
+    from ann_index import enable_reconstruct
+    enable_reconstruct(index)
+    vectors = np.vstack([index.reconstruct(int(idx)) for idx in ids]).astype(np.float32)
+    queries = np.asarray(query_embeddings, dtype=np.float32)
+    # ||q - v||^2 = ||q||^2 - 2 q.v + ||v||^2: one (queries x ids) matmul, no queries x ids x dim temporary
+    distances = (queries * queries).sum(axis=1)[:, None] - 2 * (queries @ vectors.T) + (vectors * vectors).sum(axis=1)[None, :]
+    np.maximum(distances, 0, out=distances)
+    order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+    found_distances = np.full((len(query_embeddings), k), np.inf, dtype=np.float32)
+    found_ids = np.full((len(query_embeddings), k), -1, dtype=np.int64)
+    width = order.shape[1]
+    found_distances[:, :width] = np.take_along_axis(distances, order, axis=1)
+    found_ids[:, :width] = ids[order]
+    return found_distances, found_ids
+
+
+def filtered_search(index, query_embeddings, k, bitmap, row_ids=None, brute_force_limit=BRUTE_FORCE_LIMIT):
+    """
+    `index.search` restricted to rows set in `bitmap`. `row_ids` maps rows to FAISS ids when
+    they differ (stores keyed by company_id); results are always FAISS ids. Small eligible sets
+    are scanned exactly; larger ones use an id selector inside the ANN search, falling back to
+    the exact scan if the graph / probed lists could not surface k eligible neighbours.
+    """
+    import faiss
+    if bitmap is None:
+        return index.search(query_embeddings, k)
+
+    count = index.ntotal if row_ids is None else len(row_ids)
+    rows = np.flatnonzero(np.unpackbits(bitmap, count=count, bitorder="little"))
+    ids = rows if row_ids is None else np.asarray(row_ids, dtype=np.int64)[rows]
+    if len(ids) == 0:
+        return (np.full((len(query_embeddings), k), np.inf, dtype=np.float32),
+                np.full((len(query_embeddings), k), -1, dtype=np.int64))
+    if len(ids) <= brute_force_limit:
+        return brute_force_search(index, query_embeddings, ids, k)
+
+    if row_ids is None:
+        selector = faiss.IDSelectorBitmap(count, faiss.swig_ptr(bitmap))
+    else:
+        selector = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(np.ascontiguousarray(ids)))
+    distances, ids_found = index.search(query_embeddings, k, params=search_parameters(index, selector))
+    if (ids_found == -1).any() and min(k, len(ids)) > (ids_found != -1).sum(axis=1).min():
+        return brute_force_search(index, query_embeddings, ids, k)
+    return distances, ids_found
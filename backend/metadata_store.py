@@ -0,0 +1,299 @@
+import os
+import json
+import shutil
+import numpy as np
+
+
+# **Columnar, memory-mapped metadata store for FAISS results**
+#
+# Layout of a store directory:
+#   manifest.json            -> row count and ordered column schema
+#   <column>.offsets.bin     -> int64 end offsets (str/list/json columns, count + 1 entries)
+#   <column>.data.bin        -> utf-8 bytes of every value back to back (str/list/json columns)
+#   <column>.values.bin      -> int64 values (int columns)
+#   <column>.nulls.bin       -> uint8 null mask
+#
+# Records like {"text": ..., "metadata": {"company_name": ..., "tags": [...]}} are flattened
+# one level deep into columns named "text", "metadata.company_name", "metadata.tags", ...
+# Row i is the record with FAISS id i, unless the manifest names an "id_column" (e.g.
+# "metadata.company_id"), in which case that column holds each row's FAISS id.
+#
+# A column's kind comes from every value written to it: all ints -> "int", all strings ->
+# "str", all lists of strings -> "list". Anything else (floats, bools, nested values, or a
+# column mixing e.g. 12 and "10-50") is stored as "json" and reads back exactly as written.
+
+MANIFEST_FILE = "manifest.json"
+LIST_SEPARATOR = "\x1f"
+INT_NULL = np.iinfo(np.int64).min
+
+
+def _flatten(record):
+    for key, value in record.items():
+        if isinstance(value, dict):
+            for child, child_value in value.items():
+                yield f"{key}.{child}", child_value
+        else:
+            yield key, value
+
+
+def _infer_kind(value):
+    if isinstance(value, list):
+        return "list" if all(isinstance(item, str) for item in value) else "json"
+    if isinstance(value, int) and not isinstance(value, bool):
+        return "int"
+    if isinstance(value, str):
+        return "str"
+    return "json"
+
+
+def _open_array(path, dtype):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+# **Writer: streams records to column files with bounded memory**
+class MetadataStoreWriter:
+    """
+    Appends records one at a time; `close()` writes the manifest and swaps the store into place.
+    Callers that must publish the store together with something else call `finish()` and, once
+    that is ready too, `install()` (or `abort()` to keep the current store).
+    """
+
+    def __init__(self, directory, id_column=None):
+        self.directory = directory
+        self.id_column = id_column
+        self.tmp_directory = f"{directory}.tmp"
+        shutil.rmtree(self.tmp_directory, ignore_errors=True)
+        os.makedirs(self.tmp_directory)
+        self.count = 0
+        self.columns = {}
+        self._files = {}
+        self._offsets = {}
+        self._null_only = {}
+
+    def _path(self, name, suffix):
+        return os.path.join(self.tmp_directory, f"{name}.{suffix}.bin")
+
+    def _add_column(self, name, kind, existing=None):
+        self.columns[name] = kind
+        files = {"nulls": open(self._path(name, "nulls"), "wb")}
+        if kind == "int":
+            files["values"] = open(self._path(name, "values"), "wb")
+        else:
+            files["offsets"] = open(self._path(name, "offsets"), "wb")
+            files["data"] = open(self._path(name, "data"), "wb")
+            files["offsets"].write(np.int64(0).tobytes())
+            self._offsets[name] = 0
+        self._files[name] = files
+        # Backfill rows written before this column first appeared (or before it was widened)
+        for row in range(self.count):
+            self._write_value(name, existing[row] if existing is not None else None)
+
+    def _widen_to_json(self, name):
+        """Rewrites a column whose values turned out to have mixed types as a json column."""
+        for handle in self._files.pop(name).values():
+            handle.close()
+        reader = COLUMN_TYPES[self.columns[name]](self.tmp_directory, name)
+        existing = [reader.value(row) for row in range(self.count)]
+        del reader
+        for suffix in ("nulls", "values", "offsets", "data"):
+            if os.path.exists(self._path(name, suffix)):
+                os.remove(self._path(name, suffix))
+        self._add_column(name, "json", existing)
+
+    def _write_value(self, name, value):
+        kind = self.columns[name]
+        files = self._files[name]
+        if kind == "int":
+            try:
+                number = INT_NULL if value is None or value == "" else int(value)
+            except (TypeError, ValueError):
+                number = INT_NULL
+            files["values"].write(np.int64(number).tobytes())
+            files["nulls"].write(b"\x01" if number == INT_NULL else b"\x00")
+            return
+
+        if value is None:
+            encoded = b""
+        elif kind == "json":
+            encoded = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        elif kind == "list":
+            items = value if isinstance(value, list) else [value]
+            encoded = LIST_SEPARATOR.join(str(item) for item in items).encode("utf-8")
+        else:
+            encoded = str(value).encode("utf-8")
+        files["data"].write(encoded)
+        self._offsets[name] += len(encoded)
+        files["offsets"].write(np.int64(self._offsets[name]).tobytes())
+        files["nulls"].write(b"\x01" if value is None else b"\x00")
+
+    def append(self, record):
+        """Writes one record as the next row and returns its row id."""
+        values = dict(_flatten(record))
+        for name, value in values.items():
+            if value is None:
+                if name not in self.columns:
+                    self._null_only.setdefault(name, None)
+            elif name not in self.columns:
+                self._add_column(name, _infer_kind(value))
+            elif self.columns[name] not in ("json", _infer_kind(value)):
+                self._widen_to_json(name)
+        for name in self.columns:
+            self._write_value(name, values.get(name))
+        self.count += 1
+        return self.count - 1
+
+    def finish(self):
+        """Writes the manifest next to the columns, still in the temporary directory."""
+        # Columns that only ever held None are kept so every record has the same keys
+        for name in self._null_only:
+            if name not in self.columns:
+                self._add_column(name, "str")
+        for files in self._files.values():
+            for handle in files.values():
+                handle.close()
+        manifest = {"count": self.count, "columns": [{"name": name, "kind": kind} for name, kind in self.columns.items()]}
+        if self.id_column:
+            manifest["id_column"] = self.id_column
+        with open(os.path.join(self.tmp_directory, MANIFEST_FILE), "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=4)
+
+    def install(self):
+        """Replaces the store at `directory` with the finished one."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(self.tmp_directory, self.directory)
+
+    def abort(self):
+        """Discards the rows written so far, leaving the store at `directory` untouched."""
+        for files in self._files.values():
+            for handle in files.values():
+                handle.close()
+        shutil.rmtree(self.tmp_directory, ignore_errors=True)
+
+    def close(self):
+        self.finish()
+        self.install()
+
+
+def build_metadata_store(records, directory, id_column=None):
+    """Writes an iterable of records to a columnar store directory and returns the row count."""
+    writer = MetadataStoreWriter(directory, id_column)
+    for record in records:
+        writer.append(record)
+    writer.close()
+    return writer.count
+
+
+# **Column readers**
+class StrColumn:
+    def __init__(self, directory, name):
+        self.offsets = _open_array(os.path.join(directory, f"{name}.offsets.bin"), np.int64)
+        self.data = _open_array(os.path.join(directory, f"{name}.data.bin"), np.uint8)
+        self.nulls = _open_array(os.path.join(directory, f"{name}.nulls.bin"), np.uint8)
+
+    def raw(self, row):
+        return bytes(self.data[self.offsets[row]:self.offsets[row + 1]]).decode("utf-8")
+
+    def value(self, row):
+        return None if self.nulls[row] else self.raw(row)
+
+
+class ListColumn(StrColumn):
+    def value(self, row):
+        if self.nulls[row]:
+            return None
+        raw = self.raw(row)
+        return raw.split(LIST_SEPARATOR) if raw else []
+
+
+class JsonColumn(StrColumn):
+    def value(self, row):
+        return None if self.nulls[row] else json.loads(self.raw(row))
+
+
+class IntColumn:
+    def __init__(self, directory, name):
+        self.values = _open_array(os.path.join(directory, f"{name}.values.bin"), np.int64)
+        self.nulls = _open_array(os.path.join(directory, f"{name}.nulls.bin"), np.uint8)
+
+    def value(self, row):
+        return None if self.nulls[row] else int(self.values[row])
+
+
+COLUMN_TYPES = {"str": StrColumn, "list": ListColumn, "int": IntColumn, "json": JsonColumn}
+
+
+# **Reader: memory-mapped columns, records materialized on access**
+class MetadataStore:
+    """
+    Read-only columnar store indexed by row. Opening it only maps the column files;
+    `store[row]` builds the {"text": ..., "metadata": {...}} dict for one row on demand and
+    `rows_for(faiss_ids)` translates search results to rows.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+        self.count = manifest["count"]
+        self.kinds = {column["name"]: column["kind"] for column in manifest["columns"]}
+        self.columns = {
+            name: COLUMN_TYPES[kind](directory, name) for name, kind in self.kinds.items()
+        }
+        self.id_column = manifest.get("id_column")
+        if self.id_column:
+            self.ids = np.asarray(self.columns[self.id_column].values, dtype=np.int64)
+            self._id_order = np.argsort(self.ids, kind="stable")
+            self._sorted_ids = self.ids[self._id_order]
+        else:
+            self.ids = np.arange(self.count, dtype=np.int64)
+
+    def rows_for(self, ids):
+        """Maps FAISS ids to row numbers (vectorized); unknown ids and -1 map to -1."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not self.id_column:
+            return np.where((ids >= 0) & (ids < self.count), ids, -1)
+        if not self.count:
+            return np.full(ids.shape, -1, dtype=np.int64)
+        positions = np.clip(np.searchsorted(self._sorted_ids, ids), 0, self.count - 1)
+        found = (self._sorted_ids[positions] == ids) & (ids != -1)
+        return np.where(found, self._id_order[positions], -1)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, idx):
+        return 0 <= int(idx) < self.count
+
+    def __getitem__(self, idx):
+        row = int(idx)
+        if not 0 <= row < self.count:
+            raise KeyError(idx)
+        record = {}
+        for name, column in self.columns.items():
+            value = column.value(row)
+            parent, _, child = name.partition(".")
+            if child:
+                record.setdefault(parent, {})[child] = value
+            else:
+                record[name] = value
+        return record
+
+    def get(self, idx, default=None):
+        return self[idx] if idx in self else default
+
+    def value(self, name, idx):
+        """Reads a single field without materializing the whole record."""
+        column = self.columns.get(name)
+        return column.value(int(idx)) if column is not None else None
+
+    def column_values(self, name):
+        """Iterates one column in row order, e.g. to build secondary indexes at load time."""
+        column = self.columns.get(name)
+        for row in range(self.count):
+            yield column.value(row) if column is not None else None
+
+    def values(self):
+        for row in range(self.count):
+            yield self[row]
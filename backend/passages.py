@@ -0,0 +1,158 @@
+import os
+import re
+import json
+import argparse
+import numpy as np
+from ann_index import INDEX_TYPES, build_ann_index, write_ann_index
+from metadata_store import build_metadata_store
+from company_records import with_company_ids
+
+
+# **Passage-level index: descriptions split into passages, hits aggregated back to companies**
+#
+# Each company's text (name + short + long description) is split into passages of about
+# PASSAGE_WORDS words on sentence boundaries. Every passage is embedded on its own, prefixed with
+# the company name so it stays anchored to it. The passage store (a metadata store, row = FAISS
+# id) keeps the passage text and its company_id. At query time the nearest passages are grouped
+# by company and scored with the best passage (`max`) or the summed similarity of all retrieved
+# passages (`sum`); only the matching passages are passed on as the company's text.
+PASSAGE_WORDS = int(os.environ.get("PASSAGE_WORDS", 60))
+PASSAGE_OVERLAP_SENTENCES = 1
+PASSAGE_INDEX_FILE = "faiss_passages.bin"
+PASSAGE_METADATA_DIR = "faiss_passages"
+PASSAGE_AGGREGATIONS = ("max", "sum")
+PASSAGES_PER_COMPANY = int(os.environ.get("PASSAGES_PER_COMPANY", 2))  # passages handed to the LLM per company
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_passages(text, max_words=PASSAGE_WORDS, overlap_sentences=PASSAGE_OVERLAP_SENTENCES):
+    """Packs whole sentences into passages of at most `max_words` words (longer sentences are cut)."""
+    sentences = []
+    for sentence in SENTENCE_SPLIT.split(str(text or "").strip()):
+        words = sentence.split()
+        sentences.extend(" ".join(words[start:start + max_words]) for start in range(0, len(words), max_words))
+
+    passages, current = [], []
+    for sentence in sentences:
+        if current and sum(len(item.split()) for item in current) + len(sentence.split()) > max_words:
+            passages.append(" ".join(current))
+            # Carry the last sentence(s) over so a fact split across the boundary stays retrievable
+            current = current[-overlap_sentences:] if overlap_sentences else []
+            if sum(len(item.split()) for item in current) + len(sentence.split()) > max_words:
+                current = []
+        current.append(sentence)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def passage_records(documents, max_words=PASSAGE_WORDS):
+    """Yields one {"text", "metadata": {company_id, company_name, passage}} record per passage."""
+    for document in documents:
+        metadata = document.get("metadata") or {}
+        for number, passage in enumerate(split_passages(document.get("text"), max_words)):
+            yield {
+                "text": passage,
+                "metadata": {
+                    "company_id": metadata.get("company_id"),
+                    "company_name": metadata.get("company_name"),
+                    "passage": number,
+                },
+            }
+
+
+def passage_embedding_text(record):
+    return f"{record['metadata'].get('company_name') or ''}: {record['text']}".strip().lower()
+
+
+# **Build**
+def build_passage_index(data, encode_fn, index_path=PASSAGE_INDEX_FILE, metadata_dir=PASSAGE_METADATA_DIR,
+                        index_type="flat", model_name=None, embedding_cache=None, max_words=PASSAGE_WORDS, **index_params):
+    """Splits, encodes and indexes every passage; passage ids are rows of the passage store."""
+    if embedding_cache is not None:
+        encode_fn = embedding_cache.encoder(encode_fn)
+    documents = with_company_ids(data)
+    records = list(passage_records(documents, max_words))
+    texts = [passage_embedding_text(record) for record in records]
+    embeddings = encode_fn(texts)
+
+    index, params = build_ann_index(embeddings, np.arange(len(records), dtype=np.int64), index_type, **index_params)
+    write_ann_index(index, index_path, index_type, params, model=model_name, passage_words=max_words)
+    build_metadata_store(records, metadata_dir)
+    if embedding_cache is not None:
+        embedding_cache.gc([embedding_cache.key(text) for text in texts])
+        stats = embedding_cache.stats()
+        print(f"📌 Embedding cache: {stats['hits']} hits, {stats['misses']} encoded, {stats['entries']} entries")
+    print(f"✅ FAISS {index_type} passage index built: {len(records)} passages from {len(documents)} companies")
+    return index
+
+
+# **Query time**
+class PassageIndex:
+    """Passage index + store, with each passage's row in the company metadata store precomputed."""
+
+    def __init__(self, index, passage_store, company_store):
+        self.index = index
+        self.store = passage_store
+        self.company_ids = np.array([value for value in passage_store.column_values("metadata.company_id")], dtype=np.int64)
+        self.company_rows = company_store.rows_for(self.company_ids)
+
+    def passage_bitmap(self, company_mask):
+        """Restricts passages to companies set in a boolean company-row mask."""
+        eligible = np.zeros(len(self.company_rows), dtype=bool)
+        known = self.company_rows >= 0
+        eligible[known] = company_mask[self.company_rows[known]]
+        return np.packbits(eligible, bitorder="little")
+
+
+def aggregate_passages(distances, passage_ids, passage_index, top_k, aggregation="max"):
+    """
+    Groups one query's passage hits by company. L2 distances of unit vectors become cosine
+    similarities; a company scores its best passage (max) or the sum over its passages (sum).
+    Returns [(company row, score, [passage ids best first])], best company first.
+    """
+    companies = {}
+    for distance, passage_id in zip(distances, passage_ids):
+        if passage_id < 0:
+            continue
+        row = int(passage_index.company_rows[passage_id])
+        if row < 0:
+            continue
+        companies.setdefault(row, []).append((1.0 - float(distance) / 2.0, int(passage_id)))
+
+    scored = []
+    for row, hits in companies.items():
+        hits.sort(reverse=True)
+        score = hits[0][0] if aggregation == "max" else sum(similarity for similarity, _ in hits)
+        scored.append((row, score, [passage_id for _, passage_id in hits]))
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored[:top_k]
+
+
+def passage_document(company_document, passage_index, passage_ids, per_company=PASSAGES_PER_COMPANY):
+    """The company's metadata with only its best matching passages as text."""
+    passages = [passage_index.store.value("text", passage_id) for passage_id in passage_ids[:per_company]]
+    return {**company_document, "text": " … ".join(passage for passage in passages if passage)}
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    from embedders import MODEL_NAME, load_embedder
+    from embedding_store import EMBEDDING_CACHE_DIR, EmbeddingStore, embedding_model_id
+
+    parser = argparse.ArgumentParser(description="Build the passage-level FAISS index.")
+    parser.add_argument("--data", type=str, default="company_data_cleaned_final.json")
+    parser.add_argument("--index-type", type=str, choices=INDEX_TYPES, default=os.environ.get("FAISS_INDEX_TYPE", "flat"))
+    parser.add_argument("--max-words", type=int, default=PASSAGE_WORDS, help="Words per passage")
+    parser.add_argument("--no-cache", action="store_true", help="Encode every passage instead of reusing cached embeddings")
+    args = parser.parse_args()
+
+    backend = os.environ.get("EMBEDDER_BACKEND", "torch")
+    model = load_embedder(backend)
+    with open(args.data, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    # Own cache directory: company builds garbage-collect everything that is not a company text
+    cache = None if args.no_cache else EmbeddingStore(f"{EMBEDDING_CACHE_DIR}_passages", embedding_model_id(backend))
+    build_passage_index(data, lambda texts: model.encode(texts, show_progress_bar=True), index_type=args.index_type,
+                        model_name=MODEL_NAME, embedding_cache=cache, max_words=args.max_words)
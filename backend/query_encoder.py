@@ -0,0 +1,122 @@
+import time
+import queue
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+# **Micro-batcher: coalesce concurrent encode calls into one model batch**
+class MicroBatcher:
+    """
+    Collects texts submitted from many threads and encodes them together.
+
+    A background thread takes the first pending text, then keeps collecting for up to
+    `max_wait_ms` or until `max_batch_size` texts are queued, and runs `encode_fn` once on
+    the whole batch. Each caller gets a Future resolving to its own embedding row.
+    """
+
+    def __init__(self, encode_fn, max_batch_size=32, max_wait_ms=2.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.batched_texts = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text):
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = self.encode_fn(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_texts += len(texts)
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+
+# **Query encoder: LRU embedding cache in front of the micro-batcher**
+class QueryEncoder:
+    """
+    Thread-safe query embedding with an LRU cache of recent embeddings and optional
+    cross-request micro-batching. `encode_fn` takes a list of strings and returns a
+    (n, dim) float32 array, e.g. `lambda texts: model.encode(texts, convert_to_numpy=True)`.
+    """
+
+    def __init__(self, encode_fn, cache_size=4096, max_batch_size=32, max_wait_ms=2.0, batching=True):
+        self.encode_fn = encode_fn
+        self.cache_size = cache_size
+        self.batcher = MicroBatcher(encode_fn, max_batch_size, max_wait_ms) if batching else None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"cache_hits": 0, "cache_misses": 0}
+
+    def encode(self, texts):
+        """Returns a (len(texts), dim) float32 matrix, encoding only texts not already cached."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        results = [None] * len(texts)
+        missing = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                embedding = self._cache.get(text)
+                if embedding is not None:
+                    self._cache.move_to_end(text)
+                    results[i] = embedding
+                    self.metrics["cache_hits"] += 1
+                else:
+                    missing.setdefault(text, []).append(i)
+                    self.metrics["cache_misses"] += 1
+
+        if missing:
+            unique_texts = list(missing)
+            # Requests that already fill a batch go straight to the model instead of the batcher queue
+            if self.batcher is not None and len(unique_texts) < self.batcher.max_batch_size:
+                futures = [self.batcher.submit(text) for text in unique_texts]
+                embeddings = [future.result() for future in futures]
+            else:
+                embeddings = list(self.encode_fn(unique_texts))
+
+            with self._lock:
+                for text, embedding in zip(unique_texts, embeddings):
+                    embedding = np.asarray(embedding, dtype=np.float32)
+                    embedding.setflags(write=False)
+                    for i in missing[text]:
+                        results[i] = embedding
+                    if self.cache_size:
+                        self._cache[text] = embedding
+                        self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return np.vstack(results).astype(np.float32, copy=False)
+
+    def encode_one(self, text):
+        return self.encode([text])[0]
+
+    def stats(self):
+        stats = {**self.metrics, "cache_entries": len(self._cache)}
+        if self.batcher is not None:
+            stats["batches"] = self.batcher.batches
+            stats["avg_batch_size"] = round(self.batcher.batched_texts / self.batcher.batches, 2) if self.batcher.batches else 0.0
+        return stats
@@ -0,0 +1,46 @@
+import asyncio
+
+
+# **Single-flight request coalescing**
+#
+# Concurrent callers asking for the same key share one in-flight computation: the first caller
+# (the leader) starts it as a task, later callers await the same task and all get its result or
+# its exception. The task is shielded, so a client that disconnects does not cancel the work
+# the others wait for; its result still reaches the answer cache. Coalescing is per process,
+# every uvicorn worker collapses its own duplicates.
+class SingleFlight:
+    def __init__(self):
+        self._tasks = {}
+        self._waiters = {}
+        self.counters = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0, "max_waiters": 0}
+
+    def _finished(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.counters["errors"] += 1
+
+    async def do(self, key, fn):
+        """Awaits `fn()` once per key among concurrent callers and returns its result to all of them."""
+        self.counters["calls"] += 1
+        task = self._tasks.get(key)
+        if task is None:
+            self.counters["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+        else:
+            self.counters["coalesced"] += 1
+            self._waiters[key] += 1
+            self.counters["max_waiters"] = max(self.counters["max_waiters"], self._waiters[key])
+        return await asyncio.shield(task)
+
+    def stats(self):
+        calls = self.counters["calls"]
+        return {
+            **self.counters,
+            "in_flight": len(self._tasks),
+            "coalesced_rate": round(self.counters["coalesced"] / calls, 4) if calls else None,
+        }
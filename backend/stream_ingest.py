@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import numpy as np
+from company_records import prepare_document, preprocess_data, content_hash, company_id, document_hash
+from metadata_store import MetadataStoreWriter
+from ann_index import INDEX_TYPES, build_ann_index, write_ann_index
+from faiss_index_builder import ID_COLUMN, save_index_state
+from embedders import MODEL_NAME, load_embedder
+from embedding_store import EmbeddingStore, embedding_model_id
+from es_loader import (BULK_CHUNK_SIZE, BULK_THREADS, ES_HOST, ES_INDEX_NAME, load_state, prepare_es_index,
+                       run_parallel_bulk, save_state, updated_state)
+
+
+# **Single-pass streaming ingestion: output.jl -> Elasticsearch + FAISS + metadata store**
+#
+# The scraper's JSON-lines file is read one line at a time. Each company is prepared once and,
+# in the same pass, appended to the metadata store, buffered for batched encoding (vectors are
+# spilled to a float32 file on disk) and yielded as a bulk action to Elasticsearch. Only the
+# current batch, the ids and the content hashes are held in memory; the FAISS index is built
+# from the memory-mapped spill file at the end. A cheap id-only pre-pass finds the last record of
+# each company, so duplicates resolve the same way as in the full build.
+
+# **Constants**
+SOURCE_FILE = "output.jl"
+DOCUMENTS_FILE = "company_data_cleaned_final.json"
+FAISS_INDEX_FILE = "faiss_index.bin"
+FAISS_METADATA_DIR = "faiss_metadata"
+FAISS_INDEX_TYPE = os.environ.get("FAISS_INDEX_TYPE", "flat")
+EMBEDDER_BACKEND = os.environ.get("EMBEDDER_BACKEND", "torch")
+ENCODE_BATCH_SIZE = 256
+PROGRESS_EVERY = 5000
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def iter_jl(path, warn=True):
+    """Yields one scraped company per line, skipping blank and malformed lines."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                if warn:
+                    print(f"⚠️ Skipping malformed line {line_number}: {e}")
+
+
+def last_occurrences(path):
+    """
+    {company_id: position of its last record} over the .jl file. Duplicates keep the last
+    occurrence, like company_records.with_company_ids in the full build; this pre-pass holds
+    only the ids, so the main pass can skip superseded records without buffering them.
+    """
+    return {company_id(prepare_document(obj)): position for position, obj in enumerate(iter_jl(path, warn=False))}
+
+
+class StreamIngest:
+    """One pass over the .jl file; `actions()` drives it and yields Elasticsearch bulk actions."""
+
+    def __init__(self, source, embedder, metadata_dir, vectors_path, documents_file=None,
+                 batch_size=ENCODE_BATCH_SIZE, es_index=ES_INDEX_NAME, es_state=None, embedding_cache=None):
+        self.source = source
+        self.embedder = embedder
+        self.embedding_cache = embedding_cache
+        self.live_keys = []
+        self.batch_size = batch_size
+        self.es_index = es_index
+        self.es_state = es_state or {}
+        self.writer = MetadataStoreWriter(metadata_dir, id_column=ID_COLUMN)
+        self.vectors_path = vectors_path
+        self.vectors_file = open(vectors_path, "wb")
+        # Like the metadata store, the documents file is written aside and only installed with the index
+        self.documents_path = documents_file
+        self.documents_file = open(f"{documents_file}.tmp", "w", encoding="utf-8") if documents_file else None
+        self.ids = []
+        self.hashes = {}
+        self.es_hashes = {}
+        self.batch = []
+        self.dimension = None
+        self.duplicates = 0
+        self.skipped_unchanged = 0
+        self.encode_seconds = 0.0
+        self.start = time.time()
+
+    def _flush(self):
+        if not self.batch:
+            return
+        start = time.time()
+        if self.embedding_cache is not None:
+            self.live_keys.extend(self.embedding_cache.key(text) for text in self.batch)
+            embeddings = self.embedding_cache.encode(self.batch, lambda texts: self.embedder.encode(texts, batch_size=self.batch_size))
+        else:
+            embeddings = self.embedder.encode(self.batch, batch_size=self.batch_size)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.encode_seconds += time.time() - start
+        self.dimension = embeddings.shape[1]
+        self.vectors_file.write(embeddings.tobytes())
+        self.batch = []
+
+    def actions(self):
+        last = last_occurrences(self.source)
+        for position, obj in enumerate(iter_jl(self.source)):
+            document = prepare_document(obj)
+            doc_id = company_id(document)
+            if last[doc_id] != position:
+                # A later record of this company replaces it
+                self.duplicates += 1
+                continue
+            record = {**document, "metadata": {**document["metadata"], "company_id": doc_id}}
+
+            self.writer.append(record)
+            self.ids.append(doc_id)
+            self.hashes[str(doc_id)] = content_hash(record)
+            self.batch.append(preprocess_data(record))
+            if len(self.batch) >= self.batch_size:
+                self._flush()
+            if self.documents_file:
+                self.documents_file.write(("[\n" if len(self.ids) == 1 else ",\n") + json.dumps(document, ensure_ascii=False))
+
+            self.es_hashes[str(doc_id)] = document_hash(document)
+            if self.es_state.get(str(doc_id)) == self.es_hashes[str(doc_id)]:
+                self.skipped_unchanged += 1
+            else:
+                yield {"_op_type": "index", "_index": self.es_index, "_id": str(doc_id), "_source": document}
+
+            if len(self.ids) % PROGRESS_EVERY == 0:
+                print(f"🔄 {len(self.ids)} companies, {len(self.ids) / (time.time() - self.start):.0f} docs/sec, "
+                      f"peak RSS {peak_rss_mb():.0f} MB")
+
+        self._flush()
+        if self.embedding_cache is not None:
+            self.embedding_cache.gc(self.live_keys)
+        self.vectors_file.close()
+        self.writer.finish()
+        if self.documents_file:
+            self.documents_file.write("\n]\n" if self.ids else "[]\n")
+            self.documents_file.close()
+
+        # Companies that disappeared from the feed; an empty feed is treated as a failed scrape, not a wipe
+        if self.ids:
+            for doc_id in self.es_state:
+                if doc_id not in self.es_hashes:
+                    yield {"_op_type": "delete", "_index": self.es_index, "_id": doc_id}
+
+    def install(self):
+        """Swaps the new metadata store and documents file into place; call once the FAISS index is written."""
+        self.writer.install()
+        if self.documents_path:
+            os.replace(f"{self.documents_path}.tmp", self.documents_path)
+
+    def abort(self):
+        """Keeps the current metadata store and documents file."""
+        self.writer.abort()
+        if self.documents_path and os.path.exists(f"{self.documents_path}.tmp"):
+            os.remove(f"{self.documents_path}.tmp")
+
+    def vectors(self):
+        """Memory-mapped (count, dimension) float32 view of the spilled embeddings."""
+        if not self.ids:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self.ids), self.dimension))
+
+
+def connect_es(host, index_name):
+    """Returns (client, index is empty) for the index, or (None, False) when the cluster is unreachable."""
+    from elasticsearch import Elasticsearch
+    es = Elasticsearch(host)
+    if not es.ping():
+        print(f"⚠️ Could not connect to Elasticsearch at {host}, skipping it.")
+        return None, False
+    return es, prepare_es_index(es, index_name)
+
+
+# **Main Execution**
+if __name__ == "__main__":
+    os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"  # Prevent duplicate library errors
+
+    parser = argparse.ArgumentParser(description="Stream the scraper's .jl output into Elasticsearch, FAISS and the metadata store in one pass.")
+    parser.add_argument("source_file", type=str, nargs="?", default=SOURCE_FILE, help="Path to the .jl file (default: output.jl)")
+    parser.add_argument("--index-type", type=str, choices=INDEX_TYPES, default=FAISS_INDEX_TYPE)
+    parser.add_argument("--index-file", type=str, default=FAISS_INDEX_FILE)
+    parser.add_argument("--metadata-dir", type=str, default=FAISS_METADATA_DIR)
+    parser.add_argument("--documents-file", type=str, default=DOCUMENTS_FILE,
+                        help="Also write the prepared documents as JSON (used by the BM25 engine); '' to skip")
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE, help="Texts encoded per batch")
+    parser.add_argument("--es-host", type=str, default=ES_HOST)
+    parser.add_argument("--no-es", action="store_true", help="Only build the FAISS index and metadata store")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="Documents per bulk request")
+    parser.add_argument("--threads", type=int, default=BULK_THREADS, help="Parallel bulk requests")
+    parser.add_argument("--no-cache", action="store_true", help="Encode every text instead of reusing cached embeddings")
+    args = parser.parse_args()
+
+    es, es_state = None, {}
+    if not args.no_es:
+        es, empty = connect_es(args.es_host, ES_INDEX_NAME)
+        if es is not None and not empty:
+            # Same state file as "DataBase DataLoader.py": unchanged companies are not re-sent
+            es_state = load_state(ES_INDEX_NAME)
+
+    vectors_path = f"{args.index_file}.vectors.tmp"
+    embedding_cache = None if args.no_cache else EmbeddingStore(model_id=embedding_model_id(EMBEDDER_BACKEND))
+    ingest = StreamIngest(args.source_file, load_embedder(EMBEDDER_BACKEND), args.metadata_dir, vectors_path,
+                          documents_file=args.documents_file or None, batch_size=args.batch_size, es_state=es_state,
+                          embedding_cache=embedding_cache)
+
+    print(f"\n📌 Streaming {args.source_file}")
+    start = time.time()
+    failed = []
+    if es is not None:
+        # parallel_bulk pulls from the generator through a bounded queue, so ES back-pressures the pass
+        succeeded, failed = run_parallel_bulk(es, ingest.actions(), args.chunk_size, args.threads)
+        # Failed sends and deletes are retried by the next run
+        save_state(ES_INDEX_NAME, updated_state(es_state, ingest.es_hashes, succeeded))
+    else:
+        for _ in ingest.actions():
+            pass
+    stream_seconds = time.time() - start
+
+    print(f"\n📌 Building the FAISS {args.index_type} index")
+    build_start = time.time()
+    if ingest.ids:
+        index, params = build_ann_index(ingest.vectors(), np.array(ingest.ids, dtype=np.int64), args.index_type)
+        write_ann_index(index, args.index_file, args.index_type, params, model=MODEL_NAME)
+        save_index_state(args.index_file, ingest.hashes, churn=0)
+        # The metadata store's rows must line up with the index, so it only goes live now
+        ingest.install()
+    else:
+        print(f"⚠️ No companies read from {args.source_file}; keeping the existing index and metadata store.")
+        ingest.abort()
+    os.remove(vectors_path)
+    build_seconds = time.time() - build_start
+
+    count = len(ingest.ids)
+    print(f"✅ {count} companies in {stream_seconds:.2f}s ({count / stream_seconds if stream_seconds else 0:.0f} docs/sec), "
+          f"encoding {ingest.encode_seconds:.2f}s, FAISS build {build_seconds:.2f}s")
+    print(f"✅ Peak RSS {peak_rss_mb():.0f} MB")
+    if embedding_cache is not None:
+        stats = embedding_cache.stats()
+        print(f"📌 Embedding cache: {stats['hits']} hits, {stats['misses']} encoded, {stats['entries']} entries")
+    if ingest.duplicates:
+        print(f"⚠️ {ingest.duplicates} duplicate company ids skipped (last occurrence kept)")
+    if es is not None:
+        print(f"✅ Elasticsearch: {ingest.skipped_unchanged} unchanged companies skipped, {len(failed)} failed")
+        if failed:
+            print("❌ Failed documents are left out of the load state; rerun to retry them.")
@@ -0,0 +1,35 @@
+import os
+import json
+from bm25 import load_or_build_bm25
+
+
+DOCUMENTS = [
+    {"text": "Stripe payments infrastructure for the internet", "metadata": {"company_id": 1, "company_name": "Stripe"}},
+    {"text": "Cruise self-driving cars", "metadata": {"company_id": 2, "company_name": "Cruise"}},
+    {"text": "Brex corporate cards and payments for startups", "metadata": {"company_id": 3, "company_name": "Brex"}},
+]
+
+
+def write_data(tmp_path):
+    path = tmp_path / "companies.json"
+    path.write_text(json.dumps(DOCUMENTS), encoding="utf-8")
+    return str(path)
+
+
+def names(documents):
+    return [document["metadata"]["company_name"] for document in documents or []]
+
+
+def test_build_and_search(tmp_path):
+    index = load_or_build_bm25(write_data(tmp_path), str(tmp_path / "bm25"))
+    assert set(names(index.search("payments"))) == {"Stripe", "Brex"}
+    assert names(index.search("self-driving")) == ["Cruise"]
+    assert index.search("quantum") is None
+
+
+def test_saved_index_without_data_file(tmp_path):
+    data_file = write_data(tmp_path)
+    load_or_build_bm25(data_file, str(tmp_path / "bm25"))
+    os.remove(data_file)
+    index = load_or_build_bm25(data_file, str(tmp_path / "bm25"))
+    assert names(index.search("cards")) == ["Brex"]
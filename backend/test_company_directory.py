@@ -0,0 +1,52 @@
+import os
+import json
+import pytest
+from company_records import prepare_document
+from company_directory import COMPANIES_FILE, LIST_FIELDS, load_company_directory
+
+
+# **Data files**
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FILE = os.path.join(BACKEND_DIR, COMPANIES_FILE)
+# Scraped sample shipped with the repo, same records as company_data.json
+SAMPLE_FILE = os.path.join(BACKEND_DIR, "..", "Environment Setup", "Sample_output_data.jl")
+
+
+def assert_usable(directory):
+    result = directory.search(None, {})
+    assert result["total"] == directory.count > 0
+    for facet in ("status", "batch", "tag"):
+        assert result["facets"][facet], f"{facet} facet is empty"
+    name = result["companies"][0]["company_name"]
+    assert directory.search(name[:4], {})["total"] >= 1
+    status = result["facets"]["status"][0]
+    assert directory.search(None, {"status": [status["value"]]})["total"] == status["count"]
+
+
+@pytest.mark.skipif(not os.path.exists(DEFAULT_FILE), reason=f"{COMPANIES_FILE} is built by the data loader")
+def test_default_companies_file_has_facets():
+    assert_usable(load_company_directory(DEFAULT_FILE))
+
+
+def test_scraped_records_have_facets():
+    assert_usable(load_company_directory(SAMPLE_FILE))
+
+
+def test_prepared_documents_have_facets(tmp_path):
+    with open(SAMPLE_FILE, "r", encoding="utf-8") as file:
+        documents = [prepare_document(json.loads(line)) for line in file if line.strip()]
+    path = tmp_path / "company_data_cleaned_final.json"
+    path.write_text(json.dumps(documents), encoding="utf-8")
+    directory = load_company_directory(str(path))
+    assert_usable(directory)
+    assert directory.search(None, {"batch": [documents[0]["metadata"]["description"]]})["total"] >= 1
+
+
+def test_pages_carry_only_list_fields():
+    directory = load_company_directory(SAMPLE_FILE)
+    company = directory.search(None, {}, limit=5)["companies"][0]
+    assert set(company) == set(LIST_FIELDS)
+    assert "image_urls" not in company and "long_description" not in company
+    record = directory.get(company["company_id"])
+    assert record["company_name"] == company["company_name"] and "long_description" in record
+    assert directory.get(-1) is None
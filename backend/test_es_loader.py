@@ -0,0 +1,61 @@
+import pytest
+import es_loader
+
+
+def doc(company_id, name):
+    return {"text": name, "metadata": {"company_id": company_id, "company_name": name}}
+
+
+@pytest.fixture
+def bulk(tmp_path, monkeypatch):
+    """Replaces parallel_bulk with a recorder; ids in `failing` fail until removed."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(es_loader.time, "sleep", lambda seconds: None)
+    calls, failing = [], set()
+
+    def run_parallel_bulk(es, actions, chunk_size, thread_count):
+        actions = [(action["_op_type"], action["_id"]) for action in actions]
+        calls.append(actions)
+        return ([doc_id for _, doc_id in actions if doc_id not in failing],
+                [doc_id for _, doc_id in actions if doc_id in failing])
+
+    monkeypatch.setattr(es_loader, "run_parallel_bulk", run_parallel_bulk)
+    return calls, failing
+
+
+def test_only_changed_documents_are_sent(bulk):
+    calls, _ = bulk
+    es_loader.index_documents_in_es(None, "test", [doc(1, "A"), doc(2, "B")])
+    es_loader.index_documents_in_es(None, "test", [doc(1, "A"), doc(2, "B v2"), doc(3, "C")])
+    assert calls[0] == [("index", "1"), ("index", "2")]
+    assert calls[1] == [("index", "2"), ("index", "3")]
+
+
+def test_removed_documents_are_deleted(bulk):
+    calls, _ = bulk
+    es_loader.index_documents_in_es(None, "test", [doc(1, "A"), doc(2, "B")])
+    es_loader.index_documents_in_es(None, "test", [doc(1, "A")])
+    assert calls[1] == [("delete", "2")]
+    assert set(es_loader.load_state("test")) == {"1"}
+
+
+def test_full_resends_everything_and_still_deletes(bulk):
+    calls, _ = bulk
+    es_loader.index_documents_in_es(None, "test", [doc(1, "A"), doc(2, "B")])
+    es_loader.index_documents_in_es(None, "test", [doc(1, "A")], full=True)
+    assert calls[1] == [("index", "1"), ("delete", "2")]
+
+
+def test_failures_are_retried_then_kept_for_next_run(bulk):
+    calls, failing = bulk
+    es_loader.index_documents_in_es(None, "test", [doc(1, "A"), doc(2, "B")])
+    failing.update({"2", "3"})
+    ok = es_loader.index_documents_in_es(None, "test", [doc(1, "A v2"), doc(3, "C")], max_retries=2)
+    assert not ok
+    assert calls[2:] == [[("index", "3"), ("delete", "2")]] * 2
+    state = es_loader.load_state("test")
+    assert "3" not in state and "2" in state  # the new doc is re-sent, the delete retried next run
+    failing.clear()
+    es_loader.index_documents_in_es(None, "test", [doc(1, "A v2"), doc(3, "C")])
+    assert calls[-1] == [("index", "3"), ("delete", "2")]
+    assert set(es_loader.load_state("test")) == {"1", "3"}
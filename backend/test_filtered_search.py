@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from metadata_store import MetadataStore, build_metadata_store
+from metadata_filters import MetadataFilterIndex, document_matches, filtered_search, normalize_filters
+
+
+# **Fixture: 300 companies keyed by company_id, with a flat L2 index**
+DIMENSION = 16
+STATUSES = ["Active", "Inactive", "Acquired"]
+
+
+@pytest.fixture(scope="module")
+def setup(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    records = [{
+        "text": f"company {i}",
+        "metadata": {
+            "company_id": 1000 + 7 * i,
+            "company_name": f"Company {i}",
+            "status": STATUSES[i % 3],
+            "description": ["W21", "S21", "W22"][i % 5 % 3],
+            "tags": ["fintech", "ai"] if i % 4 == 0 else ["ai"],
+            "year_founded": 2010 + i % 12,
+            "team_size": i % 90,
+        },
+    } for i in range(300)]
+    directory = str(tmp_path_factory.mktemp("store") / "metadata")
+    build_metadata_store(records, directory, id_column="metadata.company_id")
+    store = MetadataStore(directory)
+
+    vectors = rng.standard_normal((len(records), DIMENSION)).astype(np.float32)
+    index = faiss.IndexIDMap2(faiss.IndexFlatL2(DIMENSION))
+    index.add_with_ids(vectors, store.ids)
+    queries = rng.standard_normal((20, DIMENSION)).astype(np.float32)
+    return records, store, MetadataFilterIndex(store), index, vectors, queries
+
+
+def exact_neighbours(vectors, ids, queries, rows, k):
+    distances = ((queries[:, None, :] - vectors[rows][None, :, :]) ** 2).sum(axis=2)
+    return np.asarray(ids)[rows][np.argsort(distances, axis=1, kind="stable")[:, :k]]
+
+
+FILTERS = [
+    {"status": "Active"},
+    {"tags": "fintech", "year_founded": {"gte": 2015}},
+    {"batch": ["W21", "S21"], "team_size": {"lt": 40}},
+    {"status": "Acquired", "tags": "fintech", "year_founded": {"gte": 2019, "lte": 2020}},
+]
+
+
+# **Bitmaps match the per-document rules**
+@pytest.mark.parametrize("filters", FILTERS)
+def test_bitmap_matches_document_rules(setup, filters):
+    records, store, filter_index, *_ = setup
+    normalized = normalize_filters(filters)
+    rows = np.flatnonzero(np.unpackbits(filter_index.bitmap(normalized), count=len(records), bitorder="little"))
+    expected = [row for row, record in enumerate(records) if document_matches(record, normalized)]
+    assert rows.tolist() == expected
+
+
+# **Brute force and FAISS selector paths agree with an exact scan**
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("brute_force_limit", [0, 10000])
+def test_filtered_search_parity(setup, filters, brute_force_limit):
+    records, store, filter_index, index, vectors, queries = setup
+    bitmap = filter_index.bitmap(normalize_filters(filters))
+    rows = np.flatnonzero(np.unpackbits(bitmap, count=len(records), bitorder="little"))
+    k = 5
+    distances, ids = filtered_search(index, queries, k, bitmap, row_ids=store.ids, brute_force_limit=brute_force_limit)
+    expected = exact_neighbours(vectors, store.ids, queries, rows, k)
+    width = min(k, len(rows))
+    assert (ids[:, :width] == expected[:, :width]).all()
+    assert (ids[:, width:] == -1).all()
+    assert set(ids[ids != -1].tolist()) <= set(store.ids[rows].tolist())
+
+
+def test_brute_force_distances_match_faiss(setup):
+    records, store, filter_index, index, vectors, queries = setup
+    bitmap = filter_index.bitmap(normalize_filters({"status": "Inactive"}))
+    brute = filtered_search(index, queries, 8, bitmap, row_ids=store.ids, brute_force_limit=10000)
+    selected = filtered_search(index, queries, 8, bitmap, row_ids=store.ids, brute_force_limit=0)
+    np.testing.assert_allclose(brute[0], selected[0], rtol=1e-4, atol=1e-4)
+
+
+def test_empty_selection(setup):
+    records, store, filter_index, index, vectors, queries = setup
+    bitmap = filter_index.bitmap(normalize_filters({"status": "Public"}))
+    distances, ids = filtered_search(index, queries, 5, bitmap, row_ids=store.ids)
+    assert (ids == -1).all() and np.isinf(distances).all()
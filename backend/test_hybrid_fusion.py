@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+# main is imported without loading models or indexes, and keeps its caches out of the tree
+os.environ.setdefault("COMPONENT_LOADING", "lazy")
+os.environ.setdefault("LLM_CACHE_FILE", os.path.join(tempfile.mkdtemp(), "llm_cache.sqlite3"))
+import main
+
+
+def doc(company_id=None, name="", url=None):
+    metadata = {"company_name": name}
+    if company_id is not None:
+        metadata["company_id"] = company_id
+    if url is not None:
+        metadata["ycombinator"] = url
+    return {"text": name, "metadata": metadata}
+
+
+def names(documents):
+    return [document["metadata"]["company_name"] for document in documents]
+
+
+def test_company_key_uses_company_id():
+    assert main.company_key(doc(7, "Stripe", "https://www.ycombinator.com/companies/stripe")) == 7
+    assert main.company_key(doc("7", "Stripe (ES copy)")) == 7
+
+
+def test_company_key_falls_back_to_url_then_name():
+    assert main.company_key(doc(None, "Stripe", "https://YC.com/stripe/")) == main.company_key(doc(None, "Other", "https://yc.com/stripe"))
+    assert main.company_key(doc(None, "Stripe")) == main.company_key(doc(None, " stripe "))
+
+
+def test_fusion_dedups_by_company_id():
+    es = [doc(1, "Alpha", "https://yc/alpha"), doc(2, "Beta")]
+    faiss = [doc(2, "Beta (renamed)", "https://yc/beta-new"), doc(1, "Alpha")]
+    fused = main.reciprocal_rank_fusion([es, faiss], k=60, top_k=5)
+    assert len(fused) == 2
+    assert {main.company_key(document) for document in fused} == {1, 2}
+
+
+def test_fusion_rewards_agreement_between_engines():
+    es = [doc(1, "A"), doc(2, "B"), doc(3, "C")]
+    faiss = [doc(4, "D"), doc(3, "C"), doc(5, "E")]
+    fused = main.reciprocal_rank_fusion([es, faiss], k=60, top_k=3)
+    # C is in both lists: 1/63 + 1/62 beats the single-list firsts (1/61)
+    assert names(fused) == ["C", "A", "D"]
+
+
+def test_fusion_handles_missing_lists_and_top_k():
+    fused = main.reciprocal_rank_fusion([None, [doc(i, str(i)) for i in range(10)]], k=60, top_k=4)
+    assert names(fused) == ["0", "1", "2", "3"]
@@ -0,0 +1,62 @@
+import gzip
+import json
+import pytest
+import json_payload
+from json_payload import EncodedPayload, JSONFilePayload, etag_matches
+
+
+BODY = json_payload.dump_json([{"name": f"Company {i}", "tags": ["ai"]} for i in range(200)])
+BROTLI = json_payload.brotli is not None
+
+
+def encoding_for(header):
+    return EncodedPayload(BODY, '"etag"').negotiate(header)[0]
+
+
+# **Accept-Encoding negotiation**
+@pytest.mark.parametrize("header", ["gzip;q=0", "gzip;q=0.0", "gzip; q=0", "gzip;Q=0.000", "br;q=0, gzip;q=0",
+                                    "*;q=0", "identity", "", None])
+def test_refused_or_missing_codings_get_identity(header):
+    assert encoding_for(header) == "identity"
+
+
+@pytest.mark.parametrize("header", ["gzip", "gzip;q=0.5", "deflate, gzip; q=0.01", "br;q=0, gzip", "gzip;q=bad"])
+def test_gzip_is_used_when_accepted(header):
+    assert encoding_for(header) == "gzip"
+
+
+def test_brotli_is_preferred_when_available():
+    assert encoding_for("gzip, br") == ("br" if BROTLI else "gzip")
+    assert encoding_for("*") == ("br" if BROTLI else "gzip")
+    assert encoding_for("*, br;q=0") == "gzip"
+
+
+def test_compressed_body_round_trips():
+    encoding, body = EncodedPayload(BODY, '"etag"').negotiate("gzip")
+    assert encoding == "gzip" and gzip.decompress(body) == BODY
+
+
+def test_small_bodies_are_not_compressed():
+    assert EncodedPayload(b"[]", '"etag"').negotiate("gzip, br") == ("identity", b"[]")
+
+
+# **ETags**
+def test_etag_matches():
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('W/"a", "b"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"') and not etag_matches(None, '"a"')
+
+
+def test_file_views_and_reload(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps([{"a": i, "b": -i} for i in range(10)]), encoding="utf-8")
+    payload = JSONFilePayload(str(path))
+    page, total = payload.get(fields=["a"], offset=2, limit=3)
+    assert total == 10 and json.loads(page.encodings["identity"]) == [{"a": 2}, {"a": 3}, {"a": 4}]
+    assert payload.get(fields=["a"], offset=2, limit=3)[0] is page
+    full, _ = payload.get()
+
+    path.write_text(json.dumps([{"a": 0}]), encoding="utf-8")
+    reloaded, total = payload.get()
+    assert total == 1 and reloaded.etag != full.etag
@@ -0,0 +1,121 @@
+import time
+import zlib
+import numpy as np
+from llm_cache import LLMCache, QueryTranslationCache, query_signature
+
+
+# **Helpers**
+def bag_of_words(text):
+    """Deterministic toy embedding: word counts hashed into 64 buckets, numbers ignored."""
+    vector = np.zeros(64, dtype=np.float32)
+    for word in text.split():
+        if not any(char.isdigit() for char in word):
+            vector[zlib.crc32(word.encode("utf-8")) % 64] += 1
+    return vector
+
+
+def make_cache(tmp_path, **kwargs):
+    kwargs.setdefault("embed_fn", bag_of_words)
+    kwargs.setdefault("semantic_threshold", 0.7)
+    return LLMCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+# **Exact tiers**
+def test_memory_hit_on_normalized_query(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("answers", "General", "What is Stripe?", "payments")
+    assert cache.get("answers", "General", "what is stripe") == "payments"
+    assert cache.metrics["memory_hits"] == 1
+
+
+def test_disk_hit_from_another_worker(tmp_path):
+    make_cache(tmp_path).put("answers", "General", "What is Stripe?", "payments")
+    other = make_cache(tmp_path)
+    assert other.get("answers", "General", "What is Stripe?") == "payments"
+    assert other.metrics["disk_hits"] == 1
+
+
+def test_scopes_do_not_mix(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("answers", "General", "tell me more", "general answer")
+    assert cache.get("answers", "Stripe", "tell me more") is None
+    assert cache.get("search", "General", "tell me more") is None
+
+
+def test_expired_answers_miss(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=0.05)
+    cache.put("answers", "General", "What is Stripe?", "payments")
+    time.sleep(0.1)
+    assert cache.get("answers", "General", "What is Stripe?") is None
+    assert make_cache(tmp_path, ttl_seconds=0.05).get("answers", "General", "What is Stripe?") is None
+
+
+# **Semantic tier**
+def test_query_signature_keeps_numbers_and_names():
+    assert query_signature("Which companies were founded in 2018?") == "2018"
+    assert query_signature("fintech in W21") == "w21"
+    assert query_signature("Stripe competitors") == "stripe"
+    assert query_signature("what does Brex do in 2020") == "2020 brex"
+
+
+def test_semantic_hit_for_paraphrase(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("answers", "General", "Which companies were founded in 2018?", "the 2018 list")
+    assert cache.get("answers", "General", "What companies were founded in 2018") == "the 2018 list"
+    assert cache.metrics["semantic_hits"] == 1
+
+
+def test_semantic_guard_on_numbers_and_names(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("answers", "General", "Which companies were founded in 2018?", "the 2018 list")
+    cache.put("answers", "General", "fintech in W21", "W21 fintech")
+    cache.put("answers", "General", "Tell me about Stripe", "stripe")
+    assert cache.get("answers", "General", "What companies were founded in 2019") is None
+    assert cache.get("answers", "General", "fintech in S21") is None
+    assert cache.get("answers", "General", "Tell me about Brex") is None
+    assert cache.metrics["semantic_hits"] == 0
+
+
+def test_semantic_tier_sees_other_workers_rows(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get("answers", "General", "robotics startups in Berlin") is None  # loads the scope
+    make_cache(tmp_path).put("answers", "General", "robotics startups in Berlin", "berlin robots")
+    assert cache.get("answers", "General", "list robotics startups in Berlin") == "berlin robots"
+
+
+def test_semantic_tier_off_without_threshold(tmp_path):
+    cache = make_cache(tmp_path, semantic_threshold=None)
+    cache.put("answers", "General", "Which companies were founded in 2018?", "the 2018 list")
+    assert cache.get("answers", "General", "What companies were founded in 2018") is None
+
+
+# **Version invalidation**
+def test_version_change_invalidates(tmp_path):
+    version = ["v1"]
+    cache = make_cache(tmp_path, version_fn=lambda: version[0], version_check_interval=0)
+    cache.put("answers", "General", "What is Stripe?", "payments")
+    version[0] = "v2"
+    assert cache.get("answers", "General", "What is Stripe?") is None
+    assert cache.get("answers", "General", "What is Stripe") is None  # semantic tier dropped too
+    assert cache.metrics["invalidations"] == 1
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_worker_on_older_version_keeps_newer_rows(tmp_path):
+    old = make_cache(tmp_path, version_fn=lambda: "v1")
+    old.put("answers", "General", "old question", "old")
+    new = make_cache(tmp_path, version_fn=lambda: "v2")
+    new.put("answers", "General", "What is Stripe?", "payments")
+    assert new.stats()["disk_entries"] == 1
+    # A worker that has not noticed the rebuild yet (re)starts on v1
+    make_cache(tmp_path, version_fn=lambda: "v1")
+    assert new.get("answers", "General", "What is Stripe?") == "payments"
+    assert make_cache(tmp_path, version_fn=lambda: "v2").get("answers", "General", "What is Stripe?") == "payments"
+
+
+# **Translation cache**
+def test_translation_cache_is_versioned(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    QueryTranslationCache(path, version_fn=lambda: "p1").put("Fintech in W21", {"field": "tags", "value": "fintech"})
+    assert QueryTranslationCache(path, version_fn=lambda: "p1").get("fintech in w21") == {"field": "tags", "value": "fintech"}
+    assert QueryTranslationCache(path, version_fn=lambda: "p2").get("fintech in w21") is None
@@ -0,0 +1,132 @@
+import time
+import asyncio
+import httpx
+import pytest
+from llm_client import HEDGE_MIN_SAMPLES, LLMClient, LLMError, LLMTimeout
+
+
+def answer(content="ok"):
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def run(handler, call, **client_params):
+    """Runs `call(client)` against a client whose requests go to `handler(request, attempt)`."""
+    attempts = []
+
+    async def transport(request):
+        attempts.append(request)
+        return await handler(request, len(attempts))
+
+    async def main():
+        client = LLMClient(**client_params)
+        await client.http.aclose()
+        client.http = httpx.AsyncClient(transport=httpx.MockTransport(transport))
+        try:
+            return await call(client), client
+        finally:
+            await client.close()
+
+    result, client = asyncio.run(main())
+    return result, client, attempts
+
+
+def complete(client, **params):
+    return client.complete([{"role": "user", "content": "hi"}], "test-model", **params)
+
+
+# **Retries**
+def test_retryable_statuses_are_retried():
+    async def handler(request, attempt):
+        return httpx.Response(503) if attempt < 3 else answer("third time")
+
+    result, client, attempts = run(handler, complete, max_retries=2)
+    assert result == "third time"
+    assert len(attempts) == 3 and client.counters["retries"] == 2
+
+
+def test_client_errors_are_not_retried():
+    async def handler(request, attempt):
+        return httpx.Response(400, text="bad request")
+
+    with pytest.raises(LLMError, match="HTTP 400"):
+        run(handler, complete, max_retries=2)
+
+
+def test_retries_are_bounded():
+    attempts = []
+
+    async def handler(request, attempt):
+        attempts.append(attempt)
+        return httpx.Response(500)
+
+    with pytest.raises(LLMError, match="after 2 attempts"):
+        run(handler, complete, max_retries=1)
+    assert attempts == [1, 2]
+
+
+def test_retry_after_is_honoured():
+    async def handler(request, attempt):
+        return httpx.Response(429, headers={"Retry-After": "0.3"}) if attempt == 1 else answer()
+
+    start = time.monotonic()
+    result, *_ = run(handler, complete, max_retries=1)
+    assert result == "ok" and time.monotonic() - start >= 0.3
+
+
+# **Deadlines**
+def test_retry_after_past_the_deadline_fails_fast():
+    async def handler(request, attempt):
+        return httpx.Response(429, headers={"Retry-After": "30"})
+
+    start = time.monotonic()
+    with pytest.raises(LLMTimeout):
+        run(handler, lambda client: complete(client, deadline=1.0), max_retries=3)
+    assert time.monotonic() - start < 1.0
+
+
+def test_slow_upstream_hits_the_deadline():
+    async def handler(request, attempt):
+        await asyncio.sleep(5)
+        return answer()
+
+    start = time.monotonic()
+    with pytest.raises(LLMTimeout):
+        run(handler, lambda client: complete(client, deadline=0.3))
+    assert time.monotonic() - start < 2
+
+
+# **Hedging**
+def hedged_call(latency):
+    async def call(client):
+        for _ in range(HEDGE_MIN_SAMPLES):
+            client.latency.add(latency)
+        return await complete(client)
+    return call
+
+
+def test_slow_primary_is_hedged():
+    async def handler(request, attempt):
+        await asyncio.sleep(2 if attempt == 1 else 0)
+        return answer(f"attempt {attempt}")
+
+    start = time.monotonic()
+    result, client, attempts = run(handler, hedged_call(0.05), hedge=True)
+    assert result == "attempt 2" and time.monotonic() - start < 1
+    assert client.counters["hedges"] == 1 and client.counters["hedges_won"] == 1
+
+
+def test_fast_primary_is_not_hedged():
+    async def handler(request, attempt):
+        return answer()
+
+    result, client, attempts = run(handler, hedged_call(1.0), hedge=True)
+    assert len(attempts) == 1 and client.counters["hedges"] == 0
+
+
+def test_no_hedge_without_enough_samples():
+    async def handler(request, attempt):
+        await asyncio.sleep(0.2)
+        return answer()
+
+    result, client, attempts = run(handler, complete, hedge=True)
+    assert len(attempts) == 1 and client.stats()["hedge_after_s"] is None
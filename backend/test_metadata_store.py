@@ -0,0 +1,52 @@
+import numpy as np
+from metadata_store import MetadataStore, build_metadata_store
+from metadata_filters import MetadataFilterIndex, normalize_filters
+
+
+# **Records**
+RECORDS = [
+    {"text": "a", "metadata": {"company_id": 11, "team_size": 12, "year_founded": 2018, "tags": ["fintech"], "score": 1.5}},
+    {"text": "b", "metadata": {"company_id": 22, "team_size": "10-50", "year_founded": None, "tags": ["ai", "b2b"], "score": 2}},
+    {"text": "c", "metadata": {"company_id": 33, "team_size": 7.5, "year_founded": "2019", "tags": None, "score": None}},
+    {"text": "d", "metadata": {"company_id": 44, "team_size": None, "year_founded": 2020, "tags": [], "public": True}},
+]
+
+
+def build(tmp_path, records=RECORDS, id_column="metadata.company_id"):
+    directory = str(tmp_path / "store")
+    build_metadata_store(records, directory, id_column=id_column)
+    return MetadataStore(directory)
+
+
+def test_kinds_come_from_every_value(tmp_path):
+    store = build(tmp_path)
+    assert store.kinds["text"] == "str"
+    assert store.kinds["metadata.company_id"] == "int"
+    assert store.kinds["metadata.tags"] == "list"
+    for column in ("metadata.team_size", "metadata.year_founded", "metadata.score", "metadata.public"):
+        assert store.kinds[column] == "json"
+
+
+def test_values_round_trip_exactly(tmp_path):
+    store = build(tmp_path)
+    for row, record in enumerate(RECORDS):
+        stored = store[row]
+        assert stored["text"] == record["text"]
+        for field, value in record["metadata"].items():
+            assert stored["metadata"][field] == value and type(stored["metadata"][field]) is type(value)
+    assert store[0]["metadata"]["public"] is None  # columns first seen later are backfilled
+
+
+def test_rows_for_maps_company_ids(tmp_path):
+    store = build(tmp_path)
+    assert store.rows_for([33, 11, 99, -1]).tolist() == [2, 0, -1, -1]
+
+
+def test_numeric_filters_skip_non_numeric_values(tmp_path):
+    index = MetadataFilterIndex(build(tmp_path))
+    rows = lambda filters: np.flatnonzero(np.unpackbits(index.bitmap(normalize_filters(filters)), count=len(RECORDS),
+                                                        bitorder="little")).tolist()
+    assert rows({"team_size": {"gte": 7}}) == [0, 2]
+    assert rows({"year_founded": {"gte": 2019}}) == [2, 3]
+    assert rows({"tags": ["AI"]}) == [1]
+    assert rows({"tags": "fintech", "year_founded": 2018}) == [0]
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from singleflight import SingleFlight
+
+
+def slow(result, calls, delay=0.05):
+    async def fn():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return fn
+
+
+def test_concurrent_callers_share_one_execution():
+    async def main():
+        flight, calls = SingleFlight(), []
+        results = await asyncio.gather(*(flight.do("q", slow("answer", calls)) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(main())
+    assert results == ["answer"] * 5 and calls == ["answer"]
+    stats = flight.stats()
+    assert (stats["calls"], stats["executions"], stats["coalesced"], stats["max_waiters"]) == (5, 1, 4, 5)
+    assert stats["in_flight"] == 0 and stats["coalesced_rate"] == 0.8
+
+
+def test_different_keys_and_later_calls_run_again():
+    async def main():
+        flight, calls = SingleFlight(), []
+        await asyncio.gather(flight.do("a", slow("a", calls)), flight.do("b", slow("b", calls)))
+        await flight.do("a", slow("a again", calls))
+        return calls
+
+    assert asyncio.run(main()) == ["a", "b", "a again"]
+
+
+def test_exception_reaches_every_waiter_once():
+    async def main():
+        flight, calls = SingleFlight(), []
+        results = await asyncio.gather(*(flight.do("q", slow(ValueError("boom"), calls)) for _ in range(3)),
+                                       return_exceptions=True)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["errors"] == 1 and flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def main():
+        flight, calls = SingleFlight(), []
+        leader = asyncio.ensure_future(flight.do("q", slow("answer", calls, delay=0.1)))
+        follower = asyncio.ensure_future(flight.do("q", slow("unused", calls)))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # the client that started the work disconnects
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return calls, await follower
+
+    calls, result = asyncio.run(main())
+    assert result == "answer" and calls == ["answer"]
@@ -0,0 +1,61 @@
+import os
+import json
+import numpy as np
+from metadata_store import MetadataStore
+from stream_ingest import StreamIngest
+
+
+class RandomEmbedder:
+    def encode(self, texts, batch_size=None):
+        return np.random.default_rng(len(texts)).standard_normal((len(texts), 4)).astype(np.float32)
+
+
+def ingest_file(tmp_path, companies, es_state=None):
+    source = tmp_path / "output.jl"
+    source.write_text("".join(json.dumps(company) + "\n" for company in companies), encoding="utf-8")
+    return StreamIngest(str(source), RandomEmbedder(), str(tmp_path / "metadata"), str(tmp_path / "vectors.tmp"),
+                        documents_file=str(tmp_path / "documents.json"), batch_size=2, es_state=es_state)
+
+
+def company(url, name):
+    fields = ["batch", "status", "tags", "location", "country", "year_founded", "num_founders", "founders_names",
+              "team_size", "website", "cb_url", "linkedin_url"]
+    return {**dict.fromkeys(fields), "company_name": name, "company_url": url,
+            "short_description": f"{name} does things", "long_description": ""}
+
+
+def test_duplicates_keep_the_last_record(tmp_path):
+    ingest = ingest_file(tmp_path, [company("https://yc/a", "A"), company("https://yc/b", "B"),
+                                    company("https://yc/a", "A v2")])
+    list(ingest.actions())
+    ingest.install()
+    store = MetadataStore(str(tmp_path / "metadata"))
+    assert ingest.duplicates == 1
+    assert [store[row]["metadata"]["company_name"] for row in range(len(store))] == ["B", "A v2"]
+    assert ingest.vectors().shape == (2, 4)
+
+
+def test_store_is_installed_only_after_install(tmp_path):
+    first = ingest_file(tmp_path, [company("https://yc/a", "A")])
+    list(first.actions())
+    first.install()
+
+    second = ingest_file(tmp_path, [company("https://yc/b", "B"), company("https://yc/c", "C")])
+    list(second.actions())
+    assert len(MetadataStore(str(tmp_path / "metadata"))) == 1
+    assert len(json.loads((tmp_path / "documents.json").read_text(encoding="utf-8"))) == 1
+    second.install()
+    assert len(MetadataStore(str(tmp_path / "metadata"))) == 2
+    assert len(json.loads((tmp_path / "documents.json").read_text(encoding="utf-8"))) == 2
+
+
+def test_empty_feed_keeps_everything(tmp_path):
+    first = ingest_file(tmp_path, [company("https://yc/a", "A")])
+    actions = list(first.actions())
+    first.install()
+
+    empty = ingest_file(tmp_path, [], es_state={actions[0]["_id"]: "hash"})
+    assert list(empty.actions()) == []  # no deletes for an empty feed
+    empty.abort()
+    assert len(MetadataStore(str(tmp_path / "metadata"))) == 1
+    assert not os.path.exists(tmp_path / "metadata.tmp")
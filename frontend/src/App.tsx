@@ -4,13 +4,14 @@ import CompanyItem from "./components/CompanyItem";
 import Chatbar from "./components/chatbar";
 import anya2 from "./assets/anya2.png";
 import fullface from "./assets/full_face.png";
-import company from './assets/companies.json';
+
+const API_URL = "http://127.0.0.1:8000";
 
 interface Company {
   company_id: number | null;
   company_name: string ;
   short_description: string | null;
-  long_description: string | null;
+  long_description?: string | null;  // not in /companies pages, loaded by CompanyItem
   batch: string | null;
   status: string | null;
   tags: string[];
@@ -31,6 +32,7 @@ const App: React.FC = () => {
   const [selectedCompany , setSelectedCompany] = useState<string | null>(null);
   const [currentmeme , setCurrentmeme] = useState<string>(fullface);
   const [companies, setCompanies] = useState<Company[]>([]);
+  const [totalCompanies, setTotalCompanies] = useState(0);
 
   const [currentPage, setCurrentPage] = useState(1);
   const companiesPerPage = 20; // Adjust as needed
@@ -71,18 +73,9 @@ const App: React.FC = () => {
   const [selectedBatch, setSelectedBatch] = useState<string | null>(null);
   const [selectedCategory, setSelectedCategory] = useState<string | null>(null);
 
-  const filteredCompanies = companies.filter((company) => {
-    const matchesSearch = company.company_name.toLowerCase().includes(searchQuery);
-    const matchesStatus = selectedStatus ? company.status === selectedStatus : true;
-    const matchesLocation = selectedLocation ? company.location?.toLowerCase().includes(selectedLocation.toLowerCase()) : true;
-    const matchesBatch = selectedBatch ? company.batch === selectedBatch : true;
-    const matchesCategory = selectedCategory ? company.tags.includes(selectedCategory) : true;
-    return matchesSearch && matchesStatus && matchesLocation && matchesBatch && matchesCategory;
-  });
-
+  // Filtering and paging happen server-side (/companies), only the current page is loaded
   const indexOfLastCompany = currentPage * companiesPerPage;
-  const indexOfFirstCompany = indexOfLastCompany - companiesPerPage;
-  const currentCompanies = filteredCompanies.slice(indexOfFirstCompany, indexOfLastCompany);
+  const currentCompanies = companies;
 
   const handleSelectedMeem = () => {
     setCurrentmeme(anya2);
@@ -98,29 +91,61 @@ const App: React.FC = () => {
 
   const handleSearchChange = (event: React.ChangeEvent<HTMLInputElement>) => {
     setSearchQuery(event.target.value.toLowerCase());
+    setCurrentPage(1);
   };
   
   const handleStatusChange = (event: React.ChangeEvent<HTMLSelectElement>) => {
     setSelectedStatus(event.target.value || null);
+    setCurrentPage(1);
   };
   
   const handleLocationChange = (event: React.ChangeEvent<HTMLSelectElement>) => {
     setSelectedLocation(event.target.value || null);
+    setCurrentPage(1);
   };
 
   const handleBatchChange = (event: React.ChangeEvent<HTMLSelectElement>) => {
     // Add your logic for handling batch change here
     setSelectedBatch(event.target.value || null);
+    setCurrentPage(1);
   };
 
   const handleCategoryChange = (event: React.ChangeEvent<HTMLSelectElement>) => {
     // Add your logic for handling category change here
     setSelectedCategory(event.target.value || null);
+    setCurrentPage(1);
   };
 
   useEffect(() => {
-    setCompanies(company as Company[]);
-  }, []);
+    const params = new URLSearchParams({
+      offset: String((currentPage - 1) * companiesPerPage),
+      limit: String(companiesPerPage),
+      facets: "false",
+    });
+    if (searchQuery) params.append("q", searchQuery);
+    if (selectedStatus) params.append("status", selectedStatus);
+    if (selectedLocation) params.append("location", selectedLocation);
+    if (selectedBatch) params.append("batch", selectedBatch);
+    if (selectedCategory) params.append("tag", selectedCategory);
+
+    // Debounced so typing a name sends one request, and stale responses are dropped
+    const controller = new AbortController();
+    const timer = setTimeout(() => {
+      fetch(`${API_URL}/companies?${params}`, { signal: controller.signal })
+        .then((response) => response.json())
+        .then((data) => {
+          setCompanies(data.companies as Company[]);
+          setTotalCompanies(data.total);
+        })
+        .catch((error) => {
+          if (error.name !== "AbortError") console.error("Error fetching companies:", error);
+        });
+    }, 150);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchQuery, selectedStatus, selectedLocation, selectedBatch, selectedCategory, currentPage]);
 
   return (
     <>
@@ -296,7 +321,7 @@ const App: React.FC = () => {
                     setSelectedStatus(null);
                     setSelectedBatch(null);
                     setSelectedCategory(null);
-                    
+                    setCurrentPage(1);
                   }}
                   className="m-1 p-1 text-sm font-bold border-1 ml-0 rounded tracking-wide"
                   >
@@ -316,7 +341,7 @@ const App: React.FC = () => {
             >
               {currentCompanies.map((company, index) => (
                 <CompanyItem
-                  key={index}
+                  key={company.company_id ?? index}
                   company={{
                     company_id: company.company_id,
                     company_name: company.company_name,
@@ -356,11 +381,11 @@ const App: React.FC = () => {
               </button>
 
               <span className="p-2">
-                Page {currentPage} of {Math.ceil(companies.length / companiesPerPage)}
+                Page {currentPage} of {Math.max(1, Math.ceil(totalCompanies / companiesPerPage))}
               </span>
 
               <button 
-                disabled={indexOfLastCompany >= companies.length} 
+                disabled={indexOfLastCompany >= totalCompanies} 
                 onClick={() => {
                   setCurrentPage(prev => prev + 1);
                   setOpenIndex(null);
@@ -1,4 +1,4 @@
-import React, { useState } from "react";
+import React, { useState, useEffect } from "react";
 import LazyLoad from "react-lazy-load";
 import linksvg from '../assets/link.svg'
 
@@ -7,7 +7,7 @@ interface CompanyItemProps {
         company_id: number | null;
         company_name: string;
         short_description: string | null;
-        long_description: string | null;
+        long_description?: string | null;
         batch: string | null;
         status: string | null;
         tags: string[];
@@ -28,8 +28,27 @@ interface CompanyItemProps {
     onClick: () => void;
 }
 
+const API_URL = "http://127.0.0.1:8000";
+
 const CompanyItem: React.FC<CompanyItemProps> = ({ company, isOpen, onToggle, onClick }) => {
     const [hovered, setHovered] = useState(false);
+    // List pages leave out the long description and images; they are fetched when the entry opens
+    const [details, setDetails] = useState<{ long_description?: string | null; image_urls?: string[] } | null>(null);
+
+    useEffect(() => {
+        if (!isOpen || details || company.company_id === null) return;
+        const controller = new AbortController();
+        fetch(`${API_URL}/companies/${company.company_id}`, { signal: controller.signal })
+            .then(response => response.ok ? response.json() : null)
+            .then(data => { if (data) setDetails(data); })
+            .catch(error => {
+                if (error.name !== "AbortError") console.error("Error fetching company details:", error);
+            });
+        return () => controller.abort();
+    }, [isOpen, details, company.company_id]);
+
+    const longDescription = details?.long_description ?? company.long_description;
+    const imageUrls = details?.image_urls ?? company.image_urls;
 
     return (
         <>
@@ -61,7 +80,7 @@ const CompanyItem: React.FC<CompanyItemProps> = ({ company, isOpen, onToggle, on
                         <LazyLoad height={60} offset={100}>
                             <img
                                 className="w-16 h-16 object-cover rounded-full"
-                                src={company.image_urls?.[1] || ""}
+                                src={imageUrls?.[1] || ""}
                                 alt="Company Logo"
                             />
                         </LazyLoad>
@@ -84,7 +103,7 @@ const CompanyItem: React.FC<CompanyItemProps> = ({ company, isOpen, onToggle, on
                     </div>
 
                     <p className="text-gray-700 text-sm sm:text-base break-words">{company.short_description || "No short description available."}</p>
-                    <p className="text-gray-600 text-sm sm:text-base break-words">{company.long_description || "No long description available."}</p>
+                    <p className="text-gray-600 text-sm sm:text-base break-words">{longDescription || "No long description available."}</p>
 
                     <div className="flex flex-wrap mt-3">
                         {company.website && (
@@ -1,6 +1,5 @@
 import React, { useState, useEffect, useRef } from "react";
 import tenorGif from "../assets/tenor.gif"; // Adjust path accordingly
-import axios from "axios";
  // Adjust path accordingly
 
 interface ChatbarProps {
@@ -46,18 +45,36 @@ const Chatbar: React.FC<ChatbarProps> = ({ company }) => {
         }
     };
 
-    const getresponse = async (currentSession:string , userMessage:string) => {   
-        console.log(userMessage)
-        try {
-            console.log(`http://127.0.0.1:8000/`)
-            const response = await axios.get(`http://127.0.0.1:8000/response/${phase}/${currentSession}/${userMessage}`)
-            console.log(response['data'])
-            return response['data']
-        }catch(error){
-            return (`Error Fetching chat : ${error}`)
-        }
+    // Streams the answer over SSE: metadata arrives first, then tokens are appended as they are generated
+    const streamResponse = (currentSession:string , userMessage:string) => {
+        const url = `http://127.0.0.1:8000/response/${phase}/stream/${encodeURIComponent(currentSession)}/${encodeURIComponent(userMessage)}`
+        const source = new EventSource(url)
+        let botIndex = -1
+
+        setMessages((prev) => {
+            botIndex = prev.length
+            return [...prev, { sender: "bot", text: "" }]
+        })
 
+        const appendText = (text: string) => {
+            setMessages((prev) => prev.map((msg, index) => index === botIndex ? { ...msg, text: msg.text + text } : msg))
+        }
 
+        source.addEventListener("metadata", (event) => {
+            console.log(JSON.parse((event as MessageEvent).data))
+        })
+        source.addEventListener("token", (event) => {
+            appendText(JSON.parse((event as MessageEvent).data))
+        })
+        source.addEventListener("done", (event) => {
+            console.log(JSON.parse((event as MessageEvent).data))
+            source.close()
+        })
+        source.addEventListener("error", (event) => {
+            const data = (event as MessageEvent).data
+            appendText(data ? JSON.parse(data).error : "")
+            source.close()
+        })
     }
 
     const handleSendMessage = () => {
@@ -68,15 +85,8 @@ const Chatbar: React.FC<ChatbarProps> = ({ company }) => {
         setMessages((prev) => [...prev, userMessage]);
         setInput("");
 
-        // actual bot response 
-        const bot_response = getresponse(currentSession, input);
-        bot_response.then(response => {
-            const botMessage: Message = {
-                sender: "bot",
-                text: `${response}`,
-            };
-            setMessages((prev) => [...prev, botMessage]);
-        });
+        // actual bot response, streamed token by token
+        streamResponse(currentSession, input);
     };
 
 
@@ -106,6 +116,9 @@ const Chatbar: React.FC<ChatbarProps> = ({ company }) => {
                         <button 
                         className={`p-2 text-xl font-bold ${phase === 'phase2' ? '  text-black bg-inherit border-2 rounded-2xl' : ''} `} 
                         onClick = {() => setPhase('phase2')}>Phase 2</button>
+                        <button 
+                        className={`p-2 text-xl font-bold ${phase === 'hybrid' ? '  text-black bg-inherit border-2 rounded-2xl' : ''} `} 
+                        onClick = {() => setPhase('hybrid')}>Hybrid</button>
                     </div>
 
                     <button